@@ -1,4 +1,4 @@
 # -*- coding: utf-8 -*-
 from . import controllers
 from . import services
-# from . import models # if any models are defined directly in this module
\ No newline at end of file
+from . import models
\ No newline at end of file
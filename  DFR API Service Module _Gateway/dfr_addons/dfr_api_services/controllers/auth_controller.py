@@ -13,10 +13,12 @@ _logger = logging.getLogger(__name__)
 class AuthController(BaseApiController):
 
     @http.route('/api/dfr/v1/auth/token', type='http', auth='public', methods=['POST'], csrf=False)
+    @BaseApiController._rate_limit('auth')
     def get_token(self, **kwargs):
         """
         Handles token issuance based on OAuth2-like grant types.
-        Currently supports 'password' grant type for mobile app/user login.
+        Currently supports 'password' grant type for mobile app/user login, and
+        'refresh_token' to renew the tokens without the user's password.
         Future: 'client_credentials' for server-to-server.
         """
         try:
@@ -54,6 +56,28 @@ class AuthController(BaseApiController):
                     return ApiHelper.format_error_response(
                         'INVALID_GRANT', 'Invalid username or password.', 400 # OAuth2 uses 400 for invalid_grant
                     )
+            elif grant_type == 'refresh_token':
+                refresh_token = kwargs.get('refresh_token')
+                if not refresh_token:
+                    return ApiHelper.format_error_response(
+                        'INVALID_REQUEST', 'refresh_token is required for refresh_token grant type.', 400
+                    )
+                # Revoked (token epoch) or inactive users cannot renew: the new tokens carry the current groups
+                user = auth_service.authenticate_refresh_token(refresh_token)
+                if not user:
+                    return ApiHelper.format_error_response(
+                        'INVALID_GRANT', 'Invalid, expired or revoked refresh token.', 400
+                    )
+                access_token, new_refresh_token, expires_in = auth_service.generate_jwt_tokens_for_user(user)
+                return ApiHelper.format_success_response(data={
+                    'access_token': access_token,
+                    'token_type': 'Bearer',
+                    'expires_in': expires_in,
+                    'refresh_token': new_refresh_token,
+                    'user_id': user.id,
+                    'user_name': user.name,
+                    'user_role': [group.name for group in user.groups_id if group.is_application]
+                })
             # TODO: Implement 'client_credentials' grant type for trusted server-to-server
             # elif grant_type == 'client_credentials':
             #     client_id = kwargs.get('client_id')
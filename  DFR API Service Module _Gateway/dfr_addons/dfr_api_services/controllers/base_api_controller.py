@@ -10,6 +10,7 @@ from odoo.exceptions import AccessError, UserError, ValidationError
 
 from ..services.auth_service import AuthService
 from ..services.api_helper import ApiHelper
+from ..services.rate_limiter import RateLimitService
 
 _logger = logging.getLogger(__name__)
 
@@ -38,17 +39,21 @@ class BaseApiController(http.Controller):
                         status_code=401
                     )
 
-                auth_service = AuthService(request.env)
-                # Pass request.env to get_user_from_token for user browsing in correct environment
-                user = auth_service.get_user_from_token(request.env, token)
+                # Verified from the cache of verified tokens or from the signed claims, as per
+                # the authorization mode: no user or group lookup on every request
+                verified = AuthService(request.env).verify_access_token(token)
 
-                if not user:
+                if not verified or not verified[1]:
+                    if verified: # Valid token of a deactivated user
+                        _logger.warning(f"User ID {verified[0]} from token found but is inactive.")
                     # AuditLogService.log_api_access_attempt(request, success=False, reason="Invalid token")
                     return ApiHelper.format_error_response(
                         error_code='INVALID_TOKEN',
                         error_message='Invalid or expired authentication token.',
                         status_code=401
                     )
+                user_id, _active, user_groups, _expiry = verified
+                user = request.env['res.users'].browse(user_id)
                 
                 # Set Odoo environment UID to the authenticated user for ORM operations
                 # and store the user record on the request for easy access in controllers.
@@ -57,7 +62,6 @@ class BaseApiController(http.Controller):
 
                 # Authorization check
                 if required_groups:
-                    is_authorized = False
                     if not isinstance(required_groups, list):
                         _logger.error(f"required_groups must be a list, got {type(required_groups)}")
                         # AuditLogService.log_api_access_denied(request, user, reason="Server configuration error: required_groups not a list")
@@ -67,21 +71,9 @@ class BaseApiController(http.Controller):
                             status_code=500
                         )
                     
-                    for group_xml_id in required_groups:
-                        try:
-                            if user.has_group(group_xml_id):
-                                is_authorized = True
-                                break
-                        except Exception as e:
-                            _logger.error(f"Error checking group {group_xml_id} for user {user.login}: {e}")
-                            # AuditLogService.log_api_access_denied(request, user, reason=f"Server error checking group {group_xml_id}")
-                            return ApiHelper.format_error_response(
-                                error_code='INTERNAL_SERVER_ERROR',
-                                error_message='Error during authorization check.',
-                                status_code=500
-                            )
+                    is_authorized = any(group_xml_id in user_groups for group_xml_id in required_groups)
                     if not is_authorized:
-                        _logger.warning(f"User {user.login} (ID: {user.id}) does not have required groups: {required_groups} for {request.httprequest.path}")
+                        _logger.warning(f"User ID {user.id} does not have required groups: {required_groups} for {request.httprequest.path}")
                         # AuditLogService.log_api_access_denied(request, user, required_groups=required_groups)
                         return ApiHelper.format_error_response(
                             error_code='FORBIDDEN',
@@ -96,6 +88,44 @@ class BaseApiController(http.Controller):
             return wrapper
         return decorator
 
+    @staticmethod
+    def _rate_limit(route_group):
+        """
+        Decorator applying the rate limit and concurrency quota of a route group
+        (see services/rate_limiter.py) per API user, or per client IP address before
+        authentication. Place it under _authenticate_request to limit per user.
+        Over-quota requests get a 429 response with a Retry-After header.
+        The concurrency slot of a streamed response is held until its body is sent.
+        """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                api_user = getattr(request, 'dfr_api_user', None)
+                client_key = f'user:{api_user.id}' if api_user else f'ip:{request.httprequest.remote_addr}'
+                rate_limiter = RateLimitService(request.env)
+                slot, retry_after = rate_limiter.acquire(route_group, client_key)
+                if retry_after is not None:
+                    _logger.info(f"Rate limit of route group '{route_group}' exceeded by {client_key} on {request.httprequest.path}")
+                    return ApiHelper.format_error_response(
+                        error_code='TOO_MANY_REQUESTS',
+                        error_message='Too many requests, please retry later.',
+                        status_code=429,
+                        http_headers={'Retry-After': rate_limiter.format_retry_after(retry_after)}
+                    )
+                try:
+                    response = func(self, *args, **kwargs)
+                except Exception:
+                    rate_limiter.release(slot)
+                    raise
+                if slot is not None and getattr(response, 'direct_passthrough', False):
+                    # Streamed body (see ApiHelper.make_response): sent after the controller returned
+                    response.call_on_close(functools.partial(rate_limiter.release, slot))
+                else:
+                    rate_limiter.release(slot)
+                return response
+            return wrapper
+        return decorator
+
     def _handle_exceptions(self, func):
         """Decorator to handle common exceptions and return standardized API errors."""
         @functools.wraps(func)
@@ -16,6 +16,7 @@ class ExternalDataController(BaseApiController):
 
     @BaseApiController.route('/api/dfr/v1/external/farmers/lookup', methods=['GET'], csrf=False)
     @BaseApiController._authenticate_request(required_groups=[EXTERNAL_SYSTEM_GROUP])
+    @BaseApiController._rate_limit('external')
     def lookup_farmer(self, **kwargs):
         """
         Allows authorized external systems to lookup farmer data.
@@ -50,6 +51,7 @@ class ExternalDataController(BaseApiController):
 
     @BaseApiController.route('/api/dfr/v1/external/farmers/<string:farmer_uid>', methods=['GET'], csrf=False)
     @BaseApiController._authenticate_request(required_groups=[EXTERNAL_SYSTEM_GROUP])
+    @BaseApiController._rate_limit('external')
     def retrieve_farmer_data(self, farmer_uid, **kwargs):
         """
         Allows authorized external systems to retrieve detailed farmer data.
@@ -5,6 +5,7 @@ from odoo import http
 from odoo.http import request
 # from .base_api_controller import BaseApiController # Not inheriting as per SDS 4.9 for this controller
 from ..services.api_helper import ApiHelper
+from ..services.rate_limiter import RateLimitService
 
 _logger = logging.getLogger(__name__)
 
@@ -24,7 +25,14 @@ class HealthController(http.Controller):
                 # Raise an exception to be caught and reported as 503
                 raise Exception("Database connectivity check failed logic.")
 
-            return ApiHelper.format_success_response(data={'status': 'UP', 'database': db_status})
+            return ApiHelper.format_success_response(data={
+                'status': 'UP',
+                'database': db_status,
+                'metrics': {
+                    'token_cache': request.env['dfr.api.token.cache'].get_stats(),
+                    'rate_limit_rejections': RateLimitService(request.env).get_rejected_counters(),
+                },
+            })
         
         except Exception as e:
             _logger.error(f"Health check failed: {str(e)}")
@@ -16,6 +16,7 @@ class MobileSyncController(BaseApiController):
 
     @BaseApiController.route('/api/dfr/v1/sync/farmers', methods=['POST'], csrf=False)
     @BaseApiController._authenticate_request(required_groups=[ENUMERATOR_GROUP])
+    @BaseApiController._rate_limit('sync')
     def sync_farmers_data(self, **kwargs):
         """
         Handles bi-directional synchronization of farmer, household, and plot data.
@@ -43,6 +44,7 @@ class MobileSyncController(BaseApiController):
 
     @BaseApiController.route('/api/dfr/v1/sync/form-definitions', methods=['GET'], csrf=False)
     @BaseApiController._authenticate_request(required_groups=[ENUMERATOR_GROUP])
+    @BaseApiController._rate_limit('sync')
     def sync_form_definitions(self, **kwargs):
         """
         Provides active/updated dynamic form definitions to the mobile app.
@@ -59,6 +61,14 @@ class MobileSyncController(BaseApiController):
                 _logger.warning(f"Invalid last_sync_timestamp format: {last_sync_ts_str}")
                 # Potentially return a BAD_REQUEST error, or proceed without timestamp filtering
 
+        # Unchanged definitions since the device's copy: 304 before any definition is built.
+        # The definitions depend on the access rights: a role or company change must change the tag.
+        etag = ApiHelper.make_etag('form-definitions', user.id, last_sync_ts, request.env.lang,
+                                   *self._get_form_definitions_stamp(), *self._get_user_access_stamp(user))
+        not_modified = ApiHelper.check_not_modified(etag)
+        if not_modified:
+            return not_modified
+
         # Delegate to Dynamic Forms Service
         # Ensure 'dfr.dynamic.form.service' is a valid model name
         form_service = request.env['dfr.dynamic.form.service'] 
@@ -70,10 +80,29 @@ class MobileSyncController(BaseApiController):
         return ApiHelper.format_success_response(data={
             'form_definitions': form_definitions,
             'current_server_timestamp': current_server_ts
-        })
+        }, etag=etag)
+
+    def _get_form_definitions_stamp(self):
+        """
+        Version stamp of the dynamic form definitions (last change and number of forms,
+        versions and fields), changing whenever a definition is created, edited or deleted.
+        """
+        request.env.cr.execute("""
+            SELECT (SELECT max(write_date) FROM dfr_form), (SELECT count(*) FROM dfr_form),
+                   (SELECT max(write_date) FROM dfr_form_version), (SELECT count(*) FROM dfr_form_version),
+                   (SELECT max(write_date) FROM dfr_form_field), (SELECT count(*) FROM dfr_form_field)
+        """)
+        return request.env.cr.fetchone()
+
+    def _get_user_access_stamp(self, user):
+        """ Access rights of a user in an ETag: API token epoch (see res.users), groups and companies. """
+        user = user.sudo()
+        return (request.env['res.users']._get_api_token_epoch(user.id),
+                sorted(user.groups_id.ids), sorted(user.company_ids.ids))
 
     @BaseApiController.route('/api/dfr/v1/sync/form-submissions', methods=['POST'], csrf=False)
     @BaseApiController._authenticate_request(required_groups=[ENUMERATOR_GROUP])
+    @BaseApiController._rate_limit('sync')
     def sync_form_submissions(self, **kwargs):
         """
         Receives a batch of completed dynamic form submissions from the mobile app.
@@ -20,10 +20,7 @@ class OpenApiController(http.Controller):
         try:
             generator = OpenApiGeneratorService(request.env)
             spec_yaml_str = generator.get_openapi_specification_yaml()
-            return request.make_response(
-                spec_yaml_str,
-                headers=[('Content-Type', 'application/yaml')]
-            )
+            return ApiHelper.make_response(spec_yaml_str, content_type='application/yaml', cacheable=True)
         except FileNotFoundError as e:
             _logger.error(f"OpenAPI YAML specification file not found: {e}")
             return ApiHelper.format_error_response(
@@ -45,10 +42,7 @@ class OpenApiController(http.Controller):
             generator = OpenApiGeneratorService(request.env)
             spec_dict = generator.get_openapi_specification_dict()
             spec_json_str = json.dumps(spec_dict, indent=2)
-            return request.make_response(
-                spec_json_str,
-                headers=[('Content-Type', 'application/json')]
-            )
+            return ApiHelper.make_response(spec_json_str, content_type='application/json', cacheable=True)
         except FileNotFoundError as e:
             _logger.error(f"OpenAPI JSON specification file not found: {e}")
             return ApiHelper.format_error_response(
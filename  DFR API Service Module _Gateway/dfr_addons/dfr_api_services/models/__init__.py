@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+from . import dfr_api_token_cache
+from . import res_users
@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+import logging
+import threading
+import time
+
+from odoo import api, models, tools
+
+from ..services.auth_service import AuthService
+
+_logger = logging.getLogger(__name__)
+
+# Lookups of the verified-token cache in this worker since it started
+_stats = {'lookups': 0, 'misses': 0, 'rejected': 0, 'expired': 0}
+_stats_lock = threading.Lock()
+
+
+class InvalidTokenError(Exception):
+    """ Raised for tokens failing verification, so that they are never cached. """
+
+
+def _count(counter):
+    with _stats_lock:
+        _stats[counter] += 1
+
+
+class DfrApiTokenCache(models.AbstractModel):
+    """
+    Cache of verified access tokens, so that the requests of a sync session do not decode
+    the same JWT, read the JWT configuration and resolve the user's groups on every call.
+
+    Entries live in the registry cache of the worker (bounded LRU) and are served until the
+    `exp` of their token. They are dropped by every worker when a user is deactivated or
+    deleted, or when group memberships change or tokens are revoked (see res.users /
+    res.groups), as Odoo signals cache invalidations to the other workers.
+    """
+    _name = 'dfr.api.token.cache'
+    _description = 'DFR API Verified Token Cache'
+
+    @api.model
+    def get_verified_token(self, token):
+        """
+        :param token: encoded access token
+        :return: tuple (user id, user active, frozenset of the user's group XML IDs, token expiry
+                 timestamp), or None if the token is invalid or expired
+        """
+        _count('lookups')
+        try:
+            verified = self._verify_token(token)
+        except InvalidTokenError:
+            _count('rejected')
+            return None
+        if verified[3] <= time.time():
+            _count('expired')
+            return None
+        return verified
+
+    @api.model
+    @tools.ormcache('token')
+    def _verify_token(self, token):
+        _count('misses')
+        payload = AuthService(self.env).validate_and_decode_jwt_token(token, 'access')
+        if not payload or 'sub' not in payload or 'exp' not in payload:
+            raise InvalidTokenError()
+        user = self.env['res.users'].sudo().browse(payload['sub']).exists()
+        if not user:
+            _logger.warning(f"User ID {payload['sub']} from token not found in the database.")
+            raise InvalidTokenError()
+        if payload.get('epoch', 0) != user.dfr_api_token_epoch:
+            _logger.info(f"Revoked token (epoch {payload.get('epoch', 0)}, current {user.dfr_api_token_epoch}) for sub {user.id}.")
+            raise InvalidTokenError()
+        groups = frozenset(xml_id for xml_id in user.groups_id.get_external_id().values() if xml_id)
+        return user.id, user.active, groups, payload['exp']
+
+    @api.model
+    def invalidate(self):
+        """ Drops the cached tokens in all workers. """
+        _logger.debug("Invalidating the verified API token cache.")
+        self.clear_caches()
+
+    @api.model
+    def get_stats(self):
+        """
+        Metrics of the cache in this worker since it started.
+        :return: dict with the counters ('lookups', 'misses', 'rejected' (invalid tokens),
+                 'expired'), 'hits' and 'hit_rate' (share of lookups served from the cache)
+        """
+        with _stats_lock:
+            stats = dict(_stats)
+        stats['hits'] = stats['lookups'] - stats['misses'] - stats['rejected']
+        stats['hit_rate'] = stats['hits'] / stats['lookups'] if stats['lookups'] else 0.0
+        return stats
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+from odoo import api, fields, models, tools
+
+# Fields of res.users whose changes can take API access away from the users
+ACCESS_USER_FIELDS = {'active', 'groups_id'}
+# Fields of res.groups whose changes can take API access away from their users
+ACCESS_GROUP_FIELDS = {'users', 'implied_ids'}
+
+
+class ResUsers(models.Model):
+    _inherit = 'res.users'
+
+    dfr_api_token_epoch = fields.Integer(
+        string='API Token Epoch',
+        default=0,
+        readonly=True,
+        copy=False,
+        groups='base.group_system',
+        help="Incremented when the user's API tokens are revoked, and in claims authorization mode when "
+             "the user is deactivated or loses a group: API tokens issued in an earlier epoch are no longer accepted."
+    )
+
+    @api.model
+    @tools.ormcache('user_id')
+    def _get_api_token_epoch(self, user_id):
+        """ :return: current API token epoch of an active user, None if the user is inactive or does not exist """
+        self.env.cr.execute("SELECT dfr_api_token_epoch FROM res_users WHERE id = %s AND active", (user_id,))
+        row = self.env.cr.fetchone()
+        return row[0] if row else None
+
+    def _revoke_api_tokens(self):
+        """ Revokes the API tokens issued to these users so far, in all workers. """
+        if self.ids:
+            self.env.cr.execute("""
+                UPDATE res_users SET dfr_api_token_epoch = dfr_api_token_epoch + 1 WHERE id = ANY(%s)
+            """, (self.ids,))
+            self.invalidate_recordset(['dfr_api_token_epoch'])
+        self.env['dfr.api.token.cache'].invalidate()
+
+    def action_revoke_api_tokens(self):
+        self.check_access_rights('write')
+        self._revoke_api_tokens()
+        return True
+
+    def _get_api_access_snapshot(self):
+        """ :return: dict {user id: (active, set of group ids)}, compared by _api_access_changed """
+        return {user.id: (user.active, set(user.groups_id.ids)) for user in self.sudo().with_context(active_test=False)}
+
+    def _api_access_changed(self, snapshot):
+        """
+        Applies a change of the users' activation or groups to their API tokens. Tokens are
+        verified against the stored groups in 'database' authorization mode: dropping the
+        verified tokens is enough. In 'claims' mode, the tokens of the users that were
+        deactivated or lost a group are revoked; gaining a group does not revoke anything
+        (granted with the next token refresh).
+        :param snapshot: result of _get_api_access_snapshot before the change
+        """
+        mode = self.env['ir.config_parameter'].sudo().get_param('dfr_api.authorization_mode', 'database')
+        if mode == 'claims':
+            current = self._get_api_access_snapshot()
+            lost_access = self.browse([
+                user_id for user_id, (active, group_ids) in snapshot.items()
+                if user_id in current and ((active and not current[user_id][0]) or group_ids - current[user_id][1])
+            ])
+            if lost_access:
+                lost_access._revoke_api_tokens()
+                return
+        self.env['dfr.api.token.cache'].invalidate()
+
+    def write(self, vals):
+        # Group checkboxes of the user form are written as in_group_<id> / sel_groups_<ids>
+        if not (ACCESS_USER_FIELDS & vals.keys() or any(key.startswith(('in_group_', 'sel_groups_')) for key in vals)):
+            return super().write(vals)
+        snapshot = self._get_api_access_snapshot()
+        res = super().write(vals)
+        self._api_access_changed(snapshot)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        self.env['dfr.api.token.cache'].invalidate()
+        return res
+
+
+class ResGroups(models.Model):
+    _inherit = 'res.groups'
+
+    def write(self, vals):
+        if not ACCESS_GROUP_FIELDS & vals.keys():
+            return super().write(vals)
+        # Users of groups implying these groups are users of these groups too (implied groups are stored)
+        users = self.with_context(active_test=False).users
+        snapshot = users._get_api_access_snapshot()
+        res = super().write(vals)
+        users = users | self.with_context(active_test=False).users
+        users._api_access_changed(snapshot)
+        return res
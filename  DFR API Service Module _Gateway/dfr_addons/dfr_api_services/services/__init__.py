@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -*-
 from . import auth_service
+from . import json_serializer
 from . import api_helper
 from . import openapi_generator
+from . import rate_limiter
 # Import other service files if any
\ No newline at end of file
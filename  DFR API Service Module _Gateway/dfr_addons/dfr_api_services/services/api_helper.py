@@ -1,31 +1,187 @@
 # -*- coding: utf-8 -*-
-import json
+import gzip
+import hashlib
+import logging
+import zlib
 import werkzeug
-from odoo.http import Response
+from odoo.http import Response, request
+
+from .json_serializer import contains_streamed, iter_json, json_dumps
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+    _logger.debug("brotli library not found. API responses will only be gzip-compressed.")
+
+# Smaller bodies are sent uncompressed (the compression overhead outweighs the gain)
+COMPRESSION_MIN_SIZE = 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# Content codings of compressed representations, suffixed to their strong ETag
+ETAG_ENCODING_SUFFIXES = ('-br', '-gzip')
+
 
 class ApiHelper:
 
     @staticmethod
-    def _json_response(data, status_code=200):
-        """Helper to create a JSON response."""
-        return Response(
-            json.dumps(data),
+    def _json_response(data, status_code=200, http_headers=None, cacheable=False, etag=None):
+        """
+        Helper to create a JSON response (see json_serializer). Payloads holding large lists or
+        generators are serialized item by item into a streamed (chunked) body.
+        """
+        return ApiHelper.make_response(
+            iter_json(data) if contains_streamed(data) else json_dumps(data),
             content_type='application/json;charset=utf-8',
-            status=status_code
+            status_code=status_code,
+            http_headers=http_headers,
+            cacheable=cacheable,
+            etag=etag
         )
 
     @staticmethod
-    def format_success_response(data=None, message=None, status_code=200, http_headers=None):
+    def _get_httprequest():
+        """ werkzeug request being served, None outside of an HTTP request. """
+        try:
+            return request.httprequest
+        except RuntimeError:
+            return None
+
+    @staticmethod
+    def _get_accepted_encoding(httprequest):
+        """ Best content coding accepted by the client (Accept-Encoding): 'br', 'gzip' or None. """
+        accepted = {}
+        for item in (httprequest.headers.get('Accept-Encoding') or '').split(','):
+            coding, _sep, params = item.strip().partition(';')
+            quality = 1.0
+            if params.strip().startswith('q='):
+                try:
+                    quality = float(params.strip()[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[coding.strip().lower()] = quality
+        for coding in (('br', 'gzip') if brotli else ('gzip',)):
+            if accepted.get(coding, accepted.get('*', 0.0)) > 0:
+                return coding
+        return None
+
+    @staticmethod
+    def make_etag(*parts):
+        """
+        Strong ETag of a representation: a hash of its content, or of a version stamp of
+        the data it is built from (parts are converted to str).
+        """
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part if isinstance(part, bytes) else str(part).encode('utf-8'))
+            digest.update(b'\0')
+        return '"%s"' % digest.hexdigest()[:32]
+
+    @staticmethod
+    def _etag_matches(httprequest, etag):
+        """ Whether If-None-Match lists the ETag, whatever its content coding. """
+        if_none_match = httprequest.headers.get('If-None-Match')
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == '*':
+            return True
+        base_etag = etag.strip('"')
+        for candidate in if_none_match.split(','):
+            candidate = candidate.strip()
+            if candidate.startswith('W/'): # If-None-Match uses the weak comparison
+                candidate = candidate[2:]
+            candidate = candidate.strip('"')
+            for suffix in ETAG_ENCODING_SUFFIXES:
+                if candidate.endswith(suffix):
+                    candidate = candidate[:-len(suffix)]
+                    break
+            if candidate == base_etag:
+                return True
+        return False
+
+    @staticmethod
+    def check_not_modified(etag):
+        """
+        Conditional GET with a version-stamp ETag, before building the response: returns the
+        304 response to send if the client's copy is current, None otherwise.
+        """
+        httprequest = ApiHelper._get_httprequest()
+        if httprequest is None or httprequest.method not in ('GET', 'HEAD') or not ApiHelper._etag_matches(httprequest, etag):
+            return None
+        return Response(status=304, headers={'ETag': etag, 'Vary': 'Accept-Encoding', 'Cache-Control': 'no-cache'})
+
+    @staticmethod
+    def _compress_stream(chunks, encoding):
+        """ Compresses a streamed body chunk by chunk. """
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY) if encoding == 'br' else \
+            zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS) # gzip container
+        compress = compressor.process if encoding == 'br' else compressor.compress
+        for chunk in chunks:
+            compressed = compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.finish() if encoding == 'br' else compressor.flush()
+
+    @staticmethod
+    def make_response(body, content_type, status_code=200, http_headers=None, cacheable=False, etag=None):
+        """
+        Response of a body, compressed as negotiated from Accept-Encoding (brotli if available,
+        else gzip) when large enough.
+
+        :param body: str, bytes, or iterable of bytes chunks sent as a streamed (chunked) body
+        :param cacheable: GET responses get a strong ETag, computed from the body unless given,
+                          and 304 Not Modified is returned when If-None-Match matches it
+        :param etag: ETag of the body (see make_etag), e.g. from a version stamp of the data
+        """
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        elif not isinstance(body, bytes) and cacheable and not etag:
+            body = b''.join(body) # The content hash needs the whole body
+        streamed = not isinstance(body, bytes)
+        headers = dict(http_headers or {})
+        httprequest = ApiHelper._get_httprequest()
+        if httprequest is None:
+            return Response(body, content_type=content_type, status=status_code, headers=headers)
+
+        headers['Vary'] = 'Accept-Encoding'
+        cacheable = (cacheable or etag) and status_code == 200 and httprequest.method in ('GET', 'HEAD')
+        if cacheable:
+            etag = etag or ApiHelper.make_etag(body)
+            headers['Cache-Control'] = 'no-cache' # Cached by the client, revalidated on each use
+            if ApiHelper._etag_matches(httprequest, etag):
+                headers['ETag'] = etag
+                return Response(status=304, headers=headers)
+
+        encoding = ApiHelper._get_accepted_encoding(httprequest) if streamed or len(body) >= COMPRESSION_MIN_SIZE else None
+        if streamed:
+            body = ApiHelper._compress_stream(body, encoding) if encoding else body
+        elif encoding == 'br':
+            body = brotli.compress(body, quality=BROTLI_QUALITY)
+        elif encoding == 'gzip':
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        if encoding:
+            headers['Content-Encoding'] = encoding
+        if cacheable:
+            # Strong ETags differ between the content codings of a representation
+            headers['ETag'] = '"%s-%s"' % (etag.strip('"'), encoding) if encoding else etag
+        if streamed:
+            return Response(body, content_type=content_type, status=status_code, headers=headers, direct_passthrough=True)
+        return Response(body, content_type=content_type, status=status_code, headers=headers)
+
+    @staticmethod
+    def format_success_response(data=None, message=None, status_code=200, http_headers=None, cacheable=False, etag=None):
         response_data = {'success': True}
         if message:
             response_data['message'] = message
         if data is not None: # Allow data to be None, empty list, etc.
             response_data['data'] = data
         
-        # http_headers are not directly used with odoo.http.Response constructor in this way.
-        # Custom headers would typically be added to the Response object after creation if needed,
-        # but for simple JSON responses, content_type and status are the primary concerns.
-        return ApiHelper._json_response(response_data, status_code=status_code)
+        # http_headers: optional dict of additional response headers
+        # cacheable/etag: conditional GET support, see make_response
+        return ApiHelper._json_response(response_data, status_code=status_code, http_headers=http_headers,
+                                        cacheable=cacheable, etag=etag)
 
 
     @staticmethod
@@ -41,7 +197,7 @@ class ApiHelper:
             'success': False,
             'error': error_payload
         }
-        return ApiHelper._json_response(response_data, status_code=status_code)
+        return ApiHelper._json_response(response_data, status_code=status_code, http_headers=http_headers)
 
     @staticmethod
     def validate_request_payload(payload, schema_validator_func):
@@ -7,6 +7,11 @@ from odoo.exceptions import AccessDenied
 
 _logger = logging.getLogger(__name__)
 
+# Authorization modes (dfr_api.authorization_mode):
+# - 'database': groups of the user as currently stored (verified-token cache, dfr.api.token.cache)
+# - 'claims': groups of the signed 'groups' claim of short-lived tokens, revoked by the user's token epoch
+AUTHORIZATION_MODES = ('database', 'claims')
+
 class AuthService:
     def __init__(self, env):
         self.env = env
@@ -42,7 +47,20 @@ class AuthService:
             _logger.warning("Invalid 'dfr_api.refresh_token_expiry_seconds' in ir.config_parameter, using default 7 days.")
             self._refresh_token_expiry_seconds = 86400 * 7
 
-    def _generate_jwt_token(self, user_id, user_login, user_groups_xml_ids, expiry_seconds, token_type='access'):
+        self.authorization_mode = config_param.get_param('dfr_api.authorization_mode', 'database')
+        if self.authorization_mode not in AUTHORIZATION_MODES:
+            _logger.warning(f"Invalid 'dfr_api.authorization_mode' in ir.config_parameter: {self.authorization_mode}, using 'database'.")
+            self.authorization_mode = 'database'
+        if self.authorization_mode == 'claims':
+            # Group changes not revoking the tokens through the epoch take effect at the latest after this delay
+            try:
+                claims_expiry_seconds = int(config_param.get_param('dfr_api.claims_access_token_expiry_seconds', 300))
+            except ValueError:
+                _logger.warning("Invalid 'dfr_api.claims_access_token_expiry_seconds' in ir.config_parameter, using default 300s.")
+                claims_expiry_seconds = 300
+            self._access_token_expiry_seconds = min(self._access_token_expiry_seconds, claims_expiry_seconds)
+
+    def _generate_jwt_token(self, user_id, user_login, user_groups_xml_ids, expiry_seconds, token_type='access', epoch=0):
         """Generates a JWT token for a given user ID."""
         now = datetime.datetime.now(tz=datetime.timezone.utc)
         payload = {
@@ -52,6 +70,7 @@ class AuthService:
             'login': user_login,    # User login
             'groups': user_groups_xml_ids, # List of group XML IDs
             'type': token_type,     # 'access' or 'refresh'
+            'epoch': epoch,         # Token epoch of the user: tokens of earlier epochs are revoked
             # Add other claims as needed, e.g., company_id
             'iss': 'DFR API Gateway' # Issuer claim
         }
@@ -64,15 +83,16 @@ class AuthService:
             return None, None, 0
 
         user_groups_xml_ids = [group.xml_id for group in user.groups_id if group.xml_id]
+        epoch = user.sudo().dfr_api_token_epoch
 
         access_token = self._generate_jwt_token(
-            user.id, user.login, user_groups_xml_ids, self._access_token_expiry_seconds, 'access'
+            user.id, user.login, user_groups_xml_ids, self._access_token_expiry_seconds, 'access', epoch
         )
         # Refresh token usually has fewer claims and is primarily used to get a new access token.
         # It might not need groups, or could have a specific 'refresh' scope/claim.
         refresh_token_groups = [] # Typically, refresh tokens don't carry extensive permissions like groups.
         refresh_token = self._generate_jwt_token(
-            user.id, user.login, refresh_token_groups, self._refresh_token_expiry_seconds, 'refresh'
+            user.id, user.login, refresh_token_groups, self._refresh_token_expiry_seconds, 'refresh', epoch
         )
         return access_token, refresh_token, self._access_token_expiry_seconds
 
@@ -126,6 +146,22 @@ class AuthService:
             # audit_log_service.log_login_failure(login, reason=f"Server error: {str(e)}")
         return None
 
+    def authenticate_refresh_token(self, refresh_token):
+        """
+        Verifies a refresh token (refresh_token grant): valid and unexpired, issued in the
+        current token epoch of an active user (see res.users).
+        :return: res.users record to issue new tokens to, with its current groups, or None
+        """
+        payload = self.validate_and_decode_jwt_token(refresh_token, 'refresh')
+        if not payload or 'sub' not in payload:
+            return None
+        current_epoch = self.env['res.users']._get_api_token_epoch(payload['sub'])
+        if current_epoch is None or payload.get('epoch', 0) != current_epoch:
+            _logger.info(f"Refresh token rejected (epoch {payload.get('epoch', 0)}, current {current_epoch}) for sub {payload['sub']}.")
+            return None
+        user = self.env['res.users'].sudo().browse(payload['sub']).exists()
+        return user if user and user.active else None
+
     def get_user_from_token(self, env_for_user, token_string, token_type='access'):
         """Validates token and returns the Odoo user record using the provided environment."""
         payload = self.validate_and_decode_jwt_token(token_string, token_type)
@@ -144,4 +180,30 @@ class AuthService:
 
             except Exception as e:
                 _logger.error(f"Error retrieving user {user_id} from token: {e}")
-        return None
\ No newline at end of file
+        return None
+
+    def verify_access_token(self, token):
+        """
+        Verifies an access token for API authentication, as per the authorization mode.
+        :return: tuple (user id, user active, frozenset of the user's group XML IDs, token expiry
+                 timestamp), or None if the token is invalid, expired or revoked
+        """
+        if self.authorization_mode == 'claims':
+            return self.get_verified_claims(token)
+        return self.env['dfr.api.token.cache'].get_verified_token(token)
+
+    def get_verified_claims(self, token):
+        """
+        Verifies an access token from its signed claims only: no user or group is read, the
+        groups are those of the 'groups' claim. Tokens issued before the user's current token
+        epoch (bumped on revocation, deactivation and group removal, see res.users) are revoked.
+        :return: see verify_access_token
+        """
+        payload = self.validate_and_decode_jwt_token(token, 'access')
+        if not payload or 'sub' not in payload or 'exp' not in payload:
+            return None
+        current_epoch = self.env['res.users']._get_api_token_epoch(payload['sub'])
+        if current_epoch is None or payload.get('epoch', 0) != current_epoch:
+            _logger.info(f"Revoked token (epoch {payload.get('epoch', 0)}, current {current_epoch}) for sub {payload['sub']}.")
+            return None
+        return payload['sub'], True, frozenset(payload.get('groups') or []), payload['exp']
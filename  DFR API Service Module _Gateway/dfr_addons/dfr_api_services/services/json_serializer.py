@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+import datetime
+import decimal
+import json
+import logging
+import types
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    _logger.debug("orjson library not found. API responses will be serialized with the json module.")
+
+# Lists of at least this many items, and generators, are serialized item by item into a
+# streamed response body instead of one string
+STREAM_MIN_ITEMS = 1000
+# Size of the chunks of a streamed response body
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _json_default(value):
+    """ JSON form of the values neither encoder supports natively. """
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def json_dumps(value):
+    """
+    Serializes a value to UTF-8 JSON with orjson when installed, the json module otherwise.
+    Dates and datetimes are written in ISO 8601, Decimals as numbers.
+    :return: bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(value, default=_json_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(value, default=_json_default, separators=(',', ':')).encode('utf-8')
+
+
+def is_streamed(value):
+    return isinstance(value, types.GeneratorType) or (isinstance(value, list) and len(value) >= STREAM_MIN_ITEMS)
+
+
+def contains_streamed(value):
+    """ Whether a value is, or holds in its (nested) dicts, a list or generator to stream. """
+    if isinstance(value, dict):
+        return any(contains_streamed(item) for item in value.values())
+    return is_streamed(value)
+
+
+def _iter_json_parts(value):
+    if isinstance(value, dict) and contains_streamed(value):
+        yield b'{'
+        for index, (key, item) in enumerate(value.items()):
+            yield (b',' if index else b'') + json_dumps(str(key)) + b':'
+            yield from _iter_json_parts(item)
+        yield b'}'
+    elif is_streamed(value):
+        yield b'['
+        for index, item in enumerate(value):
+            yield (b',' if index else b'') + json_dumps(item)
+        yield b']'
+    else:
+        yield json_dumps(value)
+
+
+def iter_json(value):
+    """
+    Serializes a value to UTF-8 JSON chunks of about STREAM_CHUNK_SIZE bytes, the items of
+    its large lists and generators one at a time (see is_streamed). Generators are consumed
+    while the response is sent, after the controller returned: they must not use the ORM.
+    :return: generator of bytes
+    """
+    buffer, size = [], 0
+    for part in _iter_json_parts(value):
+        buffer.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK_SIZE:
+            yield b''.join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield b''.join(buffer)
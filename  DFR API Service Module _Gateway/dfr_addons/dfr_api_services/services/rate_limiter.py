@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from odoo.tools import config
+
+_logger = logging.getLogger(__name__)
+
+# Route groups of /api/dfr/v1 and their default quotas: token bucket refill rate (requests
+# per second) and size (burst), and maximum number of concurrent requests, per API client
+# (API user, or client IP address for the unauthenticated auth endpoints).
+# Overridden by dfr_api.rate_limit.<route group>.<rate|burst|max_concurrent> parameters.
+ROUTE_GROUP_QUOTAS = {
+    'sync': {'rate': 5.0, 'burst': 60, 'max_concurrent': 4},
+    'external': {'rate': 5.0, 'burst': 20, 'max_concurrent': 2},
+    'auth': {'rate': 0.2, 'burst': 10, 'max_concurrent': 2},
+}
+
+# A concurrency slot of a request whose worker died is released after this delay (seconds)
+SLOT_LEASE_SECONDS = 600
+
+
+class InProcessBackend:
+    """ Rate limiting state of the current worker process only (default backend). """
+
+    # Buckets of the least recently seen clients are forgotten beyond this number (they refill anyway)
+    max_buckets = 10000
+
+    def __init__(self, env):
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict() # key -> (tokens, last update time)
+        self._slots = defaultdict(int) # key -> number of running requests
+        self._counters = defaultdict(int)
+
+    def consume(self, key, rate, burst):
+        """
+        Takes a token from the bucket of a key.
+        :return: (allowed, seconds before a token is available)
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (burst, now))
+            tokens = min(burst, tokens + (now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            self._buckets[key] = (tokens, now)
+            while len(self._buckets) > self.max_buckets:
+                self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def acquire(self, key, max_concurrent):
+        """ :return: slot to release once the request is processed, or None if all slots are taken """
+        with self._lock:
+            if self._slots[key] >= max_concurrent:
+                return None
+            self._slots[key] += 1
+        return key
+
+    def release(self, slot):
+        with self._lock:
+            self._slots[slot] -= 1
+            if self._slots[slot] <= 0:
+                del self._slots[slot]
+
+    def increment(self, counter):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def get_counters(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+class SqliteBackend:
+    """
+    Rate limiting state shared by the workers of a host, in a SQLite database file
+    (dfr_api.rate_limit.sqlite_path, default: in the Odoo data directory).
+    """
+
+    def __init__(self, env):
+        self._path = env['ir.config_parameter'].sudo().get_param('dfr_api.rate_limit.sqlite_path') or \
+            os.path.join(config['data_dir'], 'dfr_api_rate_limit.sqlite')
+        self._local = threading.local()
+        with self._transaction() as cr:
+            cr.execute("CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+            cr.execute("CREATE TABLE IF NOT EXISTS slot (id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, expires REAL)")
+            cr.execute("CREATE INDEX IF NOT EXISTS slot_key_idx ON slot (key)")
+            cr.execute("CREATE TABLE IF NOT EXISTS counter (name TEXT PRIMARY KEY, value INTEGER)")
+
+    def _transaction(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            connection = self._local.connection = sqlite3.connect(self._path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+        return _SqliteTransaction(connection)
+
+    def consume(self, key, rate, burst):
+        now = time.time() # Shared by processes: wall clock
+        with self._transaction() as cr:
+            row = cr.execute("SELECT tokens, updated FROM bucket WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+            allowed = tokens >= 1
+            if allowed:
+                tokens -= 1
+            cr.execute("INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+        return allowed, 0.0 if allowed else (1 - tokens) / rate
+
+    def acquire(self, key, max_concurrent):
+        now = time.time()
+        with self._transaction() as cr:
+            cr.execute("DELETE FROM slot WHERE key = ? AND expires < ?", (key, now))
+            if cr.execute("SELECT count(*) FROM slot WHERE key = ?", (key,)).fetchone()[0] >= max_concurrent:
+                return None
+            return cr.execute("INSERT INTO slot (key, expires) VALUES (?, ?)", (key, now + SLOT_LEASE_SECONDS)).lastrowid
+
+    def release(self, slot):
+        with self._transaction() as cr:
+            cr.execute("DELETE FROM slot WHERE id = ?", (slot,))
+
+    def increment(self, counter):
+        with self._transaction() as cr:
+            cr.execute("INSERT INTO counter (name, value) VALUES (?, 1) "
+                       "ON CONFLICT (name) DO UPDATE SET value = value + 1", (counter,))
+
+    def get_counters(self):
+        with self._transaction() as cr:
+            return dict(cr.execute("SELECT name, value FROM counter").fetchall())
+
+
+class _SqliteTransaction:
+    """ Write transaction on a SQLite connection, taking the database lock upfront. """
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def __enter__(self):
+        self._connection.execute("BEGIN IMMEDIATE")
+        return self._connection.cursor()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
+        return False
+
+
+# Available backends (dfr_api.rate_limit.backend); other modules may register their own,
+# implementing consume/acquire/release/increment/get_counters as InProcessBackend
+RATE_LIMIT_BACKENDS = {
+    'memory': InProcessBackend,
+    'sqlite': SqliteBackend,
+}
+
+_backends = {} # backend name -> instance shared by the threads of the process
+_backends_lock = threading.Lock()
+
+
+class RateLimitService:
+    """
+    Token-bucket rate limits and concurrency quotas of the API per client and route group
+    (see ROUTE_GROUP_QUOTAS). Backend failures never block requests.
+    """
+
+    def __init__(self, env):
+        self.env = env
+        config_param = self.env['ir.config_parameter'].sudo()
+        self.enabled = config_param.get_param('dfr_api.rate_limit.enabled', 'True').lower() == 'true'
+        self._backend_name = config_param.get_param('dfr_api.rate_limit.backend', 'memory')
+        if self._backend_name not in RATE_LIMIT_BACKENDS:
+            _logger.warning(f"Unknown 'dfr_api.rate_limit.backend' in ir.config_parameter: {self._backend_name}, using 'memory'.")
+            self._backend_name = 'memory'
+
+    def _get_backend(self):
+        with _backends_lock:
+            if self._backend_name not in _backends:
+                _backends[self._backend_name] = RATE_LIMIT_BACKENDS[self._backend_name](self.env)
+            return _backends[self._backend_name]
+
+    def get_quota(self, route_group):
+        config_param = self.env['ir.config_parameter'].sudo()
+        quota = dict(ROUTE_GROUP_QUOTAS[route_group])
+        for name, default in ROUTE_GROUP_QUOTAS[route_group].items():
+            value = config_param.get_param(f'dfr_api.rate_limit.{route_group}.{name}')
+            if value:
+                try:
+                    quota[name] = type(default)(value)
+                except ValueError:
+                    _logger.warning(f"Invalid 'dfr_api.rate_limit.{route_group}.{name}' in ir.config_parameter, using default {default}.")
+        return quota
+
+    def acquire(self, route_group, client_key):
+        """
+        Admits a request of a client in a route group.
+        :return: (slot to pass to release(), None) if admitted,
+                 (None, seconds after which to retry) if over the rate or concurrency quota
+        """
+        if not self.enabled:
+            return None, None
+        quota = self.get_quota(route_group)
+        key = f'{self.env.cr.dbname}:{route_group}:{client_key}'
+        try:
+            backend = self._get_backend()
+            if quota['rate'] > 0:
+                allowed, retry_after = backend.consume(key, quota['rate'], quota['burst'])
+                if not allowed:
+                    backend.increment(f'{route_group}.rate_limited')
+                    return None, retry_after
+            if quota['max_concurrent'] > 0:
+                slot = backend.acquire(key, quota['max_concurrent'])
+                if slot is None:
+                    backend.increment(f'{route_group}.concurrency_limited')
+                    return None, 1.0
+                return slot, None
+        except Exception as e:
+            _logger.warning(f"Rate limiting backend '{self._backend_name}' failed, request admitted: {e}")
+        return None, None
+
+    def release(self, slot):
+        if slot is None:
+            return
+        try:
+            self._get_backend().release(slot)
+        except Exception as e:
+            _logger.warning(f"Rate limiting backend '{self._backend_name}' failed to release a slot: {e}")
+
+    def get_rejected_counters(self):
+        """ :return: dict {'<route group>.<rate_limited|concurrency_limited>': rejected requests} """
+        try:
+            return self._get_backend().get_counters()
+        except Exception as e:
+            _logger.warning(f"Rate limiting backend '{self._backend_name}' failed to read counters: {e}")
+            return {}
+
+    @staticmethod
+    def format_retry_after(retry_after):
+        """ Retry-After header value: whole seconds, at least 1. """
+        return str(max(1, math.ceil(retry_after)))
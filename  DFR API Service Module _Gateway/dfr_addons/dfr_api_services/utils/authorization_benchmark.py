@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the number of SQL queries run by the authentication/authorization of an API
+request (BaseApiController._authenticate_request) in each mode:
+
+- 'per_request': the former path, decoding the token, browsing the user and calling
+  has_group for each required group on every request
+- 'database': verified-token cache (dfr.api.token.cache)
+- 'claims': signed groups claim with the token epoch check
+
+Not loaded by Odoo. Run from an Odoo shell on a database with dfr_api_services installed:
+
+    from odoo.addons.dfr_api_services.utils import authorization_benchmark
+    authorization_benchmark.run(env, login='admin', required_groups=['base.group_user'])
+
+Each request starts from an empty record cache, as a new HTTP request does; the registry
+cache (ormcache) is kept, as in a worker serving the requests of a sync session. The first
+request of each mode starts from an empty registry cache too.
+"""
+
+import json
+
+from ..services.auth_service import AuthService
+
+
+def _authorize_per_request(env, token, required_groups):
+    user = AuthService(env).get_user_from_token(env, token)
+    return bool(user) and any(user.has_group(group_xml_id) for group_xml_id in required_groups)
+
+
+def _authorize(env, token, required_groups):
+    verified = AuthService(env).verify_access_token(token)
+    return bool(verified and verified[1]) and any(group_xml_id in verified[2] for group_xml_id in required_groups)
+
+
+def _count_queries(env, function):
+    env.invalidate_all()
+    queries = env.cr.sql_log_count
+    result = function()
+    return env.cr.sql_log_count - queries, result
+
+
+def measure(env, token, required_groups, authorize, requests):
+    """ :return: dict with the queries of the first request and the average queries of the next ones """
+    env.registry.clear_caches()
+    first_queries, authorized = _count_queries(env, lambda: authorize(env, token, required_groups))
+    total_queries = 0
+    for _request in range(requests):
+        queries, authorized = _count_queries(env, lambda: authorize(env, token, required_groups))
+        total_queries += queries
+    return {
+        'authorized': authorized,
+        'first_request_queries': first_queries,
+        'queries_per_request': total_queries / requests if requests else 0.0,
+    }
+
+
+def run(env, login='admin', required_groups=('base.group_user',), requests=100, output=None):
+    """
+    Measures the three modes for the access token of a user.
+    The authorization mode parameter is restored afterwards; nothing else is written.
+    :param output: optional path of a JSON report
+    :return: dict {mode: measures}
+    """
+    IrConfigParameter = env['ir.config_parameter'].sudo()
+    user = env['res.users'].search([('login', '=', login)], limit=1)
+    if not user:
+        raise ValueError("User %s not found." % login)
+    required_groups = list(required_groups)
+    previous_mode = IrConfigParameter.get_param('dfr_api.authorization_mode', 'database')
+    results = {}
+    try:
+        for mode, authorize in [('per_request', _authorize_per_request), ('database', _authorize), ('claims', _authorize)]:
+            IrConfigParameter.set_param('dfr_api.authorization_mode', 'claims' if mode == 'claims' else 'database')
+            access_token = AuthService(env).generate_jwt_tokens_for_user(user)[0]
+            results[mode] = measure(env, access_token, required_groups, authorize, requests)
+    finally:
+        IrConfigParameter.set_param('dfr_api.authorization_mode', previous_mode)
+
+    print("%-12s %10s %22s %20s" % ('mode', 'authorized', 'first request queries', 'queries per request'))
+    for mode, result in results.items():
+        print("%-12s %10s %22d %20.2f" % (mode, result['authorized'], result['first_request_queries'], result['queries_per_request']))
+    if output:
+        with open(output, 'w') as report:
+            json.dump(results, report, indent=2)
+    return results
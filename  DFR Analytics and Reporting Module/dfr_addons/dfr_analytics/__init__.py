@@ -1,4 +1,5 @@
 # dfr_addons/dfr_analytics/__init__.py
+from . import utils
 from . import models
 from . import wizards
 from . import report
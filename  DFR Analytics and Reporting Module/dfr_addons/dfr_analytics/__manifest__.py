@@ -9,6 +9,7 @@
     'license': 'MIT', # Or Apache 2.0 as per final decision
     'depends': [
         'web',
+        'mail',
         'board', # Odoo dashboard module
         'dfr_common', # Assuming a common core module
         'dfr_farmer_registry',
@@ -21,10 +22,13 @@
     },
     'data': [
         'security/ir.model.access.csv',
+        'security/dfr_analytics_security.xml',
+        'data/dfr_analytics_cron.xml',
         'views/assets.xml',
         'views/analytics_dashboard_views.xml',
         'views/map_visualization_views.xml',
         'views/report_actions_views.xml',
+        'views/export_job_views.xml',
         'wizards/report_export_wizard_views.xml',
         'report/report_templates.xml',
         # Add menu entries XML files if separate, otherwise they are in views
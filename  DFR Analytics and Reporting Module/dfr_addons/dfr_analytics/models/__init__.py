@@ -1,2 +1,5 @@
 # dfr_addons/dfr_analytics/models/__init__.py
-from . import analytics_service
\ No newline at end of file
+from . import analytics_service
+from . import analytics_rollup
+from . import export_job
+from . import kpi_cache
\ No newline at end of file
@@ -0,0 +1,244 @@
+# dfr_addons/dfr_analytics/models/analytics_rollup.py
+import logging
+from datetime import timedelta
+
+from odoo import models, fields, api, _
+
+_logger = logging.getLogger(__name__)
+
+# Age bands (lower bound inclusive, upper bound exclusive), keyed as stored in the rollup
+AGE_BANDS = [
+    ('0-17', 0, 18),
+    ('18-25', 18, 26),
+    ('26-35', 26, 36),
+    ('36-45', 36, 46),
+    ('46-55', 46, 56),
+    ('56-65', 56, 66),
+    ('66+', 66, None),
+]
+# Plot size bands in hectares
+SIZE_BANDS = [
+    ('<0.5', None, 0.5),
+    ('0.5-1', 0.5, 1.0),
+    ('1-2', 1.0, 2.0),
+    ('2-5', 2.0, 5.0),
+    ('5-10', 5.0, 10.0),
+    ('10+', 10.0, None),
+]
+UNDEFINED_BAND = 'undefined'
+
+# Rows written by transactions still running when a refresh starts carry an earlier
+# write_date than the refresh watermark: the next refresh re-reads this much before it.
+WATERMARK_OVERLAP = timedelta(minutes=10)
+
+WATERMARK_PARAM = 'dfr.analytics.rollup.watermark'
+LAST_FULL_REFRESH_PARAM = 'dfr.analytics.rollup.last_full_refresh'
+
+
+def band_sql(expression, bands):
+    """
+    SQL expression mapping a numeric expression to the key of its band, with a single
+    width_bucket() over the band boundaries (UNDEFINED_BAND for NULL values).
+    :param bands: contiguous list of (key, lower, upper), in increasing order
+    """
+    thresholds = ', '.join(str(lower) for _key, lower, _upper in bands[1:])
+    keys = ', '.join("'%s'" % key for key, _lower, _upper in bands)
+    return "COALESCE((ARRAY[%s]::varchar[])[width_bucket((%s)::numeric, ARRAY[%s]::numeric[]) + 1], '%s')" % (
+        keys, expression, thresholds, UNDEFINED_BAND)
+
+
+def age_sql(column, today):
+    """ SQL expression of the age in whole years on `today` (date) of a date of birth column. """
+    return "date_part('year', age('%s'::date, %s))" % (fields.Date.to_string(today), column)
+
+
+class AnalyticsFarmerRollup(models.Model):
+    """
+    Daily farmer counts per registration date, administrative area, status, sex and age band
+    (active farmers). Maintained by _cron_refresh_rollups; the KPI methods of
+    dfr.analytics.service read it instead of scanning the registry.
+    """
+    _name = 'dfr.analytics.farmer.rollup'
+    _description = 'DFR Analytics Farmer Daily Rollup'
+    _log_access = False
+    _order = 'date desc'
+
+    date = fields.Date(string='Registration Date', readonly=True, index=True)
+    administrative_area_id = fields.Many2one('dfr.administrative.area', string='Administrative Area', readonly=True, index=True)
+    status = fields.Char(string='Farmer Status', readonly=True)
+    sex = fields.Char(string='Sex', readonly=True)
+    age_band = fields.Char(string='Age Band', readonly=True)
+    farmer_count = fields.Integer(string='Farmers', readonly=True, group_operator='sum')
+
+    @api.model
+    def _rebuild(self, days=None, today=None):
+        """
+        Recomputes the rollup rows of the given registration days (all if None) from dfr_farmer.
+        Age bands are relative to `today`.
+        """
+        params = {'days': days}
+        today = today or fields.Date.context_today(self)
+        day_clause = '' if days is None else 'AND f.create_date::date = ANY(%(days)s)'
+        self.env.cr.execute("""
+            DELETE FROM dfr_analytics_farmer_rollup WHERE %s
+        """ % ('TRUE' if days is None else 'date = ANY(%(days)s)'), params)
+        self.env.cr.execute("""
+            INSERT INTO dfr_analytics_farmer_rollup (date, administrative_area_id, status, sex, age_band, farmer_count)
+            SELECT f.create_date::date, f.administrative_area_id, f.status, COALESCE(f.sex, '%s'), %s, count(*)
+            FROM dfr_farmer f
+            WHERE f.active %s
+            GROUP BY 1, 2, 3, 4, 5
+        """ % (UNDEFINED_BAND, band_sql(age_sql('f.date_of_birth', today), AGE_BANDS), day_clause), params)
+        self.invalidate_model()
+        self.env['dfr.analytics.kpi.cache'].invalidate_models([self._name])
+
+    @api.model
+    def _get_dirty_days(self, since):
+        """ Registration days of the farmers changed since `since`, directly or through their farms and plots. """
+        self.env.cr.execute("""
+            SELECT f.create_date::date FROM dfr_farmer f WHERE f.write_date >= %(since)s
+            UNION
+            SELECT f.create_date::date FROM dfr_plot p
+            JOIN dfr_farm fa ON fa.id = p.farm_id
+            JOIN dfr_farmer f ON f.id = fa.farmer_id
+            WHERE p.write_date >= %(since)s OR fa.write_date >= %(since)s
+        """, {'since': since})
+        return [row[0] for row in self.env.cr.fetchall() if row[0]]
+
+    @api.model
+    def _cron_refresh_rollups(self, force_full=False):
+        """
+        Scheduled action: refreshes the farmer and plot rollups.
+
+        - First run of the day (or force_full): full rebuild, so that age bands follow the calendar.
+        - Otherwise: only the registration days of farmers/farms/plots written since the
+          previous refresh (write_date watermark) are recomputed, with the days of the farmers
+          that farms and plots moved away from or were deleted from (dfr.analytics.rollup.dirty.day).
+        """
+        IrConfigParameter = self.env['ir.config_parameter'].sudo()
+        self.env.cr.execute("SELECT now() AT TIME ZONE 'UTC'")
+        refresh_start = self.env.cr.fetchone()[0]
+        today = fields.Date.context_today(self)
+        watermark = IrConfigParameter.get_param(WATERMARK_PARAM)
+        PlotRollup = self.env['dfr.analytics.plot.rollup']
+        moved_days = self.env['dfr.analytics.rollup.dirty.day']._pop_days()
+
+        if force_full or not watermark or IrConfigParameter.get_param(LAST_FULL_REFRESH_PARAM) != fields.Date.to_string(today):
+            self._rebuild(today=today)
+            PlotRollup._rebuild()
+            IrConfigParameter.set_param(LAST_FULL_REFRESH_PARAM, fields.Date.to_string(today))
+            _logger.info("Analytics rollups fully rebuilt.")
+        else:
+            days = sorted(set(self._get_dirty_days(fields.Datetime.from_string(watermark) - WATERMARK_OVERLAP)) | set(moved_days))
+            if days:
+                self._rebuild(days=days, today=today)
+                PlotRollup._rebuild(days=days)
+            _logger.info("Analytics rollups refreshed for %s registration day(s).", len(days))
+        IrConfigParameter.set_param(WATERMARK_PARAM, fields.Datetime.to_string(refresh_start))
+        return True
+
+
+class AnalyticsRollupDirtyDay(models.Model):
+    """
+    Farmer registration days whose rollups changed in a way write dates do not show: a deleted
+    farmer, or a farm or plot moved to another farmer or deleted, leaves stale rows on its day.
+    Consumed by the next refresh of the rollups.
+    """
+    _name = 'dfr.analytics.rollup.dirty.day'
+    _description = 'DFR Analytics Rollup Dirty Day'
+    _log_access = False
+
+    date = fields.Date(string='Farmer Registration Date', required=True, readonly=True)
+
+    _sql_constraints = [
+        ('date_uniq', 'UNIQUE(date)', 'A registration day is only marked once.'),
+    ]
+
+    @api.model
+    def _mark_farmers(self, farmer_ids):
+        """ Marks the registration days of the given farmers for the next incremental refresh. """
+        if not farmer_ids:
+            return
+        self.env.cr.execute("""
+            INSERT INTO dfr_analytics_rollup_dirty_day (date)
+            SELECT DISTINCT create_date::date FROM dfr_farmer WHERE id = ANY(%s) AND create_date IS NOT NULL
+            ON CONFLICT (date) DO NOTHING
+        """, (list(farmer_ids),))
+
+    @api.model
+    def _pop_days(self):
+        """ :return: list of the marked days, unmarked (days marked meanwhile are kept for the next refresh) """
+        self.env.cr.execute("DELETE FROM dfr_analytics_rollup_dirty_day RETURNING date")
+        return [row[0] for row in self.env.cr.fetchall()]
+
+
+class DfrFarmer(models.Model):
+    _inherit = 'dfr.farmer'
+
+    def unlink(self):
+        self.env['dfr.analytics.rollup.dirty.day']._mark_farmers(self.ids)
+        return super().unlink()
+
+
+class DfrFarm(models.Model):
+    _inherit = 'dfr.farm'
+
+    def write(self, vals):
+        if 'farmer_id' in vals:
+            self.env['dfr.analytics.rollup.dirty.day']._mark_farmers(self.sudo().farmer_id.ids)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['dfr.analytics.rollup.dirty.day']._mark_farmers(self.sudo().farmer_id.ids)
+        return super().unlink()
+
+
+class DfrPlot(models.Model):
+    _inherit = 'dfr.plot'
+
+    def write(self, vals):
+        if 'farm_id' in vals:
+            self.env['dfr.analytics.rollup.dirty.day']._mark_farmers(self.sudo().farm_id.farmer_id.ids)
+        return super().write(vals)
+
+    def unlink(self):
+        self.env['dfr.analytics.rollup.dirty.day']._mark_farmers(self.sudo().farm_id.farmer_id.ids)
+        return super().unlink()
+
+
+class AnalyticsPlotRollup(models.Model):
+    """
+    Daily plot counts and land area per farmer registration date, farmer administrative area,
+    farmer status and plot size band (active plots of active farmers).
+    """
+    _name = 'dfr.analytics.plot.rollup'
+    _description = 'DFR Analytics Plot Daily Rollup'
+    _log_access = False
+    _order = 'date desc'
+
+    date = fields.Date(string='Farmer Registration Date', readonly=True, index=True)
+    administrative_area_id = fields.Many2one('dfr.administrative.area', string='Farmer Administrative Area', readonly=True, index=True)
+    status = fields.Char(string='Farmer Status', readonly=True)
+    size_band = fields.Char(string='Plot Size Band', readonly=True)
+    plot_count = fields.Integer(string='Plots', readonly=True, group_operator='sum')
+    total_size = fields.Float(string='Total Size (Ha)', readonly=True, group_operator='sum')
+
+    @api.model
+    def _rebuild(self, days=None):
+        """ Recomputes the rollup rows of the given farmer registration days (all if None). """
+        params = {'days': days}
+        day_clause = '' if days is None else 'AND f.create_date::date = ANY(%(days)s)'
+        self.env.cr.execute("""
+            DELETE FROM dfr_analytics_plot_rollup WHERE %s
+        """ % ('TRUE' if days is None else 'date = ANY(%(days)s)'), params)
+        self.env.cr.execute("""
+            INSERT INTO dfr_analytics_plot_rollup (date, administrative_area_id, status, size_band, plot_count, total_size)
+            SELECT f.create_date::date, f.administrative_area_id, f.status, %s, count(*), COALESCE(sum(p.size), 0)
+            FROM dfr_plot p
+            JOIN dfr_farm fa ON fa.id = p.farm_id
+            JOIN dfr_farmer f ON f.id = fa.farmer_id
+            WHERE p.active AND f.active %s
+            GROUP BY 1, 2, 3, 4
+        """ % (band_sql('p.size', SIZE_BANDS), day_clause), params)
+        self.invalidate_model()
+        self.env['dfr.analytics.kpi.cache'].invalidate_models([self._name])
@@ -1,14 +1,75 @@
 # dfr_addons/dfr_analytics/models/analytics_service.py
+import csv
+import hashlib
 import logging
 import json
+import os
+import shutil
+import tempfile
 from datetime import datetime, date, timedelta
 from collections import defaultdict
 
+import openpyxl
+
 from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 
+from .analytics_rollup import AGE_BANDS, SIZE_BANDS, UNDEFINED_BAND, age_sql, band_sql
+from .kpi_cache import kpi_cached
+from ..utils import map_geometry
+from odoo.addons.dfr_farmer_registry.utils import geohash
+from odoo.addons.dfr_farmer_registry.services.dfr_spatial_query_service import SPATIAL_INDEXES
+
 _logger = logging.getLogger(__name__)
 
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+    _logger.debug("pyarrow library not found. Parquet and Arrow exports will not be available.")
+
+# Default columns of the farmer and plot exports (field paths)
+FARMER_EXPORT_FIELDS = ['uid', 'name', 'sex', 'date_of_birth', 'national_id_number', 'contact_phone',
+                        'status', 'administrative_area_id', 'create_date']
+PLOT_EXPORT_FIELDS = ['name', 'farm_id.farmer_id.uid', 'farm_id.farmer_id.name', 'size', 'size_unit_id',
+                      'land_tenure_type_id', 'gps_latitude', 'gps_longitude', 'administrative_area_id', 'create_date']
+
+EXPORT_MIMETYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    'parquet': 'application/vnd.apache.parquet',
+    'arrow': 'application/vnd.apache.arrow.stream',
+}
+# File extensions differing from the export format
+EXPORT_EXTENSIONS = {
+    'arrow': 'arrows', # Arrow IPC stream format
+}
+COLUMNAR_EXPORT_FORMATS = ('parquet', 'arrow')
+# Column types of the columnar exports, per Odoo field type (others: 'string')
+EXPORT_FIELD_COLUMN_TYPES = {
+    'integer': 'integer',
+    'float': 'float',
+    'monetary': 'float',
+    'date': 'date',
+    'datetime': 'datetime',
+    'boolean': 'boolean',
+    'selection': 'category',
+    'many2one': 'category',
+}
+# Column types of the columnar exports, per dynamic form field type (others: 'string')
+EXPORT_FORM_FIELD_COLUMN_TYPES = {
+    'number': 'float',
+    'date': 'date',
+    'datetime': 'datetime',
+    'boolean': 'boolean',
+    'selection': 'category',
+}
+EXPORT_COPY_BLOCK_SIZE = 1024 * 1024
+
+# Sections of get_dashboard_bundle
+DASHBOARD_SECTIONS = ('farmer_registration', 'landholding', 'form_submissions', 'map')
+
 class AnalyticsService(models.AbstractModel):
     _name = 'dfr.analytics.service'
     _description = 'DFR Analytics Data Service'
@@ -46,211 +107,365 @@ class AnalyticsService(models.AbstractModel):
         return domain
 
     @api.model
+    def _build_rollup_domain(self, filters):
+        """
+        Domain on the KPI rollups (dfr.analytics.farmer.rollup / dfr.analytics.plot.rollup)
+        equivalent to the farmer filters of _build_common_domain.
+        """
+        domain = []
+        if filters:
+            if filters.get('date_from'):
+                domain.append(('date', '>=', filters['date_from']))
+            if filters.get('date_to'):
+                domain.append(('date', '<=', filters['date_to']))
+            if filters.get('geographic_area_ids'):
+                domain.append(('administrative_area_id', 'in', filters['geographic_area_ids']))
+            if filters.get('farmer_status_ids'):
+                # Farmer status is a selection on dfr.farmer: filter values are status keys
+                domain.append(('status', 'in', filters['farmer_status_ids']))
+        return domain
+
+    @api.model
+    def _build_farmer_domain(self, filters, path='', farmers=None):
+        """
+        Live equivalent of _build_rollup_domain, on dfr.farmer.
+        :param path: prefix of the farmer fields, e.g. 'farm_id.farmer_id.' for a dfr.plot domain
+        :param farmers: farmer set already resolved from the filters (see _get_farmer_subquery),
+                        used instead of them
+        """
+        if farmers is not None:
+            return [(path.rstrip('.') or 'id', 'in', farmers)]
+        domain = []
+        if filters:
+            if filters.get('date_from'):
+                domain.append((path + 'create_date', '>=', fields.Date.to_date(filters['date_from'])))
+            if filters.get('date_to'):
+                # create_date is a datetime: inclusive of the whole 'date_to' day
+                domain.append((path + 'create_date', '<', fields.Date.to_date(filters['date_to']) + timedelta(days=1)))
+            if filters.get('geographic_area_ids'):
+                domain.append((path + 'administrative_area_id', 'in', filters['geographic_area_ids']))
+            if filters.get('farmer_status_ids'):
+                domain.append((path + 'status', 'in', filters['farmer_status_ids']))
+        return domain
+
+    @api.model
+    def _get_farmer_subquery(self, filters):
+        """
+        Farmers matching the filters and the record rules of the current user, as an SQL
+        subquery (odoo.osv.query.Query) to embed in domains, e.g. ('farmer_id', 'in', farmers).
+        """
+        return self.env['dfr.farmer']._search(self._build_farmer_domain(filters))
+
+    @api.model
+    def _can_use_rollups(self):
+        """
+        The rollups aggregate the whole registry: they only answer for users that no
+        record rule restricts on farmers, farms or plots. Others get live aggregates.
+        """
+        if self.env.su:
+            return True
+        IrRule = self.env['ir.rule']
+        return not any(IrRule._compute_domain(model_name, 'read') for model_name in ('dfr.farmer', 'dfr.farm', 'dfr.plot'))
+
+    @api.model
+    def get_histogram(self, model_name, domain, value_sql, bands):
+        """
+        Counts the records of a model per band of a numeric value, in a single SQL aggregate
+        (width_bucket over the band boundaries). The domain and the record rules of the
+        current user apply; memory use is bounded by the number of bands.
+
+        :param model_name: str, e.g. 'dfr.plot'
+        :param domain: list, Odoo domain on the model
+        :param value_sql: SQL expression of the value on the model's table, e.g. '"dfr_plot"."size"'
+                          (see analytics_rollup.age_sql for ages)
+        :param bands: list of (key, lower, upper), e.g. AGE_BANDS or SIZE_BANDS
+        :return: dict, {band key: count} of the non-empty bands in band order,
+                 then UNDEFINED_BAND for NULL values
+        """
+        Model = self.env[model_name]
+        Model.flush_model()
+        query = Model._where_calc(domain)
+        Model._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        self.env.cr.execute("""
+            SELECT %s AS band, count(*) FROM %s WHERE %s GROUP BY band
+        """ % (band_sql(value_sql, bands), from_clause, where_clause or 'TRUE'), where_params)
+        counts = dict(self.env.cr.fetchall())
+        keys = [key for key, _lower, _upper in bands] + [UNDEFINED_BAND]
+        return {key: counts[key] for key in keys if counts.get(key)}
+
+    @api.model
+    @kpi_cached('dfr.farmer', 'dfr.analytics.farmer.rollup')
     def get_farmer_registration_kpis(self, filters=None):
         """
         Fetches data for farmer registration KPIs as per SDS 5.2.2.
+        Answered from the daily rollup (dfr.analytics.farmer.rollup): exact totals,
+        cost independent of the registry size. Users restricted by record rules get the
+        same figures computed live on their farmers (grouped queries and get_histogram).
         """
-        Farmer = self.env['dfr.farmer']
-        domain = self._build_common_domain(filters, date_field='registration_date') # Assuming 'registration_date' or 'create_date'
+        return self._compute_farmer_registration_kpis(filters)
 
-        total_registrations = Farmer.search_count(domain)
+    @api.model
+    def _compute_farmer_registration_kpis(self, filters, farmers=None):
+        """ :param farmers: see _build_farmer_domain """
+        if self._can_use_rollups():
+            Rollup = self.env['dfr.analytics.farmer.rollup'].sudo()
+            domain = self._build_rollup_domain(filters)
+            total_registrations = sum(group['farmer_count'] for group in Rollup.read_group(domain, ['farmer_count:sum'], []))
+            sex_counts = [(group['sex'], group['farmer_count'])
+                          for group in Rollup.read_group(domain, ['farmer_count:sum'], ['sex'])]
+            age_counts = {}
+            for group in Rollup.read_group(domain, ['farmer_count:sum'], ['age_band']):
+                age_counts[group['age_band'] or UNDEFINED_BAND] = group['farmer_count']
+            trends = [(group['date:month'], group['farmer_count'])
+                      for group in Rollup.read_group(domain, ['farmer_count:sum'], ['date:month'], orderby='date:month')]
+        else:
+            Farmer = self.env['dfr.farmer']
+            domain = self._build_farmer_domain(filters, farmers=farmers)
+            total_registrations = Farmer.search_count(domain)
+            sex_counts = [(group['sex'], group['sex_count']) for group in Farmer.read_group(domain, ['sex'], ['sex'])]
+            today = fields.Date.context_today(self)
+            age_counts = self.get_histogram('dfr.farmer', domain, age_sql('"dfr_farmer"."date_of_birth"', today), AGE_BANDS)
+            trends = [(group['create_date:month'], group['create_date_count'])
+                      for group in Farmer.read_group(domain, ['create_date'], ['create_date:month'], orderby='create_date:month')]
 
-        # Gender disaggregation (assuming 'gender' selection field on dfr.farmer)
-        gender_read_group = Farmer.read_group(domain, ['gender'], ['gender'])
-        gender_disaggregation = {
-            item['gender'][1] if isinstance(item['gender'], tuple) else item['gender'] or _('Undefined'): item['gender_count']
-            for item in gender_read_group if item.get('gender') # Ensure gender exists
-        }
-
-        # Age distribution (assuming 'date_of_birth' field)
-        age_distribution = defaultdict(int)
-        age_groups = { # Define age groups (upper bound exclusive, lower bound inclusive)
-            _('0-17'): (0, 18),
-            _('18-25'): (18, 26),
-            _('26-35'): (26, 36),
-            _('36-45'): (36, 46),
-            _('46-55'): (46, 56),
-            _('56-65'): (56, 66),
-            _('66+'): (66, 150), # Assuming max age
-            _('Undefined Age'): (None, None)
-        }
-        farmers_with_dob = Farmer.search_read(domain, ['date_of_birth'], limit=10000) # Limit for performance, consider batching for very large sets
-        today = date.today()
-        for farmer_data in farmers_with_dob:
-            dob = farmer_data.get('date_of_birth')
-            age = None
-            if dob:
-                age = today.year - dob.year - ((today.month, today.day) < (dob.month, dob.day))
-
-            found_group = False
-            for group_name, (min_age, max_age) in age_groups.items():
-                if group_name == _('Undefined Age'): continue # Handle this last
-                if min_age is not None and max_age is not None and age is not None and min_age <= age < max_age:
-                    age_distribution[group_name] += 1
-                    found_group = True
-                    break
-            if not found_group:
-                age_distribution[_('Undefined Age')] +=1
-
-
-        # Registration trends (group by month on 'registration_date' or 'create_date')
-        trend_domain = domain[:] # Create a copy
-        # Ensure we only process if there's a valid date field for grouping
-        # The specific date field for trends needs to be consistent (e.g., 'registration_date')
-        # Using DATE_TRUNC depends on PostgreSQL
-        trend_read_group = Farmer.read_group(
-            trend_domain,
-            ['id', 'registration_date:month'],
-            ['registration_date:month'],
-            orderby='registration_date:month'
-        )
-        registration_trends = [
-            {'period': item['registration_date:month'], 'count': item['registration_date_count']}
-            for item in trend_read_group if item.get('registration_date:month')
-        ]
+        sex_labels = dict(self.env['dfr.farmer']._fields['sex'].selection)
+        gender_disaggregation = {}
+        for sex, count in sex_counts:
+            label = sex_labels.get(sex, _('Undefined'))
+            gender_disaggregation[label] = gender_disaggregation.get(label, 0) + count
 
+        age_distribution = dict.fromkeys([key for key, _lower, _upper in AGE_BANDS], 0) # Keeps the bands in order
+        for band, count in age_counts.items():
+            label = band if band in age_distribution else _('Undefined Age')
+            age_distribution[label] = age_distribution.get(label, 0) + count
 
         return {
             'total_registrations': total_registrations,
-            'gender_disaggregation': dict(gender_disaggregation),
-            'age_distribution': dict(age_distribution),
-            'registration_trends': registration_trends,
+            'gender_disaggregation': gender_disaggregation,
+            'age_distribution': {label: count for label, count in age_distribution.items() if count},
+            'registration_trends': [{'period': period, 'count': count} for period, count in trends if period],
         }
 
     @api.model
+    @kpi_cached('dfr.farmer', 'dfr.plot', 'dfr.analytics.plot.rollup')
     def get_landholding_summary_kpis(self, filters=None):
         """
         Fetches data for landholding summary KPIs as per SDS 5.2.2.
-        Filters here might apply to farmers, and then we find their plots.
+        Filters apply to the plots' farmers; answered from dfr.analytics.plot.rollup,
+        or live for users restricted by record rules.
         """
-        Plot = self.env['dfr.plot']
-        farmer_domain = self._build_common_domain(filters, date_field='farmer_id.registration_date') # Filter farmers
-        farmer_ids = self.env['dfr.farmer'].search(farmer_domain).ids
-        plot_domain = [('farmer_id', 'in', farmer_ids)]
-
+        return self._compute_landholding_summary_kpis(filters)
 
-        # Total plots and land area
-        plot_data = Plot.read_group(plot_domain, ['plot_size'], ['farmer_id']) # Group by farmer to sum plot sizes
-                                                                               # Then sum these sums if needed, or simply sum all plot_size
-        all_plots_data = Plot.search_read(plot_domain, ['plot_size'])
-        total_plots = len(all_plots_data)
-        total_land_area = sum(p['plot_size'] or 0.0 for p in all_plots_data)
+    @api.model
+    def _compute_landholding_summary_kpis(self, filters, farmers=None):
+        """ :param farmers: see _build_farmer_domain """
+        if self._can_use_rollups():
+            Rollup = self.env['dfr.analytics.plot.rollup'].sudo()
+            domain = self._build_rollup_domain(filters)
+            totals = Rollup.read_group(domain, ['plot_count:sum', 'total_size:sum'], [])[0]
+            total_plots = totals['plot_count'] or 0
+            total_land_area = totals['total_size'] or 0.0
+            plots_by_band = {group['size_band']: group['plot_count']
+                             for group in Rollup.read_group(domain, ['plot_count:sum'], ['size_band'])}
+        else:
+            Plot = self.env['dfr.plot']
+            domain = [('farm_id.farmer_id', '!=', False)] + self._build_farmer_domain(
+                filters, path='farm_id.farmer_id.', farmers=farmers)
+            totals = Plot.read_group(domain, ['size:sum'], [])[0]
+            total_plots = totals['__count']
+            total_land_area = totals['size'] or 0.0
+            plots_by_band = self.get_histogram('dfr.plot', domain, '"dfr_plot"."size"', SIZE_BANDS)
         average_plot_size = (total_land_area / total_plots) if total_plots > 0 else 0.0
 
-        # Land distribution by size
-        land_distribution = defaultdict(int)
-        size_groups = { # Define size groups in hectares (upper bound exclusive)
-            _('<0.5 Ha'): (0, 0.5),
-            _('0.5-1 Ha'): (0.5, 1.0),
-            _('1-2 Ha'): (1.0, 2.0),
-            _('2-5 Ha'): (2.0, 5.0),
-            _('5-10 Ha'): (5.0, 10.0),
-            _('10+ Ha'): (10.0, float('inf')),
-            _('Undefined Size'): (None, None)
-        }
-        for plot_item in all_plots_data:
-            size = plot_item.get('plot_size')
-            found_group = False
-            for group_name, (min_size, max_size) in size_groups.items():
-                if group_name == _('Undefined Size'): continue
-                if min_size is not None and max_size is not None and size is not None and min_size <= size < max_size:
-                    land_distribution[group_name] += 1
-                    found_group = True
-                    break
-            if not found_group:
-                land_distribution[_('Undefined Size')] += 1
+        land_distribution = {}
+        for key, _lower, _upper in SIZE_BANDS:
+            if plots_by_band.get(key):
+                land_distribution[_('%s Ha') % key] = plots_by_band[key]
+        if plots_by_band.get(UNDEFINED_BAND):
+            land_distribution[_('Undefined Size')] = plots_by_band[UNDEFINED_BAND]
 
         return {
             'total_plots': total_plots,
             'total_land_area': round(total_land_area, 2),
             'average_plot_size': round(average_plot_size, 2),
-            'land_distribution_by_size': dict(land_distribution),
+            'land_distribution_by_size': land_distribution,
         }
 
     @api.model
-    def get_dynamic_form_submission_kpis(self, form_id=None, filters=None):
+    def _get_submission_farmer_filters(self, filters):
+        """ Filters of the submitting farmers: the date range applies to the submission date instead. """
+        return dict(filters or {}, date_from=False, date_to=False)
+
+    @api.model
+    def _build_submission_domain(self, filters, form_id=None, farmers=None):
         """
-        Fetches data for dynamic form submission KPIs as per SDS 5.2.2.
-        Filters will apply to submissions, potentially via farmer linkage.
+        Domain on dfr.form.submission: farmer filters apply to the submitting farmer (as a
+        subquery, not a list of farmer ids), the date range to the submission date.
+        :param form_id: dfr.form id, submissions of all its versions
+        :param farmers: submitting farmer set already resolved (see _get_submission_farmer_filters)
         """
+        domain = [('form_version_id.form_master_id', '=', form_id)] if form_id else []
+        domain += self._build_farmer_domain(self._get_submission_farmer_filters(filters), path='farmer_id.', farmers=farmers)
+        if filters and filters.get('date_from'):
+            domain.append(('submission_date', '>=', fields.Date.to_date(filters['date_from'])))
+        if filters and filters.get('date_to'):
+            domain.append(('submission_date', '<', fields.Date.to_date(filters['date_to']) + timedelta(days=1)))
+        return domain
+
+    @api.model
+    @kpi_cached('dfr.farmer', 'dfr.form.submission')
+    def get_form_response_distributions(self, form_id, filters=None):
+        """
+        Answer counts of every selection and multi-selection field of a form, over the
+        submissions matching the filters, in a single grouped query. Fields are matched
+        by technical name across the versions of the form; answers are counted per option
+        key (one count per selected option for multi-selections, empty answers under
+        'Empty'). Record rules apply to the submissions.
+        :return: dict {field label: {option label: count}}, fields in form order
+        """
+        return self._compute_form_response_distributions(form_id, filters)
+
+    @api.model
+    def _compute_form_response_distributions(self, form_id, filters, farmers=None):
+        """ :param farmers: see _build_submission_domain """
+        form = self.env['dfr.form'].browse(form_id).exists()
+        if not form:
+            raise UserError(_("Dynamic Form with ID %s not found.") % form_id)
+
+        # Labels of the latest version defining each field / option
+        form_fields = self.env['dfr.form.field'].search([
+            ('form_version_id.form_master_id', '=', form.id),
+            ('field_type', 'in', ['selection', 'multi_selection']),
+        ], order='form_version_id desc, sequence, id')
+        field_labels, option_labels = {}, defaultdict(dict)
+        for form_field in form_fields:
+            field_labels.setdefault(form_field.name, form_field.label or form_field.name)
+            for value, label in form_field.get_selection_options_parsed():
+                option_labels[form_field.name].setdefault(value, label)
+        if not field_labels:
+            return {}
+
         Submission = self.env['dfr.form.submission']
-        Form = self.env['dfr.dynamic.form']
-        Response = self.env['dfr.form.response']
+        query = Submission._where_calc(self._build_submission_domain(filters, form_id=form.id, farmers=farmers))
+        Submission._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        if form._has_current_wide_tables():
+            self._query_wide_table_distributions(form, from_clause, where_clause, where_params)
+        else:
+            self._query_response_distributions(from_clause, where_clause, where_params)
 
-        # Build domain for submissions. Filters might relate to farmer props.
-        # Example: if filters are farmer-based, find relevant farmers first.
-        base_submission_domain = []
-        if filters:
-            farmer_domain_for_filters = self._build_common_domain(filters, date_field='farmer_id.registration_date')
-            if farmer_domain_for_filters: # If any farmer-specific filters are active
-                relevant_farmer_ids = self.env['dfr.farmer'].search(farmer_domain_for_filters).ids
-                base_submission_domain.append(('farmer_id', 'in', relevant_farmer_ids))
-            # Direct date filters for submissions if applicable (e.g. submission date)
-            if filters.get('date_from'):
-                base_submission_domain.append(('submission_date', '>=', filters['date_from'])) # Assuming 'submission_date' field
-            if filters.get('date_to'):
-                base_submission_domain.append(('submission_date', '<=', filters['date_to']))
+        counts = defaultdict(lambda: defaultdict(int))
+        for field_name, value, value_label, count in self.env.cr.fetchall():
+            if field_name not in field_labels:
+                continue
+            label = (option_labels[field_name].get(value) or value_label or value) if value else _('Empty')
+            counts[field_name][label] += count
+        return {field_labels[field_name]: dict(counts[field_name]) for field_name in field_labels if field_name in counts}
 
+    @api.model
+    def _query_response_distributions(self, from_clause, where_clause, where_params):
+        """
+        Runs the query counting the answers to the selection fields of the submissions of a
+        query (field name, option key, option label, count), from the individual responses.
+        """
+        self.env['dfr.form.response'].flush_model(['submission_id', 'field_id', 'field_type', 'value_selection', 'value_multi_selection_ids'])
+        self.env['dfr.form.selection.option.answer'].flush_model(['name', 'display_name'])
+        self.env.cr.execute("""
+            WITH submission AS (
+                SELECT "dfr_form_submission".id FROM %s WHERE %s
+            )
+            SELECT f.name, r.value_selection, NULL, count(*)
+            FROM dfr_form_response r
+            JOIN submission s ON s.id = r.submission_id
+            JOIN dfr_form_field f ON f.id = r.field_id
+            WHERE r.field_type = 'selection'
+            GROUP BY 1, 2
+            UNION ALL
+            SELECT f.name, o.name, max(o.display_name), count(*)
+            FROM dfr_form_response r
+            JOIN submission s ON s.id = r.submission_id
+            JOIN dfr_form_field f ON f.id = r.field_id
+            LEFT JOIN dfr_form_response_selection_option_rel rel ON rel.response_id = r.id
+            LEFT JOIN dfr_form_selection_option_answer o ON o.id = rel.option_id
+            WHERE r.field_type = 'multi_selection'
+            GROUP BY 1, 2
+        """ % (from_clause, where_clause or 'TRUE'), where_params)
 
-        submission_domain = list(base_submission_domain) # Make a copy
-        if form_id:
-            submission_domain.append(('dynamic_form_id', '=', form_id))
+    @api.model
+    def _query_wide_table_distributions(self, form, from_clause, where_clause, where_params):
+        """
+        Same query as _query_response_distributions, reading one column per selection field
+        from the wide tables of the form versions (see dfr.form._has_current_wide_tables).
+        """
+        selects, params = [], []
+        for version in form.form_version_ids.filtered('wide_table_name'):
+            for column, _sql_type, _expression, form_field in version._get_wide_table_columns():
+                if form_field.field_type == 'selection':
+                    selects.append("""
+                        SELECT %%s, w."%s", NULL, count(*)
+                        FROM "%s" w
+                        WHERE w.submission_id IN (SELECT id FROM submission) AND w."%s" IS NOT NULL
+                        GROUP BY 2
+                    """ % (column, version.wide_table_name, column))
+                elif form_field.field_type == 'multi_selection':
+                    selects.append("""
+                        SELECT %%s, o.value, NULL, count(*)
+                        FROM "%s" w
+                        LEFT JOIN LATERAL unnest(w."%s") AS o(value) ON TRUE
+                        WHERE w.submission_id IN (SELECT id FROM submission) AND w."%s" IS NOT NULL
+                        GROUP BY 2
+                    """ % (version.wide_table_name, column, column))
+                else:
+                    continue
+                params.append(form_field.name)
+        if not selects:
+            selects.append("SELECT NULL, NULL, NULL, 0 WHERE FALSE")
+        self.env.cr.execute("""
+            WITH submission AS (
+                SELECT "dfr_form_submission".id FROM %s WHERE %s
+            )
+            %s
+        """ % (from_clause, where_clause or 'TRUE', ' UNION ALL '.join(selects)), where_params + params)
 
-        total_submissions = Submission.search_count(submission_domain)
+    @api.model
+    @kpi_cached('dfr.farmer', 'dfr.form.submission')
+    def get_dynamic_form_submission_kpis(self, form_id=None, filters=None):
+        """
+        Fetches data for dynamic form submission KPIs as per SDS 5.2.2.
+        Farmer filters apply to the submitting farmer, the date range to the submission date.
+        For a form, the answer distributions of all its selection fields are included
+        (see get_form_response_distributions); without a form, submission counts per form.
+        """
+        return self._compute_dynamic_form_submission_kpis(form_id, filters)
+
+    @api.model
+    def _compute_dynamic_form_submission_kpis(self, form_id, filters, farmers=None):
+        """ :param farmers: see _build_submission_domain """
+        Submission = self.env['dfr.form.submission']
         form_name = _('All Forms')
-        specific_form_instance = None
         if form_id:
-            specific_form_instance = Form.browse(form_id)
-            if specific_form_instance.exists():
-                form_name = specific_form_instance.name
-            else:
-                 raise UserError(_("Dynamic Form with ID %s not found.") % form_id)
+            form = self.env['dfr.form'].browse(form_id).exists()
+            if not form:
+                raise UserError(_("Dynamic Form with ID %s not found.") % form_id)
+            form_name = form.name
 
+        submission_domain = self._build_submission_domain(filters, form_id=form_id, farmers=farmers)
+        total_submissions = Submission.search_count(submission_domain)
 
         submissions_per_form = {}
-        if not form_id: # Overview for all forms
-            form_read_group_domain = list(base_submission_domain)
-            form_read_group = Submission.read_group(
-                form_read_group_domain,
-                ['dynamic_form_id'],
-                ['dynamic_form_id']
-            )
-            submissions_per_form = {
-                item['dynamic_form_id'][1]: item['dynamic_form_id_count'] # [1] is the name
-                for item in form_read_group if item.get('dynamic_form_id')
-            }
-
         response_distribution = {}
-        if form_id and specific_form_instance:
-            submission_ids = Submission.search(submission_domain).ids
-            # Find selection fields for this form
-            selection_fields = specific_form_instance.field_ids.filtered(
-                lambda f: f.field_type in ['selection', 'multiselection'])
-
-            for field_def in selection_fields:
-                field_responses = defaultdict(int)
-                # Query responses for this field across relevant submissions
-                responses_data = Response.search_read(
-                    [('submission_id', 'in', submission_ids), ('form_field_id', '=', field_def.id)],
-                    ['value']
-                )
-                for res_data in responses_data:
-                    value = res_data.get('value')
-                    if field_def.field_type == 'multiselection':
-                        try:
-                            # Assuming multiselection stores as JSON list string: '["val1", "val2"]'
-                            parsed_values = json.loads(value) if value and isinstance(value, str) else []
-                            if isinstance(parsed_values, list):
-                                for v_item in parsed_values:
-                                    field_responses[v_item or _('Empty')] += 1
-                            else: # Not a list, treat as single value
-                                field_responses[parsed_values or _('Empty')] += 1
-                        except json.JSONDecodeError:
-                            # If not JSON, treat as a single string value (could be comma-separated by convention)
-                            field_responses[value or _('Empty')] += 1
-                    else: # selection
-                        field_responses[value or _('Empty')] += 1
-                response_distribution[field_def.field_label or field_def.field_name] = dict(field_responses)
+        if form_id:
+            response_distribution = self._compute_form_response_distributions(form_id, filters, farmers=farmers)
+        else: # Overview for all forms
+            version_counts = Submission.read_group(submission_domain, ['form_version_id'], ['form_version_id'])
+            versions = self.env['dfr.form.version'].browse(
+                [item['form_version_id'][0] for item in version_counts if item.get('form_version_id')])
+            form_by_version = {version.id: version.form_master_id for version in versions}
+            for item in version_counts:
+                if item.get('form_version_id'):
+                    form_record = form_by_version[item['form_version_id'][0]]
+                    submissions_per_form[form_record.name] = submissions_per_form.get(form_record.name, 0) + item['form_version_id_count']
 
         return {
             'total_submissions': total_submissions,
@@ -259,210 +474,661 @@ class AnalyticsService(models.AbstractModel):
             'form_name': form_name,
         }
 
+    # --- Map data ------------------------------------------------------------
+
     @api.model
-    def get_farmer_plot_geo_data(self, filters=None):
+    def _get_map_config(self):
+        IrConfigParameter = self.env['ir.config_parameter'].sudo()
+        return {
+            # Below this zoom level, points are clustered on a grid
+            'cluster_max_zoom': int(IrConfigParameter.get_param('dfr.analytics.map.cluster_max_zoom', '11')),
+            # From this zoom level, plot polygons are returned unsimplified
+            'full_detail_zoom': int(IrConfigParameter.get_param('dfr.analytics.map.full_detail_zoom', '16')),
+            # Maximum number of features (clusters included) per request
+            'feature_budget': int(IrConfigParameter.get_param('dfr.analytics.map.feature_budget', '2000')),
+            # Size of a cluster grid cell, in screen pixels
+            'cluster_cell_pixels': int(IrConfigParameter.get_param('dfr.analytics.map.cluster_cell_pixels', '64')),
+        }
+
+    @api.model
+    def _get_map_layers(self, filters, bbox, farmers=None):
         """
-        Fetches farmer homestead and plot geographical data as per SDS 5.2.2.
-        Filters apply to farmers.
+        Map layers matching the farmer filters within the bbox, looked up through the
+        geohash spatial index of dfr.spatial.query.service.
+        :param farmers: see _build_farmer_domain
+        :return: list of (layer type, model name, domain)
         """
-        Farmer = self.env['dfr.farmer']
-        Plot = self.env['dfr.plot']
+        layers = [
+            ('farmer_homestead', 'dfr.farmer', self._build_farmer_domain(filters, farmers=farmers)),
+            ('plot', 'dfr.plot',
+             [('farm_id.farmer_id', '!=', False)] + self._build_farmer_domain(filters, path='farm_id.farmer_id.', farmers=farmers)),
+        ]
+        SpatialQueryService = self.env['dfr.spatial.query.service']
+        for index, (layer_type, model_name, domain) in enumerate(layers):
+            geohash_field = SPATIAL_INDEXES[model_name][0]
+            if bbox:
+                domain = domain + SpatialQueryService.get_bbox_domain(model_name, bbox)
+            else:
+                domain = domain + [(geohash_field, '!=', False), (geohash_field, '!=', '')]
+            layers[index] = (layer_type, model_name, domain)
+        return layers
 
-        farmer_domain = self._build_common_domain(filters, date_field='registration_date')
-        farmers = Farmer.search(farmer_domain)
+    @api.model
+    def _get_map_clusters(self, layer_type, model_name, domain, cell_size, limit):
+        """
+        Point clusters of a layer: records grouped in a single SQL aggregate by the prefix of
+        their stored geohash whose cells are about cell_size degrees wide (record rules apply),
+        each cluster placed at the mean position of its records. Clusters stay put when panning.
+        :return: (list of GeoJSON features, whether clusters beyond `limit` were dropped)
+        """
+        geohash_field, latitude_field, longitude_field = SPATIAL_INDEXES[model_name]
+        Model = self.env[model_name]
+        Model.flush_model([geohash_field, latitude_field, longitude_field])
+        query = Model._where_calc(domain)
+        Model._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        self.env.cr.execute("""
+            SELECT count(*), avg("%(table)s"."%(latitude)s"), avg("%(table)s"."%(longitude)s")
+            FROM %(from_clause)s
+            WHERE %(where_clause)s
+            GROUP BY left("%(table)s"."%(geohash)s", %%s)
+            ORDER BY count(*) DESC
+            LIMIT %%s
+        """ % {
+            'table': Model._table,
+            'latitude': latitude_field,
+            'longitude': longitude_field,
+            'geohash': geohash_field,
+            'from_clause': from_clause,
+            'where_clause': where_clause or 'TRUE',
+        }, where_params + [geohash.precision_for_width(cell_size), limit + 1])
+        rows = self.env.cr.fetchall()
+        features = [{
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [round(mean_longitude, 6), round(mean_latitude, 6)]},
+            'properties': {'type': 'cluster', 'layer': layer_type, 'count': count},
+        } for count, mean_latitude, mean_longitude in rows[:limit]]
+        return features, len(rows) > limit
+
+    @api.model
+    def _get_map_farmer_features(self, domain, limit):
+        return [{
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [row['gps_longitude_homestead'], row['gps_latitude_homestead']]},
+            'properties': {'id': row['id'], 'type': 'farmer_homestead', 'farmer_uid': row['uid'], 'name': row['name']},
+        } for row in self.env['dfr.farmer'].search_read(
+            domain, ['uid', 'name', 'gps_latitude_homestead', 'gps_longitude_homestead'], limit=limit, order='id')]
 
-        geo_data = []
-        # Farmer homesteads (assuming gps_longitude, gps_latitude fields on dfr.farmer)
-        for farmer in farmers.filtered(lambda f: f.gps_latitude and f.gps_longitude):
-            geo_data.append({
+    @api.model
+    def _get_map_plot_features(self, domain, limit, tolerance):
+        """
+        Plot features: polygon (simplified with tolerance, in degrees) when gps_polygon holds a
+        valid GeoJSON Polygon/MultiPolygon, centroid point otherwise.
+        """
+        rows = self.env['dfr.plot'].search_read(
+            domain, ['name', 'size', 'gps_latitude', 'gps_longitude', 'gps_polygon', 'farm_id'], limit=limit, order='id')
+        # Farmer names of all the plots' farms in one read
+        farm_ids = list({row['farm_id'][0] for row in rows if row['farm_id']})
+        farmer_by_farm = {farm['id']: farm['farmer_id'] for farm in self.env['dfr.farm'].browse(farm_ids).read(['farmer_id'])}
+        features = []
+        for row in rows:
+            farmer = farmer_by_farm.get(row['farm_id'][0]) if row['farm_id'] else False
+            geometry = None
+            if row['gps_polygon']:
+                try:
+                    geometry = json.loads(row['gps_polygon'])
+                except ValueError:
+                    _logger.warning("Failed to parse GeoJSON for plot %s.", row['id'])
+                if isinstance(geometry, dict) and geometry.get('type') == 'Feature':
+                    geometry = geometry.get('geometry')
+                if not (isinstance(geometry, dict) and geometry.get('type') in ('Polygon', 'MultiPolygon')
+                        and isinstance(geometry.get('coordinates'), list)):
+                    geometry = None
+            if geometry:
+                geometry = map_geometry.simplify_geometry(geometry, tolerance)
+            else:
+                geometry = {'type': 'Point', 'coordinates': [row['gps_longitude'], row['gps_latitude']]}
+            features.append({
                 'type': 'Feature',
-                'geometry': {'type': 'Point', 'coordinates': [farmer.gps_longitude, farmer.gps_latitude]},
+                'geometry': geometry,
                 'properties': {
-                    'id': farmer.id,
-                    'farmer_uid': farmer.farmer_uid,
-                    'name': farmer.name,
-                    'type': 'farmer_homestead',
-                    'popup': f"<strong>{_('Farmer')}:</strong> {farmer.name}<br/><strong>UID:</strong> {farmer.farmer_uid}"
-                }
+                    'id': row['id'],
+                    'type': 'plot',
+                    'plot_uid': row['name'],
+                    'farmer_name': farmer[1] if farmer else False,
+                    'plot_size': row['size'] or 0.0,
+                },
             })
+        return features
 
-        # Plots (assuming geojson_polygon or gps_longitude/latitude on dfr.plot)
-        plot_ids = Plot.search([('farmer_id', 'in', farmers.ids)])
-        for plot in plot_ids:
-            properties = {
-                'id': plot.id,
-                'plot_uid': plot.plot_uid,
-                'farmer_name': plot.farmer_id.name if plot.farmer_id else _('N/A'),
-                'plot_size': plot.plot_size or 0.0,
-                'type': 'plot',
-            }
-            properties['popup'] = f"<strong>{_('Plot')}:</strong> {plot.plot_uid or _('N/A')}<br/>" \
-                                  f"<strong>{_('Farmer')}:</strong> {properties['farmer_name']}<br/>" \
-                                  f"<strong>{_('Size (Ha)')}:</strong> {properties['plot_size']}"
+    @api.model
+    def get_map_data(self, filters=None, bbox=None, zoom=None):
+        """
+        Farmer homesteads and plots of the map viewport, with a level of detail depending
+        on the zoom level and bounded by a per-request feature budget:
 
-            geometry = None
-            if plot.geojson_polygon:
-                try:
-                    geometry_data = json.loads(plot.geojson_polygon)
-                    # Basic validation of GeoJSON structure for Polygon
-                    if isinstance(geometry_data, dict) and \
-                       geometry_data.get('type') == 'Polygon' and \
-                       isinstance(geometry_data.get('coordinates'), list):
-                        geometry = geometry_data
-                    else:
-                        _logger.warning("Invalid GeoJSON Polygon structure for plot %s: %s", plot.id, plot.geojson_polygon)
-                except json.JSONDecodeError:
-                    _logger.warning("Failed to parse GeoJSON for plot %s: %s", plot.id, plot.geojson_polygon)
-            elif plot.gps_latitude and plot.gps_longitude: # Fallback to point if no polygon
-                geometry = {'type': 'Point', 'coordinates': [plot.gps_longitude, plot.gps_latitude]}
+        - below cluster_max_zoom: point clusters (type 'cluster', with a 'count' and the
+          'layer' they aggregate) computed on a grid of cluster_cell_pixels screen pixels;
+        - up to full_detail_zoom: individual features, plot polygons simplified to one pixel;
+        - from full_detail_zoom: individual features with full polygons.
 
-            if geometry:
-                 geo_data.append({
-                     'type': 'Feature',
-                     'geometry': geometry,
-                     'properties': properties
-                 })
-        return geo_data
+        When the viewport holds more records than the feature budget, clusters are returned
+        whatever the zoom level. Filters apply to farmers, and record rules apply.
 
+        :param filters: dict, see _build_farmer_domain
+        :param bbox: viewport [west, south, east, north] or 'west,south,east,north' (whole world if empty)
+        :param zoom: web map zoom level (default: full_detail_zoom)
+        :return: dict, GeoJSON FeatureCollection with additional keys 'mode' ('cluster',
+                 'simplified' or 'full'), 'zoom' and 'truncated' (clusters beyond the budget dropped)
+        """
+        return self._compute_map_data(filters, bbox, zoom)
 
     @api.model
-    def prepare_export_data(self, entity_type, filters=None, fields_to_export=None):
-        """ Prepares data for CSV/XLSX export as per SDS 5.2.2. """
+    def _compute_map_data(self, filters, bbox, zoom, farmers=None):
+        """ :param farmers: see _build_farmer_domain """
+        config = self._get_map_config()
+        zoom = config['full_detail_zoom'] if zoom is None else int(zoom)
+        layers = self._get_map_layers(filters, map_geometry.normalize_bbox(bbox), farmers=farmers)
+        budget = config['feature_budget']
+
+        if zoom < config['cluster_max_zoom']:
+            mode = 'cluster'
+        else:
+            mode = 'full' if zoom >= config['full_detail_zoom'] else 'simplified'
+            record_count = sum(self.env[model_name].search_count(domain) for _type, model_name, domain in layers)
+            if record_count > budget:
+                mode = 'cluster'
+
+        features = []
+        truncated = False
+        if mode == 'cluster':
+            cell_size = map_geometry.degrees_per_pixel(zoom) * config['cluster_cell_pixels']
+            for layer in layers:
+                clusters, layer_truncated = self._get_map_clusters(*layer, cell_size=cell_size, limit=budget // len(layers))
+                features += clusters
+                truncated = truncated or layer_truncated
+        else:
+            (_type, _model, farmer_domain), (_type, _model, plot_domain) = layers
+            tolerance = map_geometry.degrees_per_pixel(zoom) if mode == 'simplified' else 0.0
+            features += self._get_map_farmer_features(farmer_domain, budget)
+            features += self._get_map_plot_features(plot_domain, budget - len(features), tolerance)
+        return {
+            'type': 'FeatureCollection',
+            'features': features,
+            'mode': mode,
+            'zoom': zoom,
+            'truncated': truncated,
+        }
+
+    @api.model
+    def get_farmer_plot_geo_data(self, filters=None):
+        """
+        Fetches farmer homestead and plot geographical data as per SDS 5.2.2.
+        Filters apply to farmers. Full-detail features of the whole map within the feature
+        budget (clusters beyond it): map views should use get_map_data with their viewport.
+        """
+        return self.get_map_data(filters)['features']
+
+    # --- Dashboard -----------------------------------------------------------
+
+    @api.model
+    @kpi_cached('dfr.farmer', 'dfr.plot', 'dfr.form.submission', 'dfr.analytics.farmer.rollup', 'dfr.analytics.plot.rollup')
+    def get_dashboard_bundle(self, filters=None, sections=None):
+        """
+        Data of several dashboard sections in a single call. The filtered farmer set is
+        resolved once, as an SQL subquery shared by the sections computed live.
+
+        Sections (DASHBOARD_SECTIONS):
+        - 'farmer_registration': get_farmer_registration_kpis
+        - 'landholding': get_landholding_summary_kpis
+        - 'form_submissions': get_dynamic_form_submission_kpis of filters['dynamic_form_id']
+          (all forms if not set)
+        - 'map': get_map_data of the viewport filters['map_bbox'] at zoom filters['map_zoom']
+
+        :param filters: dict, dashboard filters (see _build_farmer_domain)
+        :param sections: list of section names (default: all but 'map')
+        :return: dict {section name: section data}
+        """
+        filters = filters or {}
+        sections = sections or [section for section in DASHBOARD_SECTIONS if section != 'map']
+        unknown_sections = set(sections) - set(DASHBOARD_SECTIONS)
+        if unknown_sections:
+            raise UserError(_("Unknown dashboard section(s): %s") % ', '.join(sorted(unknown_sections)))
+
+        farmers = submission_farmers = None
+        if 'map' in sections or (not self._can_use_rollups() and {'farmer_registration', 'landholding'} & set(sections)):
+            farmers = self._get_farmer_subquery(filters)
+        if 'form_submissions' in sections:
+            submission_farmers = self._get_farmer_subquery(self._get_submission_farmer_filters(filters))
+
+        bundle = {}
+        for section in sections:
+            if section == 'farmer_registration':
+                bundle[section] = self._compute_farmer_registration_kpis(filters, farmers=farmers)
+            elif section == 'landholding':
+                bundle[section] = self._compute_landholding_summary_kpis(filters, farmers=farmers)
+            elif section == 'form_submissions':
+                bundle[section] = self._compute_dynamic_form_submission_kpis(
+                    filters.get('dynamic_form_id') or None, filters, farmers=submission_farmers)
+            elif section == 'map':
+                bundle[section] = self._compute_map_data(
+                    filters, filters.get('map_bbox'), filters.get('map_zoom'), farmers=farmers)
+        return bundle
+
+    # --- Data export ---------------------------------------------------------
+
+    @api.model
+    def _get_export_chunk_size(self):
+        return int(self.env['ir.config_parameter'].sudo().get_param('dfr.analytics.export.chunk_size', '2000'))
+
+    @api.model
+    def _iter_export_records(self, Model, domain):
+        """
+        Records of Model matching domain, in chunks of ids in increasing order (keyset
+        pagination: each chunk is an indexed range scan, whatever its position). The ORM
+        cache is cleared between chunks so that memory use does not grow with the export.
+        """
+        chunk_size = self._get_export_chunk_size()
+        last_id = 0
+        while True:
+            records = Model.search(domain + [('id', '>', last_id)], order='id', limit=chunk_size)
+            if not records:
+                return
+            yield records
+            last_id = records[-1].id
+            self.env.invalidate_all()
+            if len(records) < chunk_size:
+                return
+
+    @api.model
+    def _get_export_header(self, Model, field_paths):
+        """ Column labels of field paths, e.g. 'farm_id.farmer_id.name' -> 'Farm / Farmer / Full Name'. """
         header = []
-        data_rows_list_of_dicts = []
-
-        # Common filter logic based on entity type might be complex
-        # For simplicity, apply general filters and let entity-specific logic refine if needed.
-        # This will be tricky as filters (e.g., farmer_status_ids) are farmer-centric.
-        # We need to correctly apply them to plots or submissions related to those farmers.
-
-        if entity_type == 'farmer_core_data':
-            Model = self.env['dfr.farmer']
-            domain = self._build_common_domain(filters, date_field='registration_date')
-            default_fields = ['farmer_uid', 'name', 'gender', 'date_of_birth', 'contact_phone', 'registration_date', 'farmer_status_id.name', 'administrative_area_id.display_name']
-            fields_to_read = fields_to_export or default_fields
-            
-            # For header, get field descriptions
-            field_objects = {fname: Model._fields[fname] for fname in fields_to_read if '.' not in fname and fname in Model._fields}
-            header = [field_objects[fname].string if fname in field_objects else fname.replace('_', ' ').title() for fname in fields_to_read]
-            
-            records = Model.search_read(domain, fields_to_read)
-            # Post-process many2one fields [id, name] to just name, and format dates/datetimes
-            for rec in records:
-                for f_name in fields_to_read:
-                    if isinstance(rec.get(f_name), tuple) and len(rec[f_name]) == 2: # m2o field
-                        rec[f_name] = rec[f_name][1] # Get name part
-                    elif isinstance(rec.get(f_name), (datetime, date)):
-                        rec[f_name] = fields.Datetime.to_string(rec[f_name]) if isinstance(rec[f_name], datetime) else fields.Date.to_string(rec[f_name])
-            data_rows_list_of_dicts = records
-
-
-        elif entity_type == 'farmer_plot_data':
-            PlotModel = self.env['dfr.plot']
-            farmer_domain = self._build_common_domain(filters, date_field='farmer_id.registration_date')
-            relevant_farmer_ids = self.env['dfr.farmer'].search(farmer_domain).ids
-            plot_domain = [('farmer_id', 'in', relevant_farmer_ids)]
-
-            default_fields = ['plot_uid', 'farmer_id.name', 'plot_size', 'land_tenure_type', 'primary_crop', 'gps_latitude', 'gps_longitude', 'create_date']
-            fields_to_read = fields_to_export or default_fields
-
-            field_objects_plot = {fname: PlotModel._fields[fname] for fname in fields_to_read if '.' not in fname and fname in PlotModel._fields}
-            # For related fields, we might need to introspect further or use hardcoded labels
-            header = []
-            for fname in fields_to_read:
-                if '.' in fname: # e.g. farmer_id.name
-                    parts = fname.split('.')
-                    # This is simplified; proper related field label fetching is more complex
-                    header.append(f"{parts[0].replace('_',' ').title()} {parts[1].replace('_',' ').title()}")
-                elif fname in field_objects_plot:
-                    header.append(field_objects_plot[fname].string)
-                else:
-                    header.append(fname.replace('_',' ').title())
+        for path in field_paths:
+            labels, model = [], Model
+            for field_name in path.split('.'):
+                field = model._fields.get(field_name) if model is not None else None
+                labels.append(field.string if field else field_name.replace('_', ' ').title())
+                model = self.env[field.comodel_name] if field and field.relational else None
+            header.append(' / '.join(labels))
+        return header
 
-            records = PlotModel.search_read(plot_domain, fields_to_read)
-            for rec in records:
-                for f_name in fields_to_read:
-                    if isinstance(rec.get(f_name), tuple) and len(rec[f_name]) == 2:
-                        rec[f_name] = rec[f_name][1]
-                    elif isinstance(rec.get(f_name), (datetime, date)):
-                        rec[f_name] = fields.Datetime.to_string(rec[f_name]) if isinstance(rec[f_name], datetime) else fields.Date.to_string(rec[f_name])
-            data_rows_list_of_dicts = records
+    @api.model
+    def _get_export_column_type(self, Model, path):
+        """ Column type of a field path in columnar exports, see EXPORT_FIELD_COLUMN_TYPES. """
+        field = None
+        for field_name in path.split('.'):
+            field = Model._fields[field_name]
+            if field.relational:
+                Model = self.env[field.comodel_name]
+        return EXPORT_FIELD_COLUMN_TYPES.get(field.type, 'string')
+
+    @api.model
+    def _get_export_value(self, record, path, typed=False):
+        """
+        Value of a field path on a record, as written to CSV/XLSX cells, or with its own type
+        for columnar exports (typed: numbers, dates and booleans as such, None if empty).
+        """
+        value, field = record, None
+        for field_name in path.split('.'):
+            field = value._fields[field_name]
+            value = value[field_name]
+        if isinstance(value, models.BaseModel):
+            return ', '.join(value.mapped('display_name')) or (None if typed else '')
+        if typed:
+            if field.type == 'boolean':
+                return bool(value)
+            return None if value is False else value
+        if isinstance(value, datetime):
+            return fields.Datetime.to_string(value)
+        if isinstance(value, date):
+            return fields.Date.to_string(value)
+        if value is False or value is None:
+            return ''
+        return value
+
+    @api.model
+    def _get_export_source(self, entity_type, filters=None, fields_to_export=None):
+        """
+        Records and columns of an export as per SDS 5.2.2.
+
+        :param entity_type: 'farmer_core_data', 'farmer_plot_data' or 'dynamic_form_<dfr.form id>'
+        :param filters: dict, see _build_farmer_domain
+        :param fields_to_export: list of field paths (default: FARMER_EXPORT_FIELDS / PLOT_EXPORT_FIELDS),
+                                 ignored for dynamic forms
+        :return: (model, domain, header, function returning the rows of a chunk of records
+                 (typed values with typed=True), column types of the columnar exports)
+        """
+        if entity_type in ('farmer_core_data', 'farmer_plot_data'):
+            if entity_type == 'farmer_core_data':
+                Model = self.env['dfr.farmer']
+                domain = self._build_farmer_domain(filters)
+                field_paths = fields_to_export or FARMER_EXPORT_FIELDS
+            else:
+                Model = self.env['dfr.plot']
+                domain = [('farm_id.farmer_id', '!=', False)] + self._build_farmer_domain(filters, path='farm_id.farmer_id.')
+                field_paths = fields_to_export or PLOT_EXPORT_FIELDS
 
+            def get_rows(records, typed=False):
+                return ([self._get_export_value(record, path, typed=typed) for path in field_paths] for record in records)
+            column_types = [self._get_export_column_type(Model, path) for path in field_paths]
+            return Model, domain, self._get_export_header(Model, field_paths), get_rows, column_types
 
-        elif entity_type.startswith('dynamic_form_'):
+        if entity_type.startswith('dynamic_form_'):
             try:
                 form_id = int(entity_type.replace('dynamic_form_', ''))
             except ValueError:
                 raise UserError(_("Invalid dynamic form type for export: %s") % entity_type)
-
-            Form = self.env['dfr.dynamic.form']
-            form_instance = Form.browse(form_id)
-            if not form_instance.exists():
+            form = self.env['dfr.form'].browse(form_id).exists()
+            if not form:
                 raise UserError(_("Dynamic Form with ID %s not found.") % form_id)
 
-            Submission = self.env['dfr.form.submission']
-            Response = self.env['dfr.form.response']
-
-            # Build submission domain, potentially linking through filtered farmers
-            submission_domain = []
-            if filters:
-                farmer_domain_for_filters = self._build_common_domain(filters, date_field='farmer_id.registration_date')
-                if farmer_domain_for_filters:
-                    relevant_farmer_ids = self.env['dfr.farmer'].search(farmer_domain_for_filters).ids
-                    submission_domain.append(('farmer_id', 'in', relevant_farmer_ids))
-                if filters.get('date_from'):
-                    submission_domain.append(('submission_date', '>=', filters['date_from']))
-                if filters.get('date_to'):
-                    submission_domain.append(('submission_date', '<=', filters['date_to']))
-
-            submission_domain.append(('dynamic_form_id', '=', form_id))
-            submissions = Submission.search(submission_domain, order='submission_date desc')
-
-            # Prepare header: common submission fields + dynamic form fields
-            header = [_('Submission ID'), _('Submission Date'), _('Farmer UID'), _('Farmer Name')]
-            form_fields_ordered = form_instance.field_ids.sorted(key=lambda f: f.sequence) # Assuming 'sequence' field for order
-            dynamic_field_labels = [f.field_label or f.field_name for f in form_fields_ordered]
-            header.extend(dynamic_field_labels)
-
-            # Fetch all responses for these submissions efficiently
-            all_responses_data = Response.search_read(
-                [('submission_id', 'in', submissions.ids)],
-                ['submission_id', 'form_field_id', 'value']
-            )
-            # Organize responses by submission_id and then by form_field_id
-            responses_by_submission = defaultdict(dict)
-            for res in all_responses_data:
-                responses_by_submission[res['submission_id'][0]][res['form_field_id'][0]] = res['value']
-
-            field_id_to_label_map = {f.id: (f.field_label or f.field_name) for f in form_fields_ordered}
-
-            for sub in submissions:
-                row_dict = {
-                    _('Submission ID'): sub.name or sub.id,
-                    _('Submission Date'): fields.Datetime.to_string(sub.submission_date) if sub.submission_date else '',
-                    _('Farmer UID'): sub.farmer_id.farmer_uid if sub.farmer_id else '',
-                    _('Farmer Name'): sub.farmer_id.name if sub.farmer_id else '',
-                }
-                submission_specific_responses = responses_by_submission.get(sub.id, {})
-                for field_def in form_fields_ordered:
-                    field_label = field_id_to_label_map[field_def.id]
-                    raw_value = submission_specific_responses.get(field_def.id, '')
-                    # Handle multiselection formatting for CSV/XLSX (e.g., join list)
-                    if field_def.field_type == 'multiselection' and raw_value:
-                        try:
-                            value_list = json.loads(raw_value)
-                            if isinstance(value_list, list):
-                                row_dict[field_label] = ', '.join(map(str, value_list))
-                            else: # Not a list, store as is
-                                row_dict[field_label] = str(raw_value)
-                        except json.JSONDecodeError: # Not valid JSON
-                            row_dict[field_label] = str(raw_value)
-                    elif isinstance(raw_value, (datetime, date)): # Should be string from 'value' field
-                        row_dict[field_label] = str(raw_value)
-                    else:
-                        row_dict[field_label] = raw_value
-                data_rows_list_of_dicts.append(row_dict)
+            # One column per field technical name, over all versions of the form
+            columns, field_column_types = {}, {}
+            form_fields = self.env['dfr.form.field'].search(
+                [('form_version_id.form_master_id', '=', form.id)], order='form_version_id, sequence, id')
+            for form_field in form_fields:
+                columns.setdefault(form_field.name, form_field.label or form_field.name)
+                column_type = EXPORT_FORM_FIELD_COLUMN_TYPES.get(form_field.field_type, 'string')
+                if field_column_types.setdefault(form_field.name, column_type) != column_type:
+                    field_column_types[form_field.name] = 'string' # Type changed between versions
+
+            domain = self._build_submission_domain(filters, form_id=form.id)
+            header = [_('Submission ID'), _('Submission Date'), _('Farmer UID'), _('Farmer Name')] + list(columns.values())
+
+            use_wide_tables = form.wide_table_enabled
+
+            def get_rows(submissions, typed=False):
+                values_by_submission = defaultdict(dict)
+                from_responses = submissions
+                if use_wide_tables:
+                    # Refreshed submissions are read from the wide tables, the others from their responses
+                    for version in submissions.form_version_id.filtered('wide_table_name'):
+                        version_submissions = submissions.filtered(lambda submission: submission.form_version_id == version)
+                        wide_rows = version._read_wide_rows(version_submissions.ids)
+                        form_fields = {form_field.name: form_field for form_field in version.field_ids}
+                        for submission_id, row in wide_rows.items():
+                            values_by_submission[submission_id] = {
+                                field_name: self._get_wide_export_value(
+                                    form_fields[field_name], value, field_column_types[field_name], typed)
+                                for field_name, value in row.items()
+                            }
+                        from_responses -= version_submissions.browse(list(wide_rows))
+                for response in from_responses.response_ids:
+                    field_name = response.field_id.name
+                    values_by_submission[response.submission_id.id][field_name] = (
+                        self._get_response_export_value(response, field_column_types[field_name])
+                        if typed else response.get_display_value())
+                empty = None if typed else ''
+                for submission in submissions:
+                    values = values_by_submission[submission.id]
+                    yield [
+                        submission.name or str(submission.id),
+                        self._get_export_value(submission, 'submission_date', typed=typed),
+                        submission.farmer_id.uid or empty,
+                        submission.farmer_id.name or empty,
+                    ] + [values.get(field_name, empty) for field_name in columns]
+            column_types = ['string', 'datetime', 'string', 'string'] + [field_column_types[field_name] for field_name in columns]
+            return self.env['dfr.form.submission'], domain, header, get_rows, column_types
+
+        raise UserError(_("Unknown entity type for export: %s") % entity_type)
+
+    @api.model
+    def _get_response_export_value(self, response, column_type):
+        """ Typed value of a dynamic form response in a column of a columnar export. """
+        if column_type == 'float':
+            return response.value_number
+        if column_type == 'date':
+            return response.value_date or None
+        if column_type == 'datetime':
+            return response.value_datetime or None
+        if column_type == 'boolean':
+            return response.value_boolean
+        return response.get_display_value() or None
+
+    @api.model
+    def _get_wide_export_value(self, form_field, value, column_type, typed):
+        """
+        Value of an answer read from a wide table (see dfr.form.version._read_wide_rows) in an
+        export column, as _get_response_export_value (typed) or get_display_value would give it.
+        """
+        field_type = form_field.field_type
+        if typed and column_type in ('float', 'date', 'datetime', 'boolean'):
+            return value
+        if value is None or (field_type == 'gps_point' and None in value): # Not answered
+            return None if typed else ''
+        if field_type == 'number':
+            display_value = str(value)
+        elif field_type == 'date':
+            display_value = fields.Date.to_string(value)
+        elif field_type == 'datetime':
+            display_value = fields.Datetime.to_string(value)
+        elif field_type == 'boolean':
+            display_value = _("Yes") if value else _("No")
+        elif field_type in ('selection', 'multi_selection'):
+            option_labels = dict(form_field.get_selection_options_parsed())
+            keys = value if field_type == 'multi_selection' else [value] if value else []
+            display_value = ", ".join(option_labels.get(key, key) for key in keys)
+        elif field_type == 'gps_point':
+            display_value = "Lat: %s, Lon: %s" % value
+        elif field_type == 'image':
+            display_value = self.env['ir.attachment'].browse(value).name or _("Attachment")
+        elif field_type == 'computed_text':
+            display_value = value or _("[Computed Value Not Available]")
+        else:
+            display_value = value
+        return (display_value or None) if typed else display_value
+
+    @api.model
+    def count_export_rows(self, entity_type, filters=None):
+        """ Number of data rows of an export (see _get_export_source). """
+        Model, domain, _header, _get_rows, _column_types = self._get_export_source(entity_type, filters=filters)
+        return Model.search_count(domain)
+
+    @api.model
+    def iter_export_rows(self, entity_type, filters=None, fields_to_export=None, progress_callback=None):
+        """
+        Generator of the rows of a CSV/XLSX export: the header first, then one list of cell
+        values per record. Records are read in keyset-paginated chunks, so memory use is
+        bounded whatever the size of the export.
+
+        :param progress_callback: optional function called with the number of data rows
+                                  generated so far, after each chunk
+        """
+        source = self._get_export_source(entity_type, filters, fields_to_export)
+        yield from self._iter_source_rows(source, progress_callback=progress_callback)
+
+    @api.model
+    def _iter_source_rows(self, source, typed=False, progress_callback=None):
+        """ Rows of an export source (see _get_export_source and iter_export_rows). """
+        Model, domain, header, get_rows, _column_types = source
+        yield header
+        rows_done = 0
+        for records in self._iter_export_records(Model, domain):
+            yield from get_rows(records, typed=typed)
+            rows_done += len(records)
+            if progress_callback:
+                progress_callback(rows_done)
+
+    @api.model
+    def prepare_export_data(self, entity_type, filters=None, fields_to_export=None):
+        """
+        Prepares data for CSV/XLSX export as per SDS 5.2.2, in memory.
+        Large exports should use export_to_attachment, which streams iter_export_rows to a file.
+        :return: dict {'header': [labels], 'data': [{label: value}]}
+        """
+        rows = self.iter_export_rows(entity_type, filters=filters, fields_to_export=fields_to_export)
+        header = next(rows)
+        return {'header': header, 'data': [dict(zip(header, row)) for row in rows]}
+
+    @api.model
+    def _write_export_file(self, rows, export_format, path):
+        """
+        Writes export rows to a file incrementally: CSV rows as they come, XLSX with an
+        openpyxl write-only workbook (rows are serialized to disk, not kept as cells).
+        :return: int, number of data rows written (header excluded)
+        """
+        count = -1
+        if export_format == 'csv':
+            with open(path, 'w', newline='', encoding='utf-8') as csv_file:
+                writer = csv.writer(csv_file)
+                for row in rows:
+                    writer.writerow(row)
+                    count += 1
+        elif export_format == 'xlsx':
+            workbook = openpyxl.Workbook(write_only=True)
+            worksheet = workbook.create_sheet(title="Report Data")
+            for row in rows:
+                worksheet.append(row)
+                count += 1
+            workbook.save(path)
         else:
-            raise UserError(_("Unknown entity type for export: %s") % entity_type)
+            raise UserError(_("Unsupported export format: %s") % export_format)
+        return max(count, 0)
 
-        return {'header': header, 'data': data_rows_list_of_dicts}
\ No newline at end of file
+    @api.model
+    def _get_columnar_export_config(self):
+        IrConfigParameter = self.env['ir.config_parameter'].sudo()
+        return {
+            # Rows per Parquet row group / Arrow record batch
+            'row_group_size': int(IrConfigParameter.get_param('dfr.analytics.export.row_group_size', '50000')),
+            # Compression codec: 'zstd' or 'lz4' (Arrow IPC); Parquet also takes 'snappy', 'gzip' and 'brotli'
+            'compression': IrConfigParameter.get_param('dfr.analytics.export.compression', 'zstd'),
+        }
+
+    @api.model
+    def _write_columnar_file(self, rows, column_types, export_format, path):
+        """
+        Writes typed export rows (see _iter_source_rows) to a compressed Parquet file or
+        Arrow IPC stream, one row group / record batch per row_group_size rows. 'category'
+        columns are dictionary-encoded with a dictionary shared by all batches (they load
+        as pandas categoricals), so only the rows of the current batch are kept in memory.
+        :return: int, number of data rows written
+        """
+        if pyarrow is None:
+            raise UserError(_("The pyarrow Python library is required for Parquet and Arrow exports."))
+        config = self._get_columnar_export_config()
+        arrow_types = {
+            'integer': pyarrow.int64(),
+            'float': pyarrow.float64(),
+            'date': pyarrow.date32(),
+            'datetime': pyarrow.timestamp('s'),
+            'boolean': pyarrow.bool_(),
+            'category': pyarrow.dictionary(pyarrow.int32(), pyarrow.string()),
+        }
+        header = next(rows)
+        schema = pyarrow.schema([(name, arrow_types.get(column_type, pyarrow.string()))
+                                 for name, column_type in zip(header, column_types)])
+        dictionaries = {index: {} for index, column_type in enumerate(column_types) if column_type == 'category'}
+
+        def to_batch(columns):
+            arrays = []
+            for index, values in enumerate(columns):
+                if index in dictionaries:
+                    codes = dictionaries[index]
+                    indices = [None if value is None else codes.setdefault(value, len(codes)) for value in values]
+                    arrays.append(pyarrow.DictionaryArray.from_arrays(
+                        pyarrow.array(indices, type=pyarrow.int32()), pyarrow.array(list(codes), type=pyarrow.string())))
+                else:
+                    arrays.append(pyarrow.array(values, type=schema.field(index).type))
+            return pyarrow.RecordBatch.from_arrays(arrays, schema=schema)
+
+        if export_format == 'parquet':
+            writer = pyarrow.parquet.ParquetWriter(path, schema, compression=config['compression'])
+
+            def write_batch(batch):
+                writer.write_table(pyarrow.Table.from_batches([batch]))
+        elif export_format == 'arrow':
+            writer = pyarrow.ipc.new_stream(path, schema, options=pyarrow.ipc.IpcWriteOptions(
+                compression=config['compression'], emit_dictionary_deltas=True))
+            write_batch = writer.write_batch
+        else:
+            raise UserError(_("Unsupported export format: %s") % export_format)
+
+        count = 0
+        columns = [[] for _name in header]
+        try:
+            for row in rows:
+                for values, value in zip(columns, row):
+                    values.append(value)
+                count += 1
+                if len(columns[0]) >= config['row_group_size']:
+                    write_batch(to_batch(columns))
+                    columns = [[] for _name in header]
+            if columns[0]:
+                write_batch(to_batch(columns))
+        finally:
+            writer.close()
+        return count
+
+    @api.model
+    def _create_attachment_from_file(self, path, vals):
+        """
+        Creates an ir.attachment with the content of a file. With the filestore, the file is
+        copied there and hashed block by block: its content is never loaded in memory nor
+        base64-encoded.
+        :param vals: ir.attachment values, without datas/raw
+        """
+        Attachment = self.env['ir.attachment']
+        if Attachment._storage() != 'file':
+            with open(path, 'rb') as export_file:
+                return Attachment.create(dict(vals, raw=export_file.read()))
+
+        sha = hashlib.sha1()
+        with open(path, 'rb') as export_file:
+            for block in iter(lambda: export_file.read(EXPORT_COPY_BLOCK_SIZE), b''):
+                sha.update(block)
+        checksum = sha.hexdigest()
+        store_fname = '%s/%s' % (checksum[:2], checksum)
+        full_path = Attachment._full_path(store_fname)
+        if not os.path.exists(full_path):
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            shutil.copyfile(path, full_path)
+            Attachment._mark_for_gc(store_fname) # Garbage collected if the transaction rolls back
+
+        attachment = Attachment.create(dict(vals, type='binary'))
+        # store_fname, file_size and checksum are not writable through the ORM
+        self.env.cr.execute("""
+            UPDATE ir_attachment SET store_fname = %s, file_size = %s, checksum = %s WHERE id = %s
+        """, (store_fname, os.path.getsize(path), checksum, attachment.id))
+        attachment.invalidate_recordset(['store_fname', 'file_size', 'checksum', 'datas', 'raw'])
+        return attachment
+
+    @api.model
+    def export_to_attachment(self, entity_type, export_format, filters=None, fields_to_export=None,
+                             file_name=None, res_model=False, res_id=False, progress_callback=None):
+        """
+        Streams an export (see iter_export_rows) to a temporary CSV/XLSX/Parquet/Arrow file and
+        stores it as an ir.attachment. Peak memory is bounded by the chunk size (row group size
+        for the columnar formats), not by the export size.
+
+        :param export_format: 'csv', 'xlsx', 'parquet' or 'arrow' (Arrow IPC stream)
+        :param file_name: attachment name, without extension
+        :param progress_callback: see iter_export_rows
+        :return: ir.attachment record
+        :raise UserError: if no record matches the filters
+        """
+        extension = EXPORT_EXTENSIONS.get(export_format, export_format)
+        file_name = '%s.%s' % (file_name or entity_type, extension)
+        file_descriptor, path = tempfile.mkstemp(prefix='dfr_export_', suffix='.' + extension)
+        os.close(file_descriptor)
+        try:
+            source = self._get_export_source(entity_type, filters, fields_to_export)
+            columnar = export_format in COLUMNAR_EXPORT_FORMATS
+            rows = self._iter_source_rows(source, typed=columnar, progress_callback=progress_callback)
+            if columnar:
+                row_count = self._write_columnar_file(rows, source[4], export_format, path)
+            else:
+                row_count = self._write_export_file(rows, export_format, path)
+            if not row_count:
+                raise UserError(_("No data found matching the selected filters."))
+            attachment = self._create_attachment_from_file(path, {
+                'name': file_name,
+                'mimetype': EXPORT_MIMETYPES[export_format],
+                'res_model': res_model,
+                'res_id': res_id,
+            })
+        finally:
+            os.remove(path)
+        _logger.info("Exported %s rows of %s to attachment %s (%s).", row_count, entity_type, attachment.id, file_name)
+        return attachment
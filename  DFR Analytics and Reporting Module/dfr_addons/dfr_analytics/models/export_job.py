@@ -0,0 +1,153 @@
+# dfr_addons/dfr_analytics/models/export_job.py
+import json
+import logging
+
+from odoo import models, fields, api, _
+from odoo.exceptions import UserError
+
+_logger = logging.getLogger(__name__)
+
+
+class ExportJobCancelled(Exception):
+    """ Raised from the progress callback of a running export when its job was cancelled. """
+
+
+class ExportJob(models.Model):
+    """
+    Background CSV/XLSX export, queued from dfr.report.export.wizard and processed by a
+    scheduled action outside of the HTTP request (no worker timeout). The export runs as
+    the requesting user, so that record rules apply; progress is committed after each chunk.
+    """
+    _name = 'dfr.export.job'
+    _description = 'DFR Background Export Job'
+    _inherit = ['mail.thread']
+    _order = 'id desc'
+
+    name = fields.Char(string='Export', required=True, readonly=True)
+    user_id = fields.Many2one('res.users', string='Requested By', required=True, readonly=True,
+                              default=lambda self: self.env.user, index=True)
+    entity_type = fields.Char(string='Entity Type', required=True, readonly=True,
+                              help="Export entity type of dfr.analytics.service: 'farmer_core_data', "
+                                   "'farmer_plot_data' or 'dynamic_form_<form id>'.")
+    export_format = fields.Selection([
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel XLSX'),
+        ('parquet', 'Parquet'),
+        ('arrow', 'Arrow IPC'),
+    ], string='Export Format', required=True, default='csv', readonly=True)
+    filters_json = fields.Text(string='Filters', readonly=True, default='{}')
+    state = fields.Selection([
+        ('queued', 'Queued'),
+        ('running', 'Running'),
+        ('done', 'Completed'),
+        ('error', 'Error'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='queued', required=True, readonly=True, tracking=True, index=True)
+    date_start = fields.Datetime(string='Started', readonly=True)
+    date_end = fields.Datetime(string='Finished', readonly=True)
+    rows_total = fields.Integer(string='Rows to Export', readonly=True)
+    rows_done = fields.Integer(string='Rows Exported', readonly=True)
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+    attachment_id = fields.Many2one('ir.attachment', string='Exported File', readonly=True, copy=False)
+    file_name = fields.Char(related='attachment_id.name', string='File Name')
+    error_message = fields.Text(string='Error', readonly=True)
+
+    @api.depends('rows_total', 'rows_done')
+    def _compute_progress(self):
+        for job in self:
+            job.progress = 100.0 * job.rows_done / job.rows_total if job.rows_total else 0.0
+
+    @api.model
+    def queue_export(self, name, entity_type, export_format, filters=None):
+        """
+        Queues an export and wakes up the export scheduled action.
+        :param filters: dict of export filters (dates as date or 'YYYY-MM-DD')
+        :return: dfr.export.job record
+        """
+        job = self.create({
+            'name': name,
+            'entity_type': entity_type,
+            'export_format': export_format,
+            'filters_json': json.dumps(filters or {}, default=str),
+        })
+        self.env.ref('dfr_analytics.cron_dfr_process_export_jobs')._trigger()
+        return job
+
+    def action_cancel(self):
+        for job in self:
+            if job.state in ('queued', 'running'):
+                job.write({'state': 'cancelled', 'date_end': fields.Datetime.now()})
+                job.message_post(body=_("Export cancelled by user."))
+            else:
+                job.message_post(body=_("Export cannot be cancelled as it is already in state: %s.") % job.state)
+        return True
+
+    def action_download(self):
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError(_("The export file is not available."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
+
+    def _run(self):
+        """
+        Processes the export: counts the rows, streams them to an attachment as the requesting
+        user and commits the progress after each chunk. A cancellation committed by another
+        transaction stops the export at the next chunk.
+        """
+        self.ensure_one()
+        self.write({'state': 'running', 'date_start': fields.Datetime.now(), 'rows_done': 0, 'error_message': False})
+        self.env.cr.commit()
+        AnalyticsService = self.env['dfr.analytics.service'].with_user(self.user_id)
+        filters = json.loads(self.filters_json or '{}')
+
+        def on_progress(rows_done):
+            self.write({'rows_done': rows_done})
+            self.env.cr.commit()
+            self.invalidate_recordset(['state'])
+            if self.state == 'cancelled':
+                raise ExportJobCancelled()
+
+        try:
+            self.write({'rows_total': AnalyticsService.count_export_rows(self.entity_type, filters=filters)})
+            self.env.cr.commit()
+            attachment = AnalyticsService.export_to_attachment(
+                self.entity_type, self.export_format, filters=filters, file_name=self.name,
+                res_model=self._name, res_id=self.id, progress_callback=on_progress)
+            self.write({'state': 'done', 'date_end': fields.Datetime.now(), 'attachment_id': attachment.id})
+            self.message_post(
+                body=_("Your export %s is ready: %s rows.") % (attachment.name, self.rows_done),
+                partner_ids=self.user_id.partner_id.ids,
+                attachment_ids=attachment.ids,
+            )
+            _logger.info("Export job %s completed: %s rows.", self.id, self.rows_done)
+        except ExportJobCancelled:
+            self.env.cr.rollback()
+            _logger.info("Export job %s cancelled after %s rows.", self.id, self.rows_done)
+        except Exception as e:
+            _logger.error("Export job %s failed: %s", self.id, e, exc_info=True)
+            self.env.cr.rollback()
+            self.write({'state': 'error', 'error_message': str(e), 'date_end': fields.Datetime.now()})
+            self.message_post(body=_("Your export %s failed: %s") % (self.name, e),
+                              partner_ids=self.user_id.partner_id.ids)
+        finally:
+            self.env.cr.commit()
+
+    @api.model
+    def _cron_process_jobs(self):
+        """
+        Scheduled action: processes the queued exports, oldest first. Jobs left running by an
+        interrupted worker (this action never runs twice at the same time) start over.
+        """
+        for job in self.search([('state', '=', 'running')]):
+            _logger.info("Restarting interrupted export job %s.", job.id)
+            job._run()
+        while True:
+            job = self.search([('state', '=', 'queued')], order='id asc', limit=1)
+            if not job:
+                break
+            job._run()
+        return True
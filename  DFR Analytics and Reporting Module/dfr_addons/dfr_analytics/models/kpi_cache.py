@@ -0,0 +1,226 @@
+# dfr_addons/dfr_analytics/models/kpi_cache.py
+import copy
+import functools
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from odoo import models, fields, api
+
+_logger = logging.getLogger(__name__)
+
+# Context key disabling the KPI cache, for reports that must reflect the latest data
+BYPASS_CONTEXT_KEY = 'dfr_analytics_bypass_cache'
+
+# Models whose record rules are part of the cache key (the user's record-rule scope)
+SCOPE_MODELS = ('dfr.farmer', 'dfr.farm', 'dfr.plot', 'dfr.form.submission')
+
+_PRECOMMIT_KEY = 'dfr_analytics.kpi_cache.changed_models'
+
+# Process-wide LRU of KPI results: key -> (expiry time, generations, result)
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_stats = defaultdict(lambda: {'hits': 0, 'misses': 0, 'evictions': 0})
+
+
+def _normalize(value):
+    """ JSON-serializable form of KPI arguments, independent of key and list order. """
+    if isinstance(value, dict):
+        # Unset filters are equivalent to missing ones
+        return {str(key): _normalize(item) for key, item in value.items()
+                if item is not None and item is not False and item != '' and item != []}
+    if isinstance(value, (list, tuple, set)):
+        items = [_normalize(item) for item in value]
+        return sorted(items, key=repr)
+    if isinstance(value, models.BaseModel):
+        return sorted(value.ids)
+    return value
+
+
+def kpi_cached(*dependencies):
+    """
+    Decorator caching the result of a dfr.analytics.service KPI method (see dfr.analytics.kpi.cache).
+    :param dependencies: names of the models whose changes invalidate the results
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            return self.env['dfr.analytics.kpi.cache']._get_or_compute(
+                method.__name__, dependencies, lambda: method(self, *args, **kwargs), args, kwargs)
+        return wrapper
+    return decorator
+
+
+class AnalyticsCacheGeneration(models.Model):
+    """
+    Generation counter per model, incremented by the transactions changing its records.
+    Being transactional, a counter only moves once the changes are visible to readers.
+    """
+    _name = 'dfr.analytics.cache.generation'
+    _description = 'DFR Analytics KPI Cache Generation'
+    _log_access = False
+
+    model_name = fields.Char(string='Model', required=True, readonly=True)
+    generation = fields.Integer(string='Generation', readonly=True, default=0)
+
+    _sql_constraints = [
+        ('model_name_uniq', 'UNIQUE(model_name)', 'A model has a single generation counter.'),
+    ]
+
+
+class AnalyticsKpiCache(models.AbstractModel):
+    """
+    Cache of the dashboard KPIs of dfr.analytics.service, shared by the requests of a worker.
+
+    Results are keyed on the method, its normalized arguments (filters), the companies,
+    the language and the record-rule scope of the user, and they are valid for a TTL
+    and as long as the generation counters of the models they depend on are unchanged.
+    The least recently used results are evicted beyond max_entries.
+    """
+    _name = 'dfr.analytics.kpi.cache'
+    _description = 'DFR Analytics KPI Cache'
+
+    @api.model
+    def _get_cache_config(self):
+        IrConfigParameter = self.env['ir.config_parameter'].sudo()
+        return {
+            # Lifetime of a cached result in seconds (0 disables the cache)
+            'ttl': int(IrConfigParameter.get_param('dfr.analytics.kpi_cache.ttl', '300')),
+            # Maximum number of cached results per worker
+            'max_entries': int(IrConfigParameter.get_param('dfr.analytics.kpi_cache.max_entries', '512')),
+        }
+
+    @api.model
+    def _get_scope_key(self):
+        """ Part of the cache key identifying what the current user may see. """
+        IrRule = self.env['ir.rule']
+        if self.env.su:
+            rules = None
+        else:
+            rules = tuple(repr(IrRule._compute_domain(model_name, 'read')) for model_name in SCOPE_MODELS)
+        return (self.env.su, tuple(self.env.companies.ids), self.env.lang, rules)
+
+    @api.model
+    def _get_generations(self, model_names):
+        self.env.cr.execute("""
+            SELECT model_name, generation FROM dfr_analytics_cache_generation WHERE model_name = ANY(%s)
+        """, (list(model_names),))
+        generations = dict(self.env.cr.fetchall())
+        return tuple(generations.get(model_name, 0) for model_name in model_names)
+
+    @api.model
+    def _get_or_compute(self, method_name, dependencies, compute, args, kwargs):
+        config = self._get_cache_config()
+        if self.env.context.get(BYPASS_CONTEXT_KEY) or config['ttl'] <= 0:
+            return compute()
+        # Access rights are not part of the key: check them before serving a cached result
+        for model_name in SCOPE_MODELS:
+            if model_name in dependencies:
+                self.env[model_name].check_access_rights('read')
+
+        key = (self.env.cr.dbname, method_name,
+               json.dumps([[_normalize(arg) for arg in args], _normalize(kwargs)], sort_keys=True, default=str),
+               self._get_scope_key())
+        generations = self._get_generations(dependencies)
+        now = time.monotonic()
+        with _cache_lock:
+            entry = _cache.get(key)
+            if entry and entry[0] > now and entry[1] == generations:
+                _cache.move_to_end(key)
+                _stats[method_name]['hits'] += 1
+                return copy.deepcopy(entry[2])
+            _stats[method_name]['misses'] += 1
+
+        result = compute()
+        with _cache_lock:
+            _cache[key] = (now + config['ttl'], generations, copy.deepcopy(result))
+            _cache.move_to_end(key)
+            while len(_cache) > config['max_entries']:
+                (_dbname, evicted_method, _args, _scope), _entry = _cache.popitem(last=False)
+                _stats[evicted_method]['evictions'] += 1
+        return result
+
+    @api.model
+    def invalidate_models(self, model_names):
+        """
+        Invalidates the cached results depending on the given models, when the current
+        transaction commits (the generation counters are incremented once per transaction).
+        """
+        precommit = self.env.cr.precommit
+        changed = precommit.data.get(_PRECOMMIT_KEY)
+        if changed is None:
+            changed = precommit.data[_PRECOMMIT_KEY] = set()
+
+            def increment_generations():
+                self.env.cr.execute("""
+                    INSERT INTO dfr_analytics_cache_generation (model_name, generation)
+                    SELECT model_name, 1 FROM unnest(%s) AS model_name
+                    ON CONFLICT (model_name) DO UPDATE SET generation = dfr_analytics_cache_generation.generation + 1
+                """, (sorted(precommit.data.pop(_PRECOMMIT_KEY)),))
+            precommit.add(increment_generations)
+        changed.update(model_names)
+
+    @api.model
+    def get_stats(self):
+        """
+        Hit/miss metrics of the cache in this worker since it started.
+        :return: dict with the totals, the hit rate, the number of entries and 'methods' (per method)
+        """
+        with _cache_lock:
+            methods = {method_name: dict(counters) for method_name, counters in _stats.items()}
+            entries = len(_cache)
+        hits = sum(counters['hits'] for counters in methods.values())
+        misses = sum(counters['misses'] for counters in methods.values())
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if hits + misses else 0.0,
+            'evictions': sum(counters['evictions'] for counters in methods.values()),
+            'entries': entries,
+            'methods': methods,
+        }
+
+    @api.model
+    def clear(self):
+        """ Empties the cache of this worker (other workers keep theirs until their entries expire). """
+        with _cache_lock:
+            _cache.clear()
+        return True
+
+
+class KpiCacheInvalidationMixin(models.AbstractModel):
+    """ Invalidates the cached KPIs depending on a model when its records are created, written or deleted. """
+    _name = 'dfr.analytics.kpi.cache.invalidation.mixin'
+    _description = 'DFR Analytics KPI Cache Invalidation Mixin'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        self.env['dfr.analytics.kpi.cache'].invalidate_models([self._name])
+        return records
+
+    def write(self, vals):
+        result = super().write(vals)
+        self.env['dfr.analytics.kpi.cache'].invalidate_models([self._name])
+        return result
+
+    def unlink(self):
+        self.env['dfr.analytics.kpi.cache'].invalidate_models([self._name])
+        return super().unlink()
+
+
+class DfrFarmer(models.Model):
+    _name = 'dfr.farmer'
+    _inherit = ['dfr.farmer', 'dfr.analytics.kpi.cache.invalidation.mixin']
+
+
+class DfrPlot(models.Model):
+    _name = 'dfr.plot'
+    _inherit = ['dfr.plot', 'dfr.analytics.kpi.cache.invalidation.mixin']
+
+
+class DfrFormSubmission(models.Model):
+    _name = 'dfr.form.submission'
+    _inherit = ['dfr.form.submission', 'dfr.analytics.kpi.cache.invalidation.mixin']
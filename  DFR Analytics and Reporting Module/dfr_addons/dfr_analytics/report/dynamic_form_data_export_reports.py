@@ -4,6 +4,8 @@ from odoo import models, fields, api, _
 from odoo.exceptions import UserError
 import datetime # For context_timestamp and report date
 
+from ..models.kpi_cache import BYPASS_CONTEXT_KEY
+
 class DynamicFormSummaryPdfReport(models.AbstractModel):
     _name = 'report.dfr_analytics.report_dynamic_form_summary_pdf' # Matches report_name in XML action
     _description = 'Dynamic Form Submission Summary PDF Report'
@@ -44,7 +46,7 @@ class DynamicFormSummaryPdfReport(models.AbstractModel):
                 }
         elif data and data.get('form_id'): # Fallback if form_id is directly in data (less likely with wizard model)
             form_id_for_report = data.get('form_id')
-            form_record = self.env['dfr.dynamic.form'].browse(form_id_for_report) if form_id_for_report else None
+            form_record = self.env['dfr.form'].browse(form_id_for_report) if form_id_for_report else None
             filters = data.get('filters', {})
         else:
              # This report is expected to be called from the wizard with a form selected.
@@ -54,8 +56,8 @@ class DynamicFormSummaryPdfReport(models.AbstractModel):
         if not form_id_for_report:
             raise UserError(_("No Dynamic Form specified for the summary report. Please select a form in the wizard."))
 
-        # Fetch data using the analytics service
-        analytics_service = self.env['dfr.analytics.service']
+        # Fetch data using the analytics service, bypassing the KPI cache: printed figures must be exact
+        analytics_service = self.env['dfr.analytics.service'].with_context(**{BYPASS_CONTEXT_KEY: True})
         submission_kpis = analytics_service.get_dynamic_form_submission_kpis(
             form_id=form_id_for_report,
             filters=filters
@@ -3,6 +3,8 @@
 from odoo import models, fields, api, _
 import datetime # For context_timestamp and report date
 
+from ..models.kpi_cache import BYPASS_CONTEXT_KEY
+
 class FarmerStatisticsPdfReport(models.AbstractModel):
     _name = 'report.dfr_analytics.report_farmer_statistics_pdf' # Matches report_name in XML action
     _description = 'Farmer Statistics PDF Report'
@@ -40,8 +42,8 @@ class FarmerStatisticsPdfReport(models.AbstractModel):
         elif data and data.get('filters'): # Fallback if filters are directly in data
             filters = data.get('filters', {})
         
-        # Fetch data using the analytics service
-        analytics_service = self.env['dfr.analytics.service']
+        # Fetch data using the analytics service, bypassing the KPI cache: printed figures must be exact
+        analytics_service = self.env['dfr.analytics.service'].with_context(**{BYPASS_CONTEXT_KEY: True})
         farmer_kpis = analytics_service.get_farmer_registration_kpis(filters=filters)
         landholding_kpis = analytics_service.get_landholding_summary_kpis(filters=filters)
 
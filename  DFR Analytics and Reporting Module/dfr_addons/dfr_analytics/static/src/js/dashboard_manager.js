@@ -56,7 +56,7 @@ export class DashboardManager extends Component {
         try {
             // Fetch list of dynamic forms for the filter dropdown
             const dynamicForms = await jsonrpc('/web/dataset/search_read', {
-                model: 'dfr.dynamic.form',
+                model: 'dfr.form',
                 fields: ['id', 'name'],
                 domain: [], // Add security/filter if needed
             });
@@ -84,42 +84,17 @@ export class DashboardManager extends Component {
         this.state.error = null;
 
         try {
-            const farmerKpis = await jsonrpc('/web/dataset/call_kw/dfr.analytics.service/get_farmer_registration_kpis', {
+            // All sections in one round-trip: the filtered farmer set is resolved once server-side
+            const bundle = await jsonrpc('/web/dataset/call_kw/dfr.analytics.service/get_dashboard_bundle', {
                 model: 'dfr.analytics.service',
-                method: 'get_farmer_registration_kpis',
-                args: [this.state.filters],
+                method: 'get_dashboard_bundle',
+                args: [this.state.filters, ['farmer_registration', 'landholding', 'form_submissions']],
                 kwargs: {},
             });
-            const landKpis = await jsonrpc('/web/dataset/call_kw/dfr.analytics.service/get_landholding_summary_kpis', {
-                model: 'dfr.analytics.service',
-                method: 'get_landholding_summary_kpis',
-                args: [this.state.filters],
-                kwargs: {},
-            });
-
-            let formKpis = {
-                total_submissions: 0,
-                submissions_per_form: {},
-                response_distribution: {},
-                form_name: 'N/A',
-            };
-            if (this.state.filters.dynamic_form_id) {
-                 formKpis = await jsonrpc('/web/dataset/call_kw/dfr.analytics.service/get_dynamic_form_submission_kpis', {
-                    model: 'dfr.analytics.service',
-                    method: 'get_dynamic_form_submission_kpis',
-                    args: [this.state.filters.dynamic_form_id, this.state.filters],
-                    kwargs: {},
-                });
-            } else {
-                 // Fetch overview for all forms if no specific form is selected
-                 formKpis = await jsonrpc('/web/dataset/call_kw/dfr.analytics.service/get_dynamic_form_submission_kpis', {
-                    model: 'dfr.analytics.service',
-                    method: 'get_dynamic_form_submission_kpis',
-                    args: [null, this.state.filters], // Pass null for form_id
-                    kwargs: {},
-                });
-            }
-
+            const farmerKpis = bundle.farmer_registration;
+            const landKpis = bundle.landholding;
+            // Submission counts per form, or the answer distributions of the selected form
+            const formKpis = bundle.form_submissions;
 
             this.state.kpiData = { ...farmerKpis, ...landKpis, ...formKpis };
 
@@ -19,6 +19,9 @@ export class MapViewComponent extends Component {
     mapInstance = null;
     geoJsonLayer = null;
     _prevGeoDataString = null; // To compare if geoData actually changed
+    _fitBoundsDone = false; // Only the first data load recenters the map
+    _moveTimeout = null;
+    _requestSequence = 0; // Responses of outdated viewports are ignored
 
     async onWillStart() {
         await this.fetchGeoData();
@@ -47,6 +50,7 @@ export class MapViewComponent extends Component {
 
 
     onWillUnmount() {
+        clearTimeout(this._moveTimeout);
         if (this.mapInstance) {
             this.mapInstance.remove();
             this.mapInstance = null;
@@ -54,17 +58,29 @@ export class MapViewComponent extends Component {
     }
 
     async fetchGeoData() {
-        this.state.loading = true;
+        // Before the map exists, the whole world is requested at the default zoom (clusters)
+        const bbox = this.mapInstance ? this.mapInstance.getBounds().toBBoxString() : null;
+        const zoom = this.mapInstance ? this.mapInstance.getZoom() : 2;
+        const requestSequence = ++this._requestSequence;
+        if (!this.mapInstance) {
+            this.state.loading = true;
+        }
         this.state.error = null;
         try {
-            const data = await jsonrpc('/web/dataset/call_kw/dfr.analytics.service/get_farmer_plot_geo_data', {
+            const data = await jsonrpc('/web/dataset/call_kw/dfr.analytics.service/get_map_data', {
                 model: 'dfr.analytics.service',
-                method: 'get_farmer_plot_geo_data',
+                method: 'get_map_data',
                 args: [this.state.filters],
-                kwargs: {},
+                kwargs: { bbox: bbox, zoom: zoom },
             });
-            this.state.geoData = data;
-            this._prevGeoDataString = JSON.stringify(data); // Store initial stringified data
+            if (requestSequence !== this._requestSequence) {
+                return; // The map moved again in the meantime
+            }
+            this.state.geoData = data.features;
+            if (this.mapInstance) {
+                this._updateGeoJsonLayer(data.features);
+            }
+            this._prevGeoDataString = JSON.stringify(data.features);
         } catch (e) {
             console.error("Error fetching geo data:", e);
             this.state.error = e.message || "Failed to load geographical data.";
@@ -73,6 +89,12 @@ export class MapViewComponent extends Component {
         }
     }
 
+    _onMapMoveEnd() {
+        // Debounced: panning or zooming fires several events
+        clearTimeout(this._moveTimeout);
+        this._moveTimeout = setTimeout(() => this.fetchGeoData(), 250);
+    }
+
     initializeMap() {
         if (this.mapRef.el && !this.mapInstance) {
             this.mapInstance = L.map(this.mapRef.el).setView([0, 0], 2); // Default view
@@ -81,6 +103,8 @@ export class MapViewComponent extends Component {
                 attribution: '&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors'
             }).addTo(this.mapInstance);
 
+            this.mapInstance.on('moveend', this._onMapMoveEnd.bind(this));
+
             if (this.state.geoData && this.state.geoData.length > 0) {
                 this._addGeoJsonLayer(this.state.geoData);
             } else if (!this.state.loading && this.state.geoData && this.state.geoData.length === 0) {
@@ -99,6 +123,10 @@ export class MapViewComponent extends Component {
             style: this._styleFeature.bind(this),
         }).addTo(this.mapInstance);
 
+        if (this._fitBoundsDone) {
+            return; // Later loads follow the viewport chosen by the user
+        }
+        this._fitBoundsDone = true;
         if (geoJsonData.length > 0 && this.geoJsonLayer.getBounds().isValid()) {
             this.mapInstance.fitBounds(this.geoJsonLayer.getBounds(), { padding: [20, 20] });
         } else {
@@ -115,15 +143,18 @@ export class MapViewComponent extends Component {
         }
         if (newGeoJsonData && newGeoJsonData.length > 0) {
             this._addGeoJsonLayer(newGeoJsonData);
-        } else {
-            // No data, ensure map is clear or shows default
-            this.mapInstance.setView([0,0], 2);
         }
     }
 
     _onEachFeature(feature, layer) {
         if (feature.properties) {
             let popupContent = "";
+            if (feature.properties.type === 'cluster') {
+                // Zoom in on the cluster instead of opening a popup
+                layer.on('click', () => this.mapInstance.setView(layer.getLatLng(), this.mapInstance.getZoom() + 2));
+                layer.bindTooltip(`${feature.properties.count} ${feature.properties.layer === 'plot' ? 'plots' : 'farmers'}`);
+                return;
+            }
             if (feature.properties.type === 'farmer_homestead') {
                 popupContent += `<strong>Farmer Homestead</strong><br/>`;
                 popupContent += `<b>Name:</b> ${feature.properties.name || 'N/A'}<br/>`;
@@ -141,6 +172,17 @@ export class MapViewComponent extends Component {
     }
 
     _pointToLayer(feature, latlng) {
+        if (feature.properties && feature.properties.type === 'cluster') {
+            const count = feature.properties.count;
+            return L.circleMarker(latlng, {
+                radius: Math.min(8 + 9 * Math.log10(count + 1), 40), // Grows with the number of points
+                fillColor: feature.properties.layer === 'plot' ? 'green' : 'blue',
+                color: "#fff",
+                weight: 2,
+                opacity: 1,
+                fillOpacity: 0.6
+            });
+        }
         let color = 'gray'; // Default color
         if (feature.properties) {
             if (feature.properties.type === 'farmer_homestead') color = 'blue';
@@ -0,0 +1,2 @@
+# dfr_addons/dfr_analytics/utils/__init__.py
+from . import map_geometry
\ No newline at end of file
@@ -0,0 +1,96 @@
+# dfr_addons/dfr_analytics/utils/map_geometry.py
+"""
+Pure-Python helpers of the map data API (dfr.analytics.service.get_map_data):
+web map scales, grid cells and polygon simplification.
+"""
+import math
+
+TILE_SIZE = 256 # Pixels per web map tile side
+
+
+def degrees_per_pixel(zoom):
+    """ Longitude degrees covered by one screen pixel at a web map zoom level. """
+    return 360.0 / (TILE_SIZE * 2 ** zoom)
+
+
+def _wrap_longitude(longitude):
+    return longitude if -180 <= longitude <= 180 else (longitude + 180) % 360 - 180
+
+
+def normalize_bbox(bbox):
+    """
+    Parses and clamps a bounding box.
+    :param bbox: [west, south, east, north] in degrees, or the 'west,south,east,north' string
+                 of Leaflet's LatLngBounds.toBBoxString()
+    :return: tuple (west, south, east, north), or None for an invalid bbox.
+             west > east when the bbox crosses the antimeridian.
+    """
+    if not bbox:
+        return None
+    if isinstance(bbox, str):
+        bbox = bbox.split(',')
+    try:
+        west, south, east, north = (float(value) for value in bbox)
+    except (TypeError, ValueError):
+        return None
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    else:
+        # Leaflet longitudes go beyond +/-180 when the map is panned around the world
+        west, east = _wrap_longitude(west), _wrap_longitude(east)
+    return west, max(south, -90.0), east, min(north, 90.0)
+
+
+def _point_segment_distance(point, start, end):
+    (x, y), (x1, y1), (x2, y2) = point, start, end
+    dx, dy = x2 - x1, y2 - y1
+    if not dx and not dy:
+        return math.hypot(x - x1, y - y1)
+    t = max(0.0, min(1.0, ((x - x1) * dx + (y - y1) * dy) / (dx * dx + dy * dy)))
+    return math.hypot(x - (x1 + t * dx), y - (y1 + t * dy))
+
+
+def simplify_line(points, tolerance):
+    """
+    Douglas-Peucker simplification: drops the points closer than `tolerance` (same unit as
+    the coordinates) to the simplified line. The first and last points are always kept.
+    """
+    if len(points) < 3 or tolerance <= 0:
+        return list(points)
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    stack = [(0, len(points) - 1)]
+    while stack: # Iterative: rings can have thousands of vertices
+        first, last = stack.pop()
+        max_distance, index = 0.0, None
+        for i in range(first + 1, last):
+            distance = _point_segment_distance(points[i], points[first], points[last])
+            if distance > max_distance:
+                max_distance, index = distance, i
+        if index is not None and max_distance > tolerance:
+            keep[index] = True
+            stack.append((first, index))
+            stack.append((index, last))
+    return [point for point, kept in zip(points, keep) if kept]
+
+
+def _simplify_ring(ring, tolerance):
+    simplified = simplify_line(ring, tolerance)
+    # A closed ring needs at least 4 positions: keep the original when it collapses
+    return simplified if len(simplified) >= 4 else list(ring)
+
+
+def simplify_geometry(geometry, tolerance):
+    """
+    Simplified copy of a GeoJSON Polygon or MultiPolygon geometry (other geometries are
+    returned unchanged).
+    """
+    if not tolerance or not isinstance(geometry, dict):
+        return geometry
+    if geometry.get('type') == 'Polygon':
+        coordinates = [_simplify_ring(ring, tolerance) for ring in geometry['coordinates']]
+    elif geometry.get('type') == 'MultiPolygon':
+        coordinates = [[_simplify_ring(ring, tolerance) for ring in polygon] for polygon in geometry['coordinates']]
+    else:
+        return geometry
+    return dict(geometry, coordinates=coordinates)
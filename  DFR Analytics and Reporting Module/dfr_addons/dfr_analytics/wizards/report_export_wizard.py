@@ -1,11 +1,6 @@
 # dfr_addons/dfr_analytics/wizards/report_export_wizard.py
 
-import io
-import csv
-import base64
-import openpyxl # For XLSX export
 import logging # For logging
-import json # For handling JSON in dynamic form multiselect
 from datetime import datetime
 
 from odoo import models, fields, api, _
@@ -26,7 +21,7 @@ class ReportExportWizard(models.TransientModel):
        help="Select the type of data you want to export.")
 
     dynamic_form_id = fields.Many2one(
-        'dfr.dynamic.form',
+        'dfr.form',
         string="Dynamic Form",
         help="Select the dynamic form to export data from. Required if 'Report Type' is 'Dynamic Form Data'.",
         # attrs as per SDS 5.7.5
@@ -50,20 +45,18 @@ class ReportExportWizard(models.TransientModel):
 
     export_format = fields.Selection([
         ('csv', 'CSV'),
-        ('xlsx', 'Excel XLSX')
+        ('xlsx', 'Excel XLSX'),
+        ('parquet', 'Parquet'),
+        ('arrow', 'Arrow IPC'),
     ], string="Export Format", required=True, default='csv', help="Choose the format for the exported file.")
 
-    data_file = fields.Binary(string="Exported File", readonly=True, help="The generated export file for download.")
+    attachment_id = fields.Many2one('ir.attachment', string="Exported File", readonly=True,
+                                    help="The generated export file for download.")
     file_name = fields.Char(string="File Name", readonly=True, help="The name of the generated export file.")
 
-    def action_export_report(self):
-        """
-        Generates and provides the report file for download based on wizard parameters.
-        This method calls the 'dfr.analytics.service' to prepare data, then formats
-        it into CSV or XLSX.
-        """
+    def _get_export_parameters(self):
+        """ :return: (entity type of dfr.analytics.service, filters, file name without extension) """
         self.ensure_one()
-
         filters = {
             'date_from': self.date_from,
             'date_to': self.date_to,
@@ -79,78 +72,42 @@ class ReportExportWizard(models.TransientModel):
             # The analytics service expects a specific format for dynamic forms
             entity_type_for_service = f'dynamic_form_{self.dynamic_form_id.id}'
 
+        generated_file_name = f"{self.report_type}_{self.dynamic_form_id.name if self.report_type == 'dynamic_form_data' and self.dynamic_form_id else ''}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        return entity_type_for_service, filters, generated_file_name
+
+    def action_export_report(self):
+        """
+        Generates the report file based on wizard parameters. The 'dfr.analytics.service'
+        streams the rows to a CSV or XLSX file stored as an attachment of the wizard.
+        Large exports should be queued with action_queue_export instead.
+        """
+        self.ensure_one()
+        entity_type_for_service, filters, generated_file_name = self._get_export_parameters()
+
         # fields_to_export: SDS 5.2.2 mentions this parameter for prepare_export_data.
         # However, the wizard UI in SDS 5.7.5 doesn't include a field selector.
-        # For now, we assume the analytics_service handles default fields or this will be added later.
+        # For now, the analytics service exports its default fields.
         fields_to_export = None
 
         try:
             _logger.info(
-                "Preparing export data for entity_type: %s with filters: %s",
+                "Exporting entity_type: %s with filters: %s",
                 entity_type_for_service, filters
             )
-            report_data_result = self.env['dfr.analytics.service'].prepare_export_data(
+            attachment = self.env['dfr.analytics.service'].export_to_attachment(
                 entity_type_for_service,
+                self.export_format,
                 filters=filters,
-                fields_to_export=fields_to_export
+                fields_to_export=fields_to_export,
+                file_name=generated_file_name,
+                res_model=self._name,
+                res_id=self.id,
             )
-
-            if not report_data_result:
-                raise UserError(_("No data found matching the selected filters."))
-
-            # prepare_export_data for dynamic forms returns a dict {'header': [], 'data': []}
-            # For other types, it returns a list of dicts.
-            if isinstance(report_data_result, dict) and 'header' in report_data_result and 'data' in report_data_result:
-                header = report_data_result['header']
-                data_rows = report_data_result['data'] # This should be a list of dicts
-            elif isinstance(report_data_result, list):
-                if not report_data_result: # Empty list
-                    raise UserError(_("No data found matching the selected filters."))
-                # Assuming list of dicts, derive header from keys of the first item
-                header = list(report_data_result[0].keys())
-                data_rows = report_data_result
-            else:
-                _logger.error("Unexpected data format from prepare_export_data: %s", type(report_data_result))
-                raise UserError(_("An unexpected error occurred while preparing data for export."))
-
-
-            file_content = None
-            generated_file_name = f"{self.report_type}_{self.dynamic_form_id.name if self.report_type == 'dynamic_form_data' and self.dynamic_form_id else ''}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
-
-
-            if self.export_format == 'csv':
-                output = io.StringIO()
-                # Ensure data_rows is a list of dicts, where keys match header
-                writer = csv.DictWriter(output, fieldnames=header, extrasaction='ignore')
-                writer.writeheader()
-                writer.writerows(data_rows)
-                file_content = output.getvalue().encode('utf-8')
-                generated_file_name += ".csv"
-
-            elif self.export_format == 'xlsx':
-                workbook = openpyxl.Workbook()
-                worksheet = workbook.active
-                worksheet.title = "Report Data"
-
-                # Write header
-                worksheet.append(header)
-
-                # Write data rows
-                for row_dict in data_rows:
-                    # Ensure values are appended in the order of the header
-                    row_values = [row_dict.get(col_name, '') for col_name in header]
-                    worksheet.append(row_values)
-
-                output_xlsx = io.BytesIO()
-                workbook.save(output_xlsx)
-                file_content = output_xlsx.getvalue()
-                generated_file_name += ".xlsx"
-
             self.write({
-                'data_file': base64.b64encode(file_content),
-                'file_name': generated_file_name,
+                'attachment_id': attachment.id,
+                'file_name': attachment.name,
             })
-            _logger.info("Successfully generated export file: %s", generated_file_name)
+            _logger.info("Successfully generated export file: %s", attachment.name)
 
         except UserError as e:
             _logger.warning("UserError during report generation: %s", e.args[0])
@@ -167,4 +124,29 @@ class ReportExportWizard(models.TransientModel):
             'res_id': self.id,
             'views': [(False, 'form')],
             'target': 'new',
-        }
\ No newline at end of file
+        }
+
+    def action_queue_export(self):
+        """ Queues the export as a background job (dfr.export.job) and opens it. """
+        self.ensure_one()
+        entity_type_for_service, filters, generated_file_name = self._get_export_parameters()
+        job = self.env['dfr.export.job'].queue_export(generated_file_name, entity_type_for_service, self.export_format, filters)
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': job._name,
+            'view_mode': 'form',
+            'res_id': job.id,
+            'views': [(False, 'form')],
+            'target': 'current',
+        }
+
+    def action_download_export(self):
+        """ Downloads the export attachment, streamed from the filestore. """
+        self.ensure_one()
+        if not self.attachment_id:
+            raise UserError(_("Please generate the export first."))
+        return {
+            'type': 'ir.actions.act_url',
+            'url': '/web/content/%s?download=true' % self.attachment_id.id,
+            'target': 'self',
+        }
@@ -27,6 +27,7 @@
         'security/ir.model.access.csv',
         'security/dfr_dynamic_forms_security.xml',
         'data/ir_sequence_data.xml',
+        'data/dfr_form_wide_table_cron.xml',
         # 'data/dfr_form_field_types_data.xml', # As per SDS, likely minimal or merged
         'views/dfr_form_views.xml',
         'views/dfr_form_submission_views.xml',
@@ -38,6 +38,13 @@ class DfrForm(models.Model):
         store=True,
         help=_("The currently active and published version of this form.")
     )
+    wide_table_enabled = fields.Boolean(
+        string=_("Analytics Wide Tables"),
+        default=False,
+        tracking=True,
+        help=_("Maintain one table per published version with one row per submission and one typed column "
+               "per field, read by analytics and exports instead of the individual responses.")
+    )
     country_id = fields.Many2one(
         comodel_name='res.country',
         string=_("Country"),
@@ -74,4 +81,32 @@ class DfrForm(models.Model):
         action = self.env['ir.actions.act_window']._for_xml_id('dfr_dynamic_forms.action_dfr_form_version_tree')
         action['domain'] = [('form_master_id', '=', self.id)]
         action['context'] = {'default_form_master_id': self.id}
-        return action
\ No newline at end of file
+        return action
+
+    def _has_current_wide_tables(self):
+        """
+        Whether all the submissions of this form are up to date in the analytics wide tables
+        of their versions, which can then be read instead of the responses.
+        """
+        self.ensure_one()
+        if not self.wide_table_enabled:
+            return False
+        self.env['dfr.form.submission'].flush_model(['form_version_id', 'wide_table_pending'])
+        self.env['dfr.form.version'].flush_model(['form_master_id', 'wide_table_name'])
+        self.env.cr.execute("""
+            SELECT 1 FROM dfr_form_submission s
+            JOIN dfr_form_version v ON v.id = s.form_version_id
+            WHERE v.form_master_id = %s AND (v.wide_table_name IS NULL OR s.wide_table_pending)
+            LIMIT 1
+        """, (self.id,))
+        return not self.env.cr.fetchone()
+
+    def write(self, vals):
+        res = super().write(vals)
+        if 'wide_table_enabled' in vals:
+            versions = self.form_version_ids.filtered(lambda v: v.status in ('published', 'archived'))
+            if vals['wide_table_enabled']:
+                versions.filtered(lambda v: not v.wide_table_name)._create_wide_table()
+            else:
+                versions._drop_wide_table()
+        return res
@@ -189,6 +189,24 @@ class DfrFormResponse(models.Model):
                     #    "For GPS fields, both latitude and longitude must be provided, or neither."
                     # ))
     
+    @api.model_create_multi
+    def create(self, vals_list):
+        responses = super().create(vals_list)
+        responses.submission_id._mark_wide_table_pending()
+        return responses
+
+    def write(self, vals):
+        submissions = self.submission_id
+        res = super().write(vals)
+        (submissions | self.submission_id)._mark_wide_table_pending()
+        return res
+
+    def unlink(self):
+        submissions = self.submission_id
+        res = super().unlink()
+        submissions.exists()._mark_wide_table_pending()
+        return res
+
     @api.model
     def _get_selection_label(self, field_technical_name, option_value, form_version_id):
         """
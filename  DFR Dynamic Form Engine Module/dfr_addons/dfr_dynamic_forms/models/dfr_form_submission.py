@@ -2,11 +2,14 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import logging
+from psycopg2 import sql
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError
 
 _logger = logging.getLogger(__name__)
 
+WIDE_TABLE_TRIGGER_KEY = 'dfr_dynamic_forms.wide_table_refresh_triggered'
+
 
 class DfrFormSubmission(models.Model):
     _name = 'dfr.form.submission'
@@ -84,6 +87,21 @@ class DfrFormSubmission(models.Model):
         string=_("Internal Notes"),
         translate=True
     )
+    wide_table_pending = fields.Boolean(
+        string=_("Wide Table Refresh Pending"),
+        default=False,
+        readonly=True,
+        copy=False,
+        help=_("Set when the submission or its responses changed since its row of the analytics wide table "
+               "of its form version was last refreshed.")
+    )
+
+    def init(self):
+        # Few submissions are pending at a time: keep their lookup by the refresh cheap
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS dfr_form_submission_wide_table_pending_idx
+            ON dfr_form_submission (form_version_id) WHERE wide_table_pending
+        """)
 
     @api.depends('farmer_id.name', 'form_version_id.name', 'submission_date', 'form_version_id.form_master_id.name')
     def _compute_name(self):
@@ -125,11 +143,19 @@ class DfrFormSubmission(models.Model):
                 # For now, let's allow it but log a warning.
                 # raise UserError(_("Cannot create submission for a form version that is not published."))
         submission = super(DfrFormSubmission, self).create(vals)
+        submission._mark_wide_table_pending()
         _logger.info(f"Submission {submission.name} (ID: {submission.id}) created.")
         return submission
 
     def write(self, vals):
+        if 'form_version_id' in vals:
+            # Rows move to the wide table of the new version at the next refresh
+            for version in self.form_version_id.filtered('wide_table_name'):
+                self.env.cr.execute(sql.SQL("DELETE FROM {} WHERE submission_id = ANY(%s)").format(
+                    sql.Identifier(version.wide_table_name)), (self.ids,))
         res = super(DfrFormSubmission, self).write(vals)
+        if any(field_name in vals for field_name in ('farmer_id', 'form_version_id', 'submission_date', 'state')):
+            self._mark_wide_table_pending()
         if 'state' in vals:
             for record in self:
                  _logger.info(f"Submission {record.name} (ID: {record.id}) state changed to {record.state} by {self.env.user.name}.")
@@ -140,4 +166,26 @@ class DfrFormSubmission(models.Model):
             if record.state not in ['draft', 'rejected']: # Example policy
                 raise UserError(_("Cannot delete submissions that are not in draft or rejected state."))
             _logger.info(f"Submission {record.name} (ID: {record.id}) unlinked by {self.env.user.name}.")
-        return super(DfrFormSubmission, self).unlink()
\ No newline at end of file
+        return super(DfrFormSubmission, self).unlink()
+
+    def _mark_wide_table_pending(self):
+        """
+        Marks these submissions for the next refresh of the analytics wide table of their form
+        version (dfr.form.version._cron_refresh_wide_tables), if it has one.
+        """
+        if not self.ids:
+            return
+        self.flush_recordset(['form_version_id'])
+        self.env['dfr.form.version'].flush_model(['wide_table_name'])
+        self.env.cr.execute("""
+            UPDATE dfr_form_submission s SET wide_table_pending = TRUE
+            FROM dfr_form_version v
+            WHERE v.id = s.form_version_id AND v.wide_table_name IS NOT NULL
+            AND s.id = ANY(%s) AND NOT s.wide_table_pending
+        """, (self.ids,))
+        if self.env.cr.rowcount:
+            self.invalidate_recordset(['wide_table_pending'])
+            # Wake up the refresh once per transaction, not once per submission
+            if not self.env.cr.precommit.data.get(WIDE_TABLE_TRIGGER_KEY):
+                self.env.cr.precommit.data[WIDE_TABLE_TRIGGER_KEY] = True
+                self.env.ref('dfr_dynamic_forms.cron_dfr_refresh_form_wide_tables')._trigger()
@@ -2,11 +2,44 @@
 # Part of Odoo. See LICENSE file for full copyright and licensing details.
 
 import logging
+from psycopg2 import sql
 from odoo import api, fields, models, _
 from odoo.exceptions import UserError, ValidationError
 
 _logger = logging.getLogger(__name__)
 
+WIDE_TABLE_PREFIX = 'dfr_form_wide_'
+# Submission columns of the wide tables
+WIDE_TABLE_SUBMISSION_COLUMNS = [
+    ('farmer_id', 'integer', 's.farmer_id'),
+    ('submission_date', 'timestamp', 's.submission_date'),
+    ('state', 'varchar', 's.state'),
+]
+# Wide table columns per form field type: (column name suffix, SQL type, pivot expression over the
+# responses r of a submission, formatted with the field id). Answered selections without a value
+# are stored as '' (resp. an empty array), unanswered ones as NULL.
+_ANSWERED = "bool_or(r.field_id = %(field_id)s)"
+_VALUE = "max(r.%s) FILTER (WHERE r.field_id = %%(field_id)s)"
+WIDE_TABLE_FIELD_COLUMNS = {
+    'text': [('', 'text', _VALUE % 'value_text')],
+    'computed_text': [('', 'text', _VALUE % 'value_text')],
+    'number': [('', 'numeric', _VALUE % 'value_number')],
+    'date': [('', 'date', _VALUE % 'value_date')],
+    'datetime': [('', 'timestamp', _VALUE % 'value_datetime')],
+    'boolean': [('', 'boolean', "bool_or(r.value_boolean) FILTER (WHERE r.field_id = %(field_id)s)")],
+    'selection': [('', 'varchar', "CASE WHEN %s THEN COALESCE(%s, '') END" % (_ANSWERED, _VALUE % 'value_selection'))],
+    'multi_selection': [('', 'varchar[]', """CASE WHEN %s THEN COALESCE((
+        SELECT array_agg(o.name ORDER BY o.name)
+        FROM dfr_form_response mr
+        JOIN dfr_form_response_selection_option_rel rel ON rel.response_id = mr.id
+        JOIN dfr_form_selection_option_answer o ON o.id = rel.option_id
+        WHERE mr.submission_id = s.id AND mr.field_id = %%(field_id)s
+    ), '{}') END""" % _ANSWERED)],
+    'gps_point': [('_latitude', 'double precision', _VALUE % 'value_gps_latitude'),
+                  ('_longitude', 'double precision', _VALUE % 'value_gps_longitude')],
+    'image': [('_attachment_id', 'integer', _VALUE % 'value_attachment_id')],
+}
+
 
 class DfrFormVersion(models.Model):
     _name = 'dfr.form.version'
@@ -84,6 +117,13 @@ class DfrFormVersion(models.Model):
         string=_("Is Editable?"),
         help=_("Indicates if the form version (fields) can still be edited. Typically true only in 'draft' state.")
     )
+    wide_table_name = fields.Char(
+        string=_("Analytics Wide Table"),
+        readonly=True,
+        copy=False,
+        help=_("Database table holding one row per submission of this version and one typed column per field, "
+               "maintained when analytics wide tables are enabled on the form.")
+    )
 
     @api.model_create_multi
     def create(self, vals_list):
@@ -116,6 +156,8 @@ class DfrFormVersion(models.Model):
                 'publish_date': fields.Datetime.now()
             })
             version.form_master_id._compute_current_published_version() # Trigger recompute
+            if version.form_master_id.wide_table_enabled:
+                version._create_wide_table()
             version.message_post(body=_("Form version published."))
         return True
 
@@ -149,6 +191,7 @@ class DfrFormVersion(models.Model):
                 'publish_date': False,
                 'archive_date': False
             })
+            version._drop_wide_table() # Fields become editable again
 
             if was_current_published:
                  version.form_master_id._compute_current_published_version() # Trigger recompute
@@ -203,4 +246,149 @@ class DfrFormVersion(models.Model):
         for record in self:
             name = f"{record.form_master_id.name} ({record.version_number})"
             result.append((record.id, name))
-        return result
\ No newline at end of file
+        return result
+
+    def unlink(self):
+        self._drop_wide_table()
+        return super().unlink()
+
+    # --- Analytics wide tables ------------------------------------------------
+
+    def _get_wide_table_columns(self):
+        """
+        Typed columns of the wide table of this version, one per field (two for GPS points).
+        Columns are named after the field id: technical names may exceed the 63 bytes of a
+        PostgreSQL identifier, and would collide once truncated.
+        :return: list of (column name, SQL type, SQL pivot expression, dfr.form.field)
+        """
+        self.ensure_one()
+        columns = []
+        for form_field in self.field_ids.sorted(lambda field: (field.sequence, field.id)):
+            for suffix, sql_type, expression in WIDE_TABLE_FIELD_COLUMNS.get(form_field.field_type, []):
+                columns.append(('f_%s%s' % (int(form_field.id), suffix), sql_type,
+                                expression % {'field_id': int(form_field.id)}, form_field))
+        return columns
+
+    def _create_wide_table(self):
+        """
+        (Re)creates the wide tables of these versions, empty: all their submissions are marked
+        for the next refresh (_cron_refresh_wide_tables). Rows follow their submission on deletion.
+        """
+        for version in self:
+            table = WIDE_TABLE_PREFIX + str(version.id)
+            columns = [(name, sql_type) for name, sql_type, _expression in WIDE_TABLE_SUBMISSION_COLUMNS]
+            columns += [(name, sql_type) for name, sql_type, _expression, _field in version._get_wide_table_columns()]
+            self.env.cr.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(table)))
+            self.env.cr.execute(sql.SQL("""
+                CREATE TABLE {table} (
+                    submission_id integer PRIMARY KEY REFERENCES dfr_form_submission (id) ON DELETE CASCADE,
+                    {columns}
+                )
+            """).format(
+                table=sql.Identifier(table),
+                columns=sql.SQL(', ').join(sql.SQL('{} %s' % sql_type).format(sql.Identifier(name)) for name, sql_type in columns),
+            ))
+            self.env.cr.execute(sql.SQL("CREATE INDEX ON {} (farmer_id)").format(sql.Identifier(table)))
+            version.wide_table_name = table
+            self.env['dfr.form.submission'].flush_model(['form_version_id'])
+            self.env.cr.execute("""
+                UPDATE dfr_form_submission SET wide_table_pending = TRUE WHERE form_version_id = %s
+            """, (version.id,))
+            self.env['dfr.form.submission'].invalidate_model(['wide_table_pending'])
+            _logger.info("Created analytics wide table %s for form version %s.", table, version.id)
+        if self:
+            self.env.ref('dfr_dynamic_forms.cron_dfr_refresh_form_wide_tables')._trigger()
+
+    def _drop_wide_table(self):
+        for version in self.filtered('wide_table_name'):
+            self.env.cr.execute(sql.SQL("DROP TABLE IF EXISTS {}").format(sql.Identifier(version.wide_table_name)))
+            self.env.cr.execute("""
+                UPDATE dfr_form_submission SET wide_table_pending = FALSE WHERE form_version_id = %s AND wide_table_pending
+            """, (version.id,))
+            _logger.info("Dropped analytics wide table %s of form version %s.", version.wide_table_name, version.id)
+            version.wide_table_name = False
+        self.env['dfr.form.submission'].invalidate_model(['wide_table_pending'])
+
+    def _refresh_wide_table(self, submission_ids):
+        """ Pivots the responses of the given submissions of this version into its wide table (upsert). """
+        self.ensure_one()
+        self.env['dfr.form.submission'].flush_model()
+        self.env['dfr.form.response'].flush_model()
+        columns = [(name, expression) for name, _sql_type, expression in WIDE_TABLE_SUBMISSION_COLUMNS]
+        columns += [(name, expression) for name, _sql_type, expression, _field in self._get_wide_table_columns()]
+        self.env.cr.execute(sql.SQL("""
+            INSERT INTO {table} (submission_id, {names})
+            SELECT s.id, {expressions}
+            FROM dfr_form_submission s
+            LEFT JOIN dfr_form_response r ON r.submission_id = s.id
+            WHERE s.id = ANY(%s) AND s.form_version_id = %s
+            GROUP BY s.id
+            ON CONFLICT (submission_id) DO UPDATE SET {updates}
+        """).format(
+            table=sql.Identifier(self.wide_table_name),
+            names=sql.SQL(', ').join(sql.Identifier(name) for name, _expression in columns),
+            expressions=sql.SQL(', ').join(sql.SQL(expression) for _name, expression in columns),
+            updates=sql.SQL(', ').join(sql.SQL('{name} = EXCLUDED.{name}').format(name=sql.Identifier(name))
+                                       for name, _expression in columns),
+        ), (list(submission_ids), self.id))
+        self.env.cr.execute("""
+            UPDATE dfr_form_submission SET wide_table_pending = FALSE WHERE id = ANY(%s)
+        """, (list(submission_ids),))
+        self.env['dfr.form.submission'].invalidate_model(['wide_table_pending'])
+
+    def _read_wide_rows(self, submission_ids):
+        """
+        Answers of submissions of this version read from its wide table, as stored (GPS points
+        as (latitude, longitude), multi-selections as lists of option keys, numbers as floats).
+        Submissions pending a refresh are missing from the result. No access rights check.
+        :return: dict {submission id: {field technical name: value}}
+        """
+        self.ensure_one()
+        if not self.wide_table_name or not submission_ids:
+            return {}
+        columns = self._get_wide_table_columns()
+        self.env['dfr.form.submission'].flush_model(['wide_table_pending'])
+        self.env.cr.execute(sql.SQL("""
+            SELECT w.submission_id, {names} FROM {table} w
+            JOIN dfr_form_submission s ON s.id = w.submission_id AND NOT s.wide_table_pending
+            WHERE w.submission_id = ANY(%s)
+        """).format(
+            table=sql.Identifier(self.wide_table_name),
+            names=sql.SQL(', ').join(sql.SQL('w.{}').format(sql.Identifier(name)) for name, _sql_type, _expression, _field in columns)
+                  if columns else sql.SQL('NULL'),
+        ), (list(submission_ids),))
+        rows = {}
+        for row in self.env.cr.fetchall():
+            values = {}
+            for (_name, _sql_type, _expression, form_field), value in zip(columns, row[1:]):
+                if form_field.field_type == 'gps_point':
+                    values[form_field.name] = values.get(form_field.name, ()) + (value,)
+                elif form_field.field_type == 'number' and value is not None:
+                    values[form_field.name] = float(value)
+                else:
+                    values[form_field.name] = value
+            rows[row[0]] = values
+        return rows
+
+    @api.model
+    def _cron_refresh_wide_tables(self, batch_size=1000):
+        """
+        Scheduled action: refreshes the wide table rows of the submissions created or changed
+        since the last run (wide_table_pending), one committed batch at a time. Pending rows
+        are locked while refreshed, so that concurrent changes mark them pending again.
+        """
+        for version in self.search([('wide_table_name', '!=', False)]):
+            while True:
+                self.env.cr.execute("""
+                    SELECT id FROM dfr_form_submission
+                    WHERE form_version_id = %s AND wide_table_pending
+                    ORDER BY id LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                """, (version.id, batch_size))
+                submission_ids = [row[0] for row in self.env.cr.fetchall()]
+                if not submission_ids:
+                    break
+                version._refresh_wide_table(submission_ids)
+                self.env.cr.commit()
+                _logger.info("Refreshed %s rows of wide table %s.", len(submission_ids), version.wide_table_name)
+        return True
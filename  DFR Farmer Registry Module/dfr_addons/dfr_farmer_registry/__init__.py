@@ -2,6 +2,7 @@
 # Part of Odoo.
 # See LICENSE file for full copyright and licensing details.
 
+from . import utils
 from . import models
 from . import services
 from . import wizards
\ No newline at end of file
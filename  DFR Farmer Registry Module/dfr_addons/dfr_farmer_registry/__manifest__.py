@@ -36,12 +36,16 @@
 
         'data/dfr_sequences.xml', # If using sequences (optional if UUIDs are primary)
         'data/dfr_automated_actions.xml', # Automated workflows
+        'data/dfr_deduplication_cron.xml', # Scheduled de-duplication maintenance
+        'data/dfr_spatial_index_cron.xml', # Spatial index backfill
 
         'views/dfr_farmer_views.xml',
         'views/dfr_household_views.xml',
         'views/dfr_farm_views.xml',
         'views/dfr_plot_views.xml',
         'views/dfr_menu_views.xml',
+        'views/dfr_deduplication_sweep_views.xml', # After the menus: adds an item under Configuration
+        'views/dfr_deduplication_cluster_views.xml',
 
         'wizards/dfr_deduplication_review_wizard_views.xml',
         'wizards/dfr_farmer_kyc_wizard_views.xml',
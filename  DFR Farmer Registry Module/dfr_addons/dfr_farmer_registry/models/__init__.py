@@ -86,6 +86,9 @@ class DfrCropLivestockType(models.Model):
 
 # Main model imports
 from . import dfr_farmer
+from . import dfr_farmer_blocking_key
+from . import dfr_deduplication_sweep
+from . import dfr_deduplication_cluster
 from . import dfr_household
 from . import dfr_household_member
 from . import dfr_farm
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models, _
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class _UnionFind:
+    """ Minimal disjoint-set forest (path halving, union by size). """
+
+    def __init__(self):
+        self.parent = {}
+        self.size = {}
+
+    def find(self, node):
+        self.parent.setdefault(node, node)
+        self.size.setdefault(node, 1)
+        while self.parent[node] != node:
+            self.parent[node] = self.parent[self.parent[node]]
+            node = self.parent[node]
+        return node
+
+    def union(self, node_a, node_b):
+        root_a, root_b = self.find(node_a), self.find(node_b)
+        if root_a == root_b:
+            return
+        if self.size[root_a] < self.size[root_b]:
+            root_a, root_b = root_b, root_a
+        self.parent[root_b] = root_a
+        self.size[root_a] += self.size[root_b]
+
+    def groups(self):
+        groups = {}
+        for node in self.parent:
+            groups.setdefault(self.find(node), []).append(node)
+        return list(groups.values())
+
+
+class DfrDeduplicationCluster(models.Model):
+    """
+    Connected component of the potential duplicate links (dfr_farmer_duplicate_rel):
+    if A~B and B~C, A, B and C are reviewed together as one cluster.
+    Membership is maintained incrementally with union-find when links are added,
+    and rebuilt for the affected clusters when links are removed or farmers merged.
+    """
+    _name = 'dfr.deduplication.cluster'
+    _description = 'DFR Potential Duplicate Cluster'
+    _order = 'size desc, max_score desc, id'
+
+    name = fields.Char(string='Cluster', compute='_compute_name')
+    representative_farmer_id = fields.Many2one('dfr.farmer', string='Representative', readonly=True, index=True,
+                                               ondelete='set null', help="Earliest registered member of the cluster.")
+    member_ids = fields.One2many('dfr.farmer', 'deduplication_cluster_id', string='Members', readonly=True)
+    size = fields.Integer(string='Size', readonly=True, index=True)
+    max_score = fields.Integer(string='Max Score (%)', readonly=True,
+                               help="Highest match score among the links of the cluster (0 if unknown, e.g. links created before clustering).")
+    administrative_area_id = fields.Many2one('dfr.administrative.area', string='Administrative Area', readonly=True, index=True,
+                                             help="Administrative area of the representative.")
+    state = fields.Selection([
+        ('open', 'Unresolved'),
+        ('resolved', 'Resolved'),
+    ], string='Status', default='open', required=True, readonly=True, index=True)
+
+    def init(self):
+        # "Largest unresolved clusters in area X"
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS dfr_deduplication_cluster_open_area_size_idx
+            ON dfr_deduplication_cluster (administrative_area_id, size DESC)
+            WHERE state = 'open'
+        """)
+
+    @api.depends('representative_farmer_id', 'size')
+    def _compute_name(self):
+        for cluster in self:
+            cluster.name = _("%s (+%s)") % (cluster.representative_farmer_id.name or _('Cluster %s') % cluster.id, max(cluster.size - 1, 0))
+
+    @api.model
+    def get_largest_unresolved_clusters(self, administrative_area_id=None, limit=20):
+        """
+        :param administrative_area_id: optional dfr.administrative.area id (sub-areas included when hierarchical)
+        :return: dfr.deduplication.cluster recordset, largest first
+        """
+        domain = [('state', '=', 'open')]
+        if administrative_area_id:
+            Area = self.env['dfr.administrative.area']
+            operator = 'child_of' if Area._parent_name in Area._fields else '='
+            domain.append(('administrative_area_id', operator, administrative_area_id))
+        return self.search(domain, limit=limit)
+
+    def action_open_review(self):
+        """ Opens the review wizard on the whole cluster. """
+        self.ensure_one()
+        return self.representative_farmer_id.action_open_deduplication_review()
+
+    # --- Maintenance -------------------------------------------------------
+
+    @api.model
+    def _add_links(self, scores_by_pair):
+        """
+        Incrementally folds new duplicate links into the clusters (union-find seeded
+        with the current cluster of every involved farmer).
+        :param scores_by_pair: dict {(farmer_id, farmer_id): score}
+        """
+        if not scores_by_pair:
+            return
+        farmer_ids = list({farmer_id for pair in scores_by_pair for farmer_id in pair})
+        self.env.cr.execute("SELECT id, deduplication_cluster_id FROM dfr_farmer WHERE id = ANY(%s)", (farmer_ids,))
+        cluster_by_farmer = dict(self.env.cr.fetchall())
+
+        union_find = _UnionFind()
+        for farmer_id, cluster_id in cluster_by_farmer.items():
+            union_find.find(('farmer', farmer_id))
+            if cluster_id:
+                union_find.union(('farmer', farmer_id), ('cluster', cluster_id))
+        for farmer_a, farmer_b in scores_by_pair:
+            union_find.union(('farmer', farmer_a), ('farmer', farmer_b))
+
+        existing_clusters = self.browse({cluster_id for cluster_id in cluster_by_farmer.values() if cluster_id})
+        sizes = {cluster.id: cluster.size for cluster in existing_clusters}
+        pair_score_by_root = {}
+        for pair, score in scores_by_pair.items():
+            root = union_find.find(('farmer', pair[0]))
+            pair_score_by_root[root] = max(pair_score_by_root.get(root, 0), score or 0)
+
+        touched_ids = set()
+        for group in union_find.groups():
+            group_farmer_ids = [node_id for kind, node_id in group if kind == 'farmer']
+            group_cluster_ids = sorted((node_id for kind, node_id in group if kind == 'cluster'), key=lambda c: -sizes[c])
+            max_score = max([pair_score_by_root.get(union_find.find(group[0]), 0)] +
+                            [existing_clusters.browse(c).max_score for c in group_cluster_ids])
+            if group_cluster_ids:
+                target = self.browse(group_cluster_ids[0])
+                absorbed_ids = group_cluster_ids[1:]
+            else:
+                target = self.create({'state': 'open'})
+                absorbed_ids = []
+            self.env.cr.execute("""
+                UPDATE dfr_farmer SET deduplication_cluster_id = %s
+                WHERE id = ANY(%s) OR deduplication_cluster_id = ANY(%s)
+            """, (target.id, group_farmer_ids, absorbed_ids))
+            if absorbed_ids:
+                self.browse(absorbed_ids).unlink()
+            target.write({'max_score': max_score}) # state follows the size, set by _refresh_stats
+            touched_ids.add(target.id)
+        self._refresh_stats(list(touched_ids))
+
+    @api.model
+    def _refresh_stats(self, cluster_ids):
+        """ Recomputes size, representative and area of the given clusters from their active members. """
+        if not cluster_ids:
+            return
+        # Pending ORM writes would be flushed over the SQL results, or hide archived members from it
+        self.flush_model(['size', 'representative_farmer_id', 'administrative_area_id', 'state'])
+        self.env['dfr.farmer'].flush_model(['active', 'status', 'administrative_area_id'])
+        self.env['dfr.farmer'].invalidate_model(['deduplication_cluster_id'])
+        self.env.cr.execute("""
+            UPDATE dfr_deduplication_cluster c
+            SET size = s.size, representative_farmer_id = s.representative_id, administrative_area_id = f.administrative_area_id,
+                state = CASE WHEN s.size >= 2 THEN 'open' ELSE 'resolved' END
+            FROM (
+                SELECT c2.id AS cluster_id, count(m.id) AS size, min(m.id) AS representative_id
+                FROM dfr_deduplication_cluster c2
+                LEFT JOIN dfr_farmer m ON m.deduplication_cluster_id = c2.id AND m.active
+                    AND m.status NOT IN ('archived', 'deceased', 'merged_duplicate')
+                WHERE c2.id = ANY(%s)
+                GROUP BY c2.id
+            ) s
+            LEFT JOIN dfr_farmer f ON f.id = s.representative_id
+            WHERE c.id = s.cluster_id
+        """, (list(cluster_ids),))
+        self.invalidate_model(['size', 'representative_farmer_id', 'administrative_area_id', 'state'])
+
+    @api.model
+    def _rebuild_clusters(self, cluster_ids=None):
+        """
+        Rebuilds the membership of the given clusters (all clusters if None) from the current
+        links of their active members, splitting clusters whose links were removed.
+        Used after "not a duplicate" decisions and merges, and to backfill existing links.
+        Pair scores are not stored: a link gets the max score of the former clusters of its
+        farmers, so a rebuilt cluster keeps the score of the cluster(s) it comes from.
+        """
+        params = {'terminal': ('archived', 'deceased', 'merged_duplicate')}
+        if cluster_ids is None:
+            clusters = self.search([])
+            member_clause = ''
+        else:
+            clusters = self.browse(cluster_ids).exists()
+            if not clusters:
+                return
+            self.env.cr.execute("SELECT id FROM dfr_farmer WHERE deduplication_cluster_id = ANY(%s)", (clusters.ids,))
+            params['member_ids'] = [row[0] for row in self.env.cr.fetchall()]
+            member_clause = 'AND (r.farmer_id = ANY(%(member_ids)s) OR r.duplicate_id = ANY(%(member_ids)s))'
+        self.flush_model(['max_score'])
+        self.env['dfr.farmer'].flush_model(['active', 'status', 'deduplication_potential_duplicate_ids', 'deduplication_cluster_id'])
+        self.env.cr.execute("""
+            SELECT r.farmer_id, r.duplicate_id, GREATEST(COALESCE(ca.max_score, 0), COALESCE(cb.max_score, 0))
+            FROM dfr_farmer_duplicate_rel r
+            JOIN dfr_farmer a ON a.id = r.farmer_id
+            JOIN dfr_farmer b ON b.id = r.duplicate_id
+            LEFT JOIN dfr_deduplication_cluster ca ON ca.id = a.deduplication_cluster_id
+            LEFT JOIN dfr_deduplication_cluster cb ON cb.id = b.deduplication_cluster_id
+            WHERE r.farmer_id < r.duplicate_id
+              AND a.active AND b.active
+              AND a.status NOT IN %%(terminal)s AND b.status NOT IN %%(terminal)s
+              %s
+        """ % member_clause, params)
+        links = {(farmer_a, farmer_b): score for farmer_a, farmer_b, score in self.env.cr.fetchall()}
+
+        self.env.cr.execute("UPDATE dfr_farmer SET deduplication_cluster_id = NULL WHERE deduplication_cluster_id = ANY(%s)", (clusters.ids,))
+        clusters.unlink()
+        self._add_links(links)
+        _logger.info("Rebuilt %s duplicate clusters from %s links.", len(clusters), len(links))
+
+    @api.model
+    def _cron_rebuild_clusters(self):
+        """ Scheduled action: rebuilds all clusters from the duplicate links (backfill and consistency check). """
+        self._rebuild_clusters()
@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models, _
+from odoo.exceptions import UserError
+import logging
+
+_logger = logging.getLogger(__name__)
+
+class DfrDeduplicationSweep(models.Model):
+    """
+    One run of the batch de-duplication sweep over the registry.
+    The sweep walks the blocks in key order and stores the last processed key,
+    so an interrupted run resumes where it stopped on the next cron call.
+    """
+    _name = 'dfr.deduplication.sweep'
+    _description = 'DFR De-duplication Batch Sweep'
+    _inherit = ['mail.thread']
+    _order = 'id desc'
+
+    name = fields.Char(string='Sweep', required=True, readonly=True, copy=False,
+                       default=lambda self: _('Sweep %s') % fields.Datetime.now())
+    mode = fields.Selection([
+        ('full', 'Full Registry'),
+        ('incremental', 'Incremental'),
+    ], string='Mode', required=True, default='incremental', readonly=True,
+        help="Incremental sweeps only re-score blocks containing farmers changed since the watermark.")
+    state = fields.Selection([
+        ('draft', 'Draft'),
+        ('in_progress', 'In Progress'),
+        ('done', 'Completed'),
+        ('error', 'Error'),
+        ('cancelled', 'Cancelled'),
+    ], string='Status', default='draft', required=True, readonly=True, tracking=True, index=True)
+    since = fields.Datetime(string='Changed Since', readonly=True,
+                            help="Watermark of an incremental sweep: start of the previous completed sweep.")
+    date_start = fields.Datetime(string='Started', readonly=True)
+    date_end = fields.Datetime(string='Finished', readonly=True)
+    last_block_key = fields.Char(string='Checkpoint (Last Block Key)', readonly=True, copy=False,
+                                 help="Blocks are processed in key order; processing resumes after this key.")
+    blocks_total = fields.Integer(string='Blocks to Process', readonly=True)
+    blocks_done = fields.Integer(string='Blocks Processed', readonly=True)
+    pairs_scored = fields.Integer(string='Pairs Scored', readonly=True)
+    duplicates_found = fields.Integer(string='New Duplicate Links', readonly=True)
+    progress = fields.Float(string='Progress (%)', compute='_compute_progress')
+    error_message = fields.Text(string='Error', readonly=True)
+
+    @api.depends('blocks_total', 'blocks_done')
+    def _compute_progress(self):
+        for sweep in self:
+            sweep.progress = 100.0 * sweep.blocks_done / sweep.blocks_total if sweep.blocks_total else 0.0
+
+    def action_start(self):
+        """ Runs the sweep in the current transaction (chunks are committed as they complete). """
+        for sweep in self:
+            if sweep.state not in ('draft', 'in_progress'):
+                raise UserError(_("Sweep '%s' cannot be started in state %s.") % (sweep.name, sweep.state))
+            self.env['dfr.deduplication.service'].run_batch_sweep(sweep)
+        return True
+
+    def action_cancel(self):
+        for sweep in self:
+            if sweep.state in ('draft', 'in_progress'):
+                sweep.write({'state': 'cancelled', 'date_end': fields.Datetime.now()})
+                sweep.message_post(body=_("Sweep cancelled by user."))
+            else:
+                sweep.message_post(body=_("Sweep cannot be cancelled as it is already in state: %s.") % sweep.state)
+        return True
+
+    @api.model
+    def _cron_run_sweep(self, force_full=False):
+        """
+        Scheduled action (nightly): resumes an interrupted sweep if any, otherwise starts
+        an incremental sweep from the start of the last completed one (full on first run).
+        """
+        sweep = self.search([('state', '=', 'in_progress')], order='id asc', limit=1)
+        if not sweep:
+            last_done = self.search([('state', '=', 'done')], order='date_start desc', limit=1)
+            if force_full or not last_done:
+                sweep = self.create({'mode': 'full'})
+            else:
+                sweep = self.create({'mode': 'incremental', 'since': last_done.date_start})
+        else:
+            _logger.info("Resuming de-duplication sweep %s after block key %r.", sweep.id, sweep.last_block_key)
+        self.env['dfr.deduplication.service'].run_batch_sweep(sweep)
+        return sweep.id
@@ -4,9 +4,14 @@
 
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError
+from odoo.tools import sql
+import psycopg2
 import uuid
 import logging
 
+from ..utils.matching import normalize_name, sorted_name_tokens, canonical_national_id, phone_to_e164
+from ..utils import geohash
+
 _logger = logging.getLogger(__name__)
 
 class DfrFarmer(models.Model):
@@ -72,17 +77,194 @@ class DfrFarmer(models.Model):
     deduplication_potential_duplicate_ids = fields.Many2many(
         'dfr.farmer', 'dfr_farmer_duplicate_rel', 'farmer_id', 'duplicate_id',
         string='Potential Duplicates', help="Other farmers identified as potential duplicates.")
+    deduplication_not_duplicate_ids = fields.Many2many(
+        'dfr.farmer', 'dfr_farmer_not_duplicate_rel', 'farmer_id', 'not_duplicate_id',
+        string='Confirmed Not Duplicates', copy=False,
+        help="Farmers a reviewer marked as NOT duplicates of this farmer. The batch sweep never re-links them.")
+    deduplication_cluster_id = fields.Many2one(
+        'dfr.deduplication.cluster', string='Duplicate Cluster', readonly=True, copy=False, index=True, ondelete='set null',
+        help="Group of farmers connected through potential duplicate links, reviewed together.")
     deduplication_master_farmer_id = fields.Many2one(
         'dfr.farmer', string='Merged Into Master', readonly=True, copy=False,
         help="If this record was merged, points to the master record.")
     active = fields.Boolean(default=True, help="Set to false to archive the record instead of deleting.") # For logical delete
 
+    # Normalized matching columns, queried by de-duplication and farmer lookups instead of normalizing rows one by one
+    name_normalized = fields.Char(string='Normalized Name', compute='_compute_normalized_matching_columns', store=True, index=True,
+                                  help="Case-folded, diacritics and punctuation stripped (letters of all scripts kept).")
+    name_tokens_sorted = fields.Char(string='Sorted Name Tokens', compute='_compute_normalized_matching_columns', store=True, index=True,
+                                     help="Normalized name tokens in alphabetical order (name order independent).")
+    national_id_canonical = fields.Char(string='Canonical National ID', compute='_compute_normalized_matching_columns', store=True, index=True,
+                                        help="National ID number in upper-case with separators stripped.")
+    phone_e164 = fields.Char(string='Phone (E.164)', compute='_compute_normalized_matching_columns', store=True, index=True)
+    name_similar = fields.Char(string='Similar Name', compute='_compute_name_similar', search='_search_name_similar',
+                               help="Search only: farmers whose name is similar to the searched one (typos, accents, name order).")
+    # Spatial index (dfr.spatial.query.service): prefix searches use the varchar_pattern_ops index created in init()
+    homestead_geohash = fields.Char(string='Homestead Geohash', compute='_compute_homestead_geohash', store=True,
+                                    help="Geohash of the homestead position ('' without position).")
+    blocking_keys_indexed = fields.Boolean(string='Blocking Keys Indexed', readonly=True, copy=False,
+                                           help="Set once the de-duplication blocking keys of the farmer were generated, "
+                                                "even if its name yields none.")
+
 
     _sql_constraints = [
         ('uid_uniq', 'unique(uid, company_id)', 'Farmer UID must be unique!'), # Assuming company_id from dfr_common_core or Odoo base
         ('national_id_number_type_uniq', 'unique(national_id_number, national_id_type_id, company_id)', 'National ID Number must be unique per ID type!')
     ]
 
+    _NORMALIZED_MATCHING_COLUMNS = ('name_normalized', 'name_tokens_sorted', 'national_id_canonical', 'phone_e164')
+
+    def _auto_init(self):
+        # Create the normalized and spatial columns before the ORM does, so that adding them to an existing
+        # registry does not compute every farmer in the upgrade transaction: _cron_backfill_normalized_columns
+        # and _cron_backfill_spatial_index fill them in batches instead.
+        if sql.table_exists(self.env.cr, self._table):
+            for column in self._NORMALIZED_MATCHING_COLUMNS + ('homestead_geohash',):
+                if not sql.column_exists(self.env.cr, self._table, column):
+                    sql.create_column(self.env.cr, self._table, column, 'varchar')
+            if not sql.column_exists(self.env.cr, self._table, 'blocking_keys_indexed'):
+                # Farmers that already have keys need no backfill (see _cron_backfill_blocking_keys)
+                sql.create_column(self.env.cr, self._table, 'blocking_keys_indexed', 'boolean')
+                if sql.table_exists(self.env.cr, 'dfr_farmer_blocking_key'):
+                    self.env.cr.execute("""
+                        UPDATE dfr_farmer f SET blocking_keys_indexed = true
+                        WHERE EXISTS (SELECT 1 FROM dfr_farmer_blocking_key k WHERE k.farmer_id = f.id)
+                    """)
+        return super(DfrFarmer, self)._auto_init()
+
+    def init(self):
+        # Optional trigram index for similar-name search (dfr.farmer.registry.service.search_similar_farmers).
+        # Creating the extension needs sufficient privileges; without it, similar-name search falls back to Python scoring.
+        try:
+            with self.env.cr.savepoint(flush=False):
+                self.env.cr.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+                self.env.cr.execute("""
+                    CREATE INDEX IF NOT EXISTS dfr_farmer_name_normalized_trgm_idx
+                    ON dfr_farmer USING gin (name_normalized gin_trgm_ops)
+                """)
+        except psycopg2.Error as e:
+            _logger.warning("pg_trgm unavailable, farmer similar-name search will not use a trigram index: %s", e)
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS dfr_farmer_homestead_geohash_idx
+            ON dfr_farmer (homestead_geohash varchar_pattern_ops)
+        """)
+        # Farmers waiting for their blocking keys are few once the backfill caught up: keep their lookup cheap
+        self.env.cr.execute("""
+            CREATE INDEX IF NOT EXISTS dfr_farmer_blocking_keys_pending_idx
+            ON dfr_farmer (id) WHERE blocking_keys_indexed IS NOT TRUE
+        """)
+        self.clear_caches()
+
+    def _compute_name_similar(self):
+        for farmer in self:
+            farmer.name_similar = False
+
+    def _search_name_similar(self, operator, value):
+        if operator not in ('=', 'ilike', 'like') or not isinstance(value, str):
+            return [('name', operator, value)]
+        similar = self.env['dfr.farmer.registry.service'].search_similar_farmers(value)
+        return [('id', 'in', [farmer_id for farmer_id, _score in similar])]
+
+    @api.model
+    def _get_phone_default_country_code(self):
+        """ Country calling code used to convert national-format phone numbers to E.164. """
+        return self.env['ir.config_parameter'].sudo().get_param('dfr.phone.default_country_code') or \
+            self.env.company.country_id.phone_code or False
+
+    @api.model
+    def _get_normalized_matching_values(self, name, national_id_number, contact_phone, country_code):
+        return {
+            'name_normalized': normalize_name(name) or False,
+            'name_tokens_sorted': sorted_name_tokens(name) or False,
+            'national_id_canonical': canonical_national_id(national_id_number),
+            'phone_e164': phone_to_e164(contact_phone, country_code),
+        }
+
+    @api.depends('name', 'national_id_number', 'contact_phone')
+    def _compute_normalized_matching_columns(self):
+        country_code = self._get_phone_default_country_code()
+        for farmer in self:
+            farmer.update(self._get_normalized_matching_values(
+                farmer.name, farmer.national_id_number, farmer.contact_phone, country_code))
+
+    @api.model
+    def _cron_backfill_normalized_columns(self, batch_size=5000):
+        """
+        Scheduled action (migration job): fills the normalized matching columns of farmers
+        created before they existed, one batch per statement.
+        :return: number of farmers updated
+        """
+        self.env.cr.execute("""
+            SELECT id, name, national_id_number, contact_phone FROM dfr_farmer
+            WHERE (name_normalized IS NULL AND name IS NOT NULL)
+               OR (national_id_canonical IS NULL AND national_id_number IS NOT NULL AND national_id_number <> '')
+               OR (phone_e164 IS NULL AND contact_phone IS NOT NULL AND contact_phone <> '')
+            ORDER BY id
+            LIMIT %s
+        """, (batch_size,))
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return 0
+        country_code = self._get_phone_default_country_code()
+        columns = {column: [] for column in self._NORMALIZED_MATCHING_COLUMNS}
+        for _id, name, national_id_number, contact_phone in rows:
+            for column, value in self._get_normalized_matching_values(name, national_id_number, contact_phone, country_code).items():
+                columns[column].append(value or None)
+        # Values that cannot be normalized are stored as '' so the row is not selected again
+        self.env.cr.execute("""
+            UPDATE dfr_farmer f
+            SET name_normalized = COALESCE(v.name_normalized, ''),
+                name_tokens_sorted = COALESCE(v.name_tokens_sorted, ''),
+                national_id_canonical = COALESCE(v.national_id_canonical, ''),
+                phone_e164 = COALESCE(v.phone_e164, '')
+            FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::varchar[], %s::varchar[])
+                AS v(id, name_normalized, name_tokens_sorted, national_id_canonical, phone_e164)
+            WHERE f.id = v.id
+        """, ([row[0] for row in rows], columns['name_normalized'], columns['name_tokens_sorted'],
+              columns['national_id_canonical'], columns['phone_e164']))
+        self.invalidate_model(list(self._NORMALIZED_MATCHING_COLUMNS))
+        _logger.info("Backfilled normalized matching columns for %s farmers.", len(rows))
+        return len(rows)
+
+    @api.model
+    def _get_position_geohash(self, latitude, longitude):
+        """ Stored geohash of a position: '' without position (unset coordinates read as 0.0). """
+        if not latitude and not longitude:
+            return ''
+        return geohash.encode(latitude, longitude) or ''
+
+    @api.depends('gps_latitude_homestead', 'gps_longitude_homestead')
+    def _compute_homestead_geohash(self):
+        for farmer in self:
+            farmer.homestead_geohash = self._get_position_geohash(farmer.gps_latitude_homestead, farmer.gps_longitude_homestead)
+
+    @api.model
+    def _cron_backfill_spatial_index(self, batch_size=5000):
+        """
+        Scheduled action (migration job): fills the homestead geohash of farmers created
+        before the spatial index existed, one batch per statement.
+        :return: number of farmers updated
+        """
+        self.env.cr.execute("""
+            SELECT id, gps_latitude_homestead, gps_longitude_homestead FROM dfr_farmer
+            WHERE homestead_geohash IS NULL
+            ORDER BY id
+            LIMIT %s
+        """, (batch_size,))
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return 0
+        # Farmers without position get '' so that they are not selected again
+        geohashes = [self._get_position_geohash(latitude, longitude) for _id, latitude, longitude in rows]
+        self.env.cr.execute("""
+            UPDATE dfr_farmer f SET homestead_geohash = v.geohash
+            FROM unnest(%s::int[], %s::varchar[]) AS v(id, geohash)
+            WHERE f.id = v.id
+        """, ([row[0] for row in rows], geohashes))
+        self.invalidate_model(['homestead_geohash'])
+        _logger.info("Backfilled homestead geohash for %s farmers.", len(rows))
+        return len(rows)
+
     @api.model
     def _compute_default_uid(self):
         return str(uuid.uuid4().hex)
@@ -94,20 +276,20 @@ class DfrFarmer(models.Model):
                 vals['uid'] = self._compute_default_uid()
             # Default status from field definition is 'pending_verification'
         records = super(DfrFarmer, self).create(vals_list)
+        self.env['dfr.farmer.blocking.key']._rebuild_for_farmers(records)
         for record in records:
             _logger.info("DFR Farmer created: UID %s, Name %s", record.uid, record.name)
-            # Trigger real-time duplicate check if enabled and on create
-            if self.env['ir.config_parameter'].sudo().get_param('dfr.deduplication.realtime.enabled', 'True').lower() == 'true':
-                 record._onchange_check_potential_duplicates() # Call programmatically
+        # Trigger real-time duplicate check if enabled, once for the whole batch (imports, sync pushes)
+        records._check_potential_duplicates_batch()
         return records
 
     def write(self, vals):
         # Log significant status changes or other auditable events if not covered by mail.thread tracking
         res = super(DfrFarmer, self).write(vals)
+        if any(f in vals for f in ['name', 'date_of_birth']): # Fields feeding the de-duplication blocking keys
+            self.env['dfr.farmer.blocking.key']._rebuild_for_farmers(self)
         if any(f in vals for f in ['name', 'national_id_number', 'date_of_birth']): # Key fields for deduplication
-            if self.env['ir.config_parameter'].sudo().get_param('dfr.deduplication.realtime.enabled', 'True').lower() == 'true':
-                for record in self:
-                    record._onchange_check_potential_duplicates() # Call programmatically
+            self._check_potential_duplicates_batch()
         _logger.info("DFR Farmer %s written with values: %s", self.mapped('uid'), vals.keys())
         return res
 
@@ -173,6 +355,38 @@ class DfrFarmer(models.Model):
                 record.write({'status': 'deceased', 'active': False}) # Deceased implies inactive/archived
                 _logger.info("Farmer %s (UID: %s) status set to Deceased.", record.name, record.uid)
 
+    def _check_potential_duplicates_batch(self):
+        """
+        Set-based real-time duplicate check of the farmers in self (see
+        dfr.deduplication.service.find_potential_duplicates_batch): matches found,
+        including duplicates within self, are linked as potential duplicates.
+        """
+        if not self or self.env.context.get('deduplication_merge_in_progress', False):
+            return
+        if self.env['ir.config_parameter'].sudo().get_param('dfr.deduplication.realtime.enabled', 'True').lower() != 'true':
+            return
+        DeduplicationService = self.env['dfr.deduplication.service']
+        records = self.filtered(lambda r: r.status not in ('archived', 'deceased', 'merged_duplicate'))
+        if not records:
+            return
+        try:
+            with self.env.cr.savepoint(): # A failing check must not abort the create/write transaction
+                rules = DeduplicationService._get_matching_rules(DeduplicationService.get_deduplication_config())
+                records_data = records.read(DeduplicationService._get_rule_field_names(rules), load=None)
+                results = DeduplicationService.find_potential_duplicates_batch(records_data)
+                pairs = {}
+                for data, record_matches in zip(records_data, results):
+                    for match in record_matches:
+                        if match['id']:
+                            pair = tuple(sorted((data['id'], match['id'])))
+                            pairs[pair] = max(match['score'], pairs.get(pair, 0))
+                if pairs:
+                    new_links = DeduplicationService._link_duplicate_pairs(pairs)
+                    _logger.info("Real-time duplicate check of %s farmers: %s new potential duplicate links.", len(records), new_links)
+        except Exception as e:
+            _logger.error("Error during batch duplicate check for farmers %s: %s", records.ids, e)
+            # Do not block create/write, just log
+
     @api.onchange('name', 'date_of_birth', 'national_id_number', 'national_id_type_id', 'administrative_area_id')
     def _onchange_check_potential_duplicates(self):
         if not (self.name or self.national_id_number): # Only check if some key data is present
@@ -228,13 +442,15 @@ class DfrFarmer(models.Model):
         self.ensure_one()
         # This action opens the wizard for the current farmer
         # The wizard's default_get will handle loading this farmer
+        # Review the whole duplicate cluster (transitive links) when there is one
+        related_farmers = (self.deduplication_cluster_id.member_ids - self) or self.deduplication_potential_duplicate_ids
         return {
             'name': _('Review Potential Duplicates'),
             'type': 'ir.actions.act_window',
             'res_model': 'dfr.deduplication.review.wizard',
             'view_mode': 'form',
             'target': 'new',
-            'context': {'default_selected_farmer_id': self.id, 'default_farmer_ids_to_review': [self.id] + self.deduplication_potential_duplicate_ids.ids},
+            'context': {'default_selected_farmer_id': self.id, 'default_farmer_ids_to_review': [self.id] + related_farmers.ids},
         }
 
     def action_record_consent(self, consent_version_agreed, consent_purpose_ids, consent_date=None, consent_text_agreed_to_id=None):
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models, _
+import logging
+
+from ..utils.matching import compute_blocking_keys, KEY_PHONETIC, KEY_SORTED_TOKENS, KEY_PREFIX_BIRTH_YEAR
+
+_logger = logging.getLogger(__name__)
+
+class DfrFarmerBlockingKey(models.Model):
+    """
+    Side table of normalized name keys used to select fuzzy de-duplication candidates.
+    Only farmers sharing at least one key with the record being checked are scored.
+    """
+    _name = 'dfr.farmer.blocking.key'
+    _description = 'DFR Farmer De-duplication Blocking Key'
+    _log_access = False # Pure index table, rewritten on every farmer name/DOB change
+
+    farmer_id = fields.Many2one('dfr.farmer', string='Farmer', required=True, ondelete='cascade', index=True)
+    key_type = fields.Selection([
+        (KEY_PHONETIC, 'Phonetic (Soundex)'),
+        (KEY_SORTED_TOKENS, 'Sorted Name Tokens'),
+        (KEY_PREFIX_BIRTH_YEAR, 'Name Prefix + Birth Year'),
+    ], string='Key Type', required=True)
+    key = fields.Char(string='Blocking Key', required=True, index=True)
+
+    _sql_constraints = [
+        ('farmer_key_uniq', 'unique(farmer_id, key)', 'A blocking key can only be stored once per farmer.'),
+    ]
+
+    @api.model
+    def _prepare_keys_vals(self, farmer_id, name, date_of_birth):
+        return [{
+            'farmer_id': farmer_id,
+            'key_type': key.split(':', 1)[0],
+            'key': key,
+        } for key in compute_blocking_keys(name, date_of_birth)]
+
+    @api.model
+    def _rebuild_for_farmers(self, farmers):
+        """
+        Replaces the blocking keys of the given farmers in two set-based statements.
+        :param farmers: dfr.farmer recordset
+        """
+        if not farmers:
+            return
+        self.sudo().search([('farmer_id', 'in', farmers.ids)]).unlink()
+        vals_list = []
+        for farmer in farmers:
+            vals_list.extend(self._prepare_keys_vals(farmer.id, farmer.name, farmer.date_of_birth))
+        if vals_list:
+            self.sudo().create(vals_list)
+        # Marked even when the names yield no key, so the backfill does not select them again
+        self.env.cr.execute("""
+            UPDATE dfr_farmer SET blocking_keys_indexed = true
+            WHERE id = ANY(%s) AND blocking_keys_indexed IS NOT TRUE
+        """, (farmers.ids,))
+        farmers.invalidate_recordset(['blocking_keys_indexed'])
+
+    @api.model
+    def _get_blocks(self, keys, max_block_size=0):
+        """
+        Returns the members of the blocks identified by the given keys.
+        Blocks larger than max_block_size (if > 0) are skipped as non-discriminating.
+        :param keys: iterable of blocking keys
+        :param max_block_size: int
+        :return: dict {key: set of dfr.farmer ids}
+        """
+        keys = list(keys)
+        if not keys:
+            return {}
+        if max_block_size > 0:
+            block_sizes = self.sudo().read_group([('key', 'in', keys)], ['key'], ['key'])
+            oversized = {group['key'] for group in block_sizes if group['key_count'] > max_block_size}
+            if oversized:
+                _logger.info("Skipping %s oversized de-duplication blocks (> %s farmers): %s", len(oversized), max_block_size, sorted(oversized))
+                keys = [key for key in keys if key not in oversized]
+            if not keys:
+                return {}
+        self.env.cr.execute("SELECT key, farmer_id FROM dfr_farmer_blocking_key WHERE key = ANY(%s)", (keys,))
+        blocks = {}
+        for key, farmer_id in self.env.cr.fetchall():
+            blocks.setdefault(key, set()).add(farmer_id)
+        return blocks
+
+    @api.model
+    def _get_candidate_farmer_ids(self, keys, max_block_size=0):
+        """
+        Returns the ids of farmers sharing at least one of the given keys (see _get_blocks).
+        :return: set of dfr.farmer ids
+        """
+        candidate_ids = set()
+        for farmer_ids in self._get_blocks(keys, max_block_size=max_block_size).values():
+            candidate_ids |= farmer_ids
+        return candidate_ids
+
+    @api.model
+    def _count_farmers_to_backfill(self):
+        """ Number of farmers whose blocking keys were never generated (see _cron_backfill_blocking_keys). """
+        self.env.cr.execute("SELECT count(*) FROM dfr_farmer WHERE blocking_keys_indexed IS NOT TRUE")
+        return self.env.cr.fetchone()[0]
+
+    @api.model
+    def _cron_backfill_blocking_keys(self, batch_size=5000):
+        """
+        Scheduled action: generates keys for farmers that were never indexed
+        (records created before the index existed or imported with SQL).
+        Farmers whose name yields no key are marked as indexed too, so every call progresses.
+        :return: number of farmers indexed
+        """
+        self.env.cr.execute("""
+            SELECT id FROM dfr_farmer
+            WHERE blocking_keys_indexed IS NOT TRUE
+            ORDER BY id
+            LIMIT %s
+        """, (batch_size,))
+        farmer_ids = [row[0] for row in self.env.cr.fetchall()]
+        if farmer_ids:
+            farmers = self.env['dfr.farmer'].with_context(active_test=False).browse(farmer_ids)
+            self._rebuild_for_farmers(farmers)
+            _logger.info("Backfilled de-duplication blocking keys for %s farmers.", len(farmer_ids))
+        return len(farmer_ids)
@@ -3,8 +3,12 @@
 # See LICENSE file for full copyright and licensing details.
 
 from odoo import api, fields, models, _
+from odoo.tools import sql
+import json
 import logging
 
+from ..utils import geohash
+
 _logger = logging.getLogger(__name__)
 
 class DfrPlot(models.Model):
@@ -35,11 +39,120 @@ class DfrPlot(models.Model):
     ownership_details = fields.Text(string='Land Ownership Details', tracking=True)
     active = fields.Boolean(default=True, help="Set to false to archive the record instead of deleting.")
 
+    # Spatial index (dfr.spatial.query.service): prefix searches use the varchar_pattern_ops indexes created in init()
+    geohash = fields.Char(string='Geohash', compute='_compute_spatial_index', store=True,
+                          help="Geohash of the centroid (of the polygon bbox center without centroid); '' without position.")
+    bbox_geohash = fields.Char(string='Bounding Box Geohash', compute='_compute_spatial_index', store=True,
+                               help="Smallest geohash cell containing the whole plot.")
+    bbox_west = fields.Float(string='Bounding Box West', compute='_compute_spatial_index', store=True, digits=(10, 7))
+    bbox_south = fields.Float(string='Bounding Box South', compute='_compute_spatial_index', store=True, digits=(10, 7))
+    bbox_east = fields.Float(string='Bounding Box East', compute='_compute_spatial_index', store=True, digits=(10, 7))
+    bbox_north = fields.Float(string='Bounding Box North', compute='_compute_spatial_index', store=True, digits=(10, 7))
+
     # SQL Constraints if any, e.g., unique plot name within a farm
     _sql_constraints = [
         ('name_farm_uniq', 'unique(name, farm_id, company_id)', 'Plot name must be unique per farm!'),
     ]
 
+    _SPATIAL_INDEX_COLUMNS = {
+        'geohash': 'varchar',
+        'bbox_geohash': 'varchar',
+        'bbox_west': 'numeric',
+        'bbox_south': 'numeric',
+        'bbox_east': 'numeric',
+        'bbox_north': 'numeric',
+    }
+
+    def _auto_init(self):
+        # Create the spatial index columns before the ORM does, so that adding them to an existing
+        # registry does not compute every plot in the upgrade transaction:
+        # _cron_backfill_spatial_index fills them in batches instead.
+        if sql.table_exists(self.env.cr, self._table):
+            for column, column_type in self._SPATIAL_INDEX_COLUMNS.items():
+                if not sql.column_exists(self.env.cr, self._table, column):
+                    sql.create_column(self.env.cr, self._table, column, column_type)
+        return super(DfrPlot, self)._auto_init()
+
+    def init(self):
+        for column in ('geohash', 'bbox_geohash'):
+            self.env.cr.execute("""
+                CREATE INDEX IF NOT EXISTS dfr_plot_%s_idx ON dfr_plot (%s varchar_pattern_ops)
+            """ % (column, column))
+
+    @api.model
+    def _get_spatial_index_values(self, latitude, longitude, polygon):
+        """
+        Spatial index values of a plot from its centroid and GeoJSON polygon.
+        A plot without polygon is indexed as a point. Unset coordinates read as 0.0.
+        """
+        bbox = None
+        if polygon:
+            try:
+                bbox = geohash.geometry_bbox(json.loads(polygon))
+            except ValueError:
+                bbox = None
+            if bbox is None:
+                try: # Bare coordinates list, e.g. '[[[lon1, lat1], [lon2, lat2], ...]]'
+                    bbox = geohash.geometry_bbox({'coordinates': json.loads(polygon)})
+                except ValueError:
+                    bbox = None
+        has_centroid = bool(latitude or longitude)
+        if bbox is None and has_centroid:
+            bbox = (longitude, latitude, longitude, latitude)
+        if bbox is None:
+            return {'geohash': '', 'bbox_geohash': '', 'bbox_west': False, 'bbox_south': False,
+                    'bbox_east': False, 'bbox_north': False}
+        west, south, east, north = bbox
+        if not has_centroid:
+            latitude, longitude = (south + north) / 2, (west + east) / 2
+        return {
+            'geohash': geohash.encode(latitude, longitude) or '',
+            'bbox_geohash': geohash.bbox_cell(west, south, east, north),
+            'bbox_west': west,
+            'bbox_south': south,
+            'bbox_east': east,
+            'bbox_north': north,
+        }
+
+    @api.depends('gps_latitude', 'gps_longitude', 'gps_polygon')
+    def _compute_spatial_index(self):
+        for plot in self:
+            plot.update(self._get_spatial_index_values(plot.gps_latitude, plot.gps_longitude, plot.gps_polygon))
+
+    @api.model
+    def _cron_backfill_spatial_index(self, batch_size=5000):
+        """
+        Scheduled action (migration job): fills the spatial index columns of plots created
+        before they existed, one batch per statement.
+        :return: number of plots updated
+        """
+        self.env.cr.execute("""
+            SELECT id, gps_latitude, gps_longitude, gps_polygon FROM dfr_plot
+            WHERE geohash IS NULL
+            ORDER BY id
+            LIMIT %s
+        """, (batch_size,))
+        rows = self.env.cr.fetchall()
+        if not rows:
+            return 0
+        columns = {column: [] for column in self._SPATIAL_INDEX_COLUMNS}
+        for _id, latitude, longitude, polygon in rows:
+            for column, value in self._get_spatial_index_values(latitude, longitude, polygon).items():
+                columns[column].append(None if value is False else value)
+        # Plots without position get geohash '' so that they are not selected again
+        self.env.cr.execute("""
+            UPDATE dfr_plot p
+            SET geohash = v.geohash, bbox_geohash = v.bbox_geohash,
+                bbox_west = v.bbox_west, bbox_south = v.bbox_south, bbox_east = v.bbox_east, bbox_north = v.bbox_north
+            FROM unnest(%s::int[], %s::varchar[], %s::varchar[], %s::numeric[], %s::numeric[], %s::numeric[], %s::numeric[])
+                AS v(id, geohash, bbox_geohash, bbox_west, bbox_south, bbox_east, bbox_north)
+            WHERE p.id = v.id
+        """, ([row[0] for row in rows], columns['geohash'], columns['bbox_geohash'], columns['bbox_west'],
+              columns['bbox_south'], columns['bbox_east'], columns['bbox_north']))
+        self.invalidate_model(list(self._SPATIAL_INDEX_COLUMNS))
+        _logger.info("Backfilled spatial index for %s plots.", len(rows))
+        return len(rows)
+
     @api.model_create_multi
     def create(self, vals_list):
         records = super(DfrPlot, self).create(vals_list)
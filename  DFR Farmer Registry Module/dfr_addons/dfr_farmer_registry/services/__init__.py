@@ -4,4 +4,6 @@
 
 from . import dfr_deduplication_service
 from . import dfr_consent_service
-from . import dfr_kyc_service
\ No newline at end of file
+from . import dfr_kyc_service
+from . import dfr_farmer_registry_service
+from . import dfr_spatial_query_service
\ No newline at end of file
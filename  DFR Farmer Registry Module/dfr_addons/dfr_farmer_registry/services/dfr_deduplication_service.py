@@ -5,18 +5,23 @@
 from odoo import api, fields, models, _
 from odoo.exceptions import ValidationError, UserError
 import logging
-# Import fuzzywuzzy - ensure it's installed in the Odoo environment
-try:
-    from fuzzywuzzy import fuzz
-except ImportError:
-    _logger = logging.getLogger(__name__) # Initialize logger here if import fails early
-    _logger.warning("The 'fuzzywuzzy' library is not installed. Deduplication fuzzy matching will be disabled.")
-    fuzz = None # Set fuzz to None if import fails
+import math
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from ..utils.matching import compute_blocking_keys, normalize_field_value, NORMALIZED_COLUMNS
+from ..utils import scoring
 
 _logger = logging.getLogger(__name__)
 
 # Assume supporting models like dfr.national.id.type, dfr.administrative.area are available
 
+# Farmers in these statuses are never flagged as (or compared against) potential duplicates
+TERMINAL_STATUSES = ('archived', 'deceased', 'merged_duplicate')
+
+# Farmers indexed per blocking-key backfill batch before a sweep
+SWEEP_BACKFILL_BATCH_SIZE = 5000
+
 class DfrDeduplicationService(models.AbstractModel):
     _name = 'dfr.deduplication.service'
     _description = 'DFR Deduplication Service'
@@ -55,10 +60,34 @@ class DfrDeduplicationService(models.AbstractModel):
                 # Example for address, if relevant fields exist on farmer model directly
                 # 'address_component': int(IrConfigParameter.get_param('dfr.deduplication.fuzzy.address.threshold', '70')),
             },
+            'fuzzy_weights': { # Field name -> weight in the combined fuzzy score (default 1)
+                'name': float(IrConfigParameter.get_param('dfr.deduplication.fuzzy.name.weight', '1')),
+            },
             'merge_strategy': IrConfigParameter.get_param('dfr.deduplication.merge_strategy', 'newest_wins'), # 'newest_wins', 'oldest_wins', 'master_wins_on_conflict'
+            # Blocks shared by more farmers than this are too common to discriminate (0 = no limit)
+            'blocking_max_block_size': int(IrConfigParameter.get_param('dfr.deduplication.blocking.max_block_size', '5000')),
+            # Most similar names (pg_trgm index, when available) added to the blocking candidates (0 = disabled)
+            'trigram_candidates': int(IrConfigParameter.get_param('dfr.deduplication.trigram.candidates', '20')),
+            'trigram_threshold': float(IrConfigParameter.get_param('dfr.deduplication.trigram.threshold', '0.4')),
+            # Batch sweep: scoring processes (0/1 = score in the cron process) and distinct block keys per committed chunk
+            'sweep_workers': int(IrConfigParameter.get_param('dfr.deduplication.sweep.workers', '2')),
+            'sweep_chunk_keys': int(IrConfigParameter.get_param('dfr.deduplication.sweep.chunk_keys', '5000')),
         }
         return config
 
+    @api.model
+    def _get_matching_column(self, field_name):
+        """ Stored column compared for an exact rule on field_name: its normalized column when there is one. """
+        column = NORMALIZED_COLUMNS.get(field_name)
+        return column if column in self.env['dfr.farmer']._fields else field_name
+
+    @api.model
+    def _get_matching_value(self, field_name, value, country_code=None):
+        """ Value of field_name in the form stored in its matching column. """
+        if self._get_matching_column(field_name) == field_name:
+            return value
+        return normalize_field_value(field_name, value, country_code)
+
     @api.model
     def find_potential_duplicates(self, farmer_model_name_or_rs, farmer_data, current_farmer_id=None):
         """
@@ -80,17 +109,19 @@ class DfrDeduplicationService(models.AbstractModel):
 
         config = self.get_deduplication_config()
         potential_duplicates_dict = {} # Use dict to avoid adding same ID multiple times from different checks
+        country_code = Farmer._get_phone_default_country_code()
 
         # 1. Build initial domain filter
-        base_domain = [('status', 'not in', ('archived', 'deceased', 'merged_duplicate'))]
+        base_domain = [('status', 'not in', TERMINAL_STATUSES)]
         if current_farmer_id:
             base_domain.append(('id', '!=', current_farmer_id))
 
-        # 2. Check for exact matches on single configured fields
+        # 2. Check for exact matches on single configured fields (on the indexed normalized columns where available)
         for field_name in config['realtime_exact_fields']:
-            if field_name in farmer_data and farmer_data[field_name]:
+            value = self._get_matching_value(field_name, farmer_data.get(field_name), country_code)
+            if value:
                 exact_match_domain = list(base_domain)
-                exact_match_domain.append((field_name, '=', farmer_data[field_name]))
+                exact_match_domain.append((self._get_matching_column(field_name), '=', value))
                 exact_matches = Farmer.search(exact_match_domain)
                 for match in exact_matches:
                     if match.id not in potential_duplicates_dict:
@@ -104,13 +135,9 @@ class DfrDeduplicationService(models.AbstractModel):
             combo_domain_parts = []
             valid_combo_check = True
             for field_name in combo:
-                if field_name in farmer_data and farmer_data[field_name]:
-                    # Special handling for m2o fields in farmer_data (they might be IDs)
-                    field_obj = Farmer._fields.get(field_name)
-                    if field_obj and field_obj.type == 'many2one':
-                         combo_domain_parts.append((field_name, '=', farmer_data[field_name]))
-                    else:
-                         combo_domain_parts.append((field_name, '=', farmer_data[field_name]))
+                value = self._get_matching_value(field_name, farmer_data.get(field_name), country_code)
+                if value:
+                    combo_domain_parts.append((self._get_matching_column(field_name), '=', value))
                 else: # One field in combo is missing value, skip this combo for this check
                     valid_combo_check = False
                     break
@@ -128,64 +155,222 @@ class DfrDeduplicationService(models.AbstractModel):
 
 
         # 4. Perform fuzzy matching if enabled and library available
-        if fuzz and config['fuzzy_fields']:
-            fuzzy_domain = list(base_domain)
-            # Filter out already exact-matched records from fuzzy search
-            if potential_duplicates_dict:
-                 fuzzy_domain.append(('id', 'not in', list(potential_duplicates_dict.keys())))
-
-            # Further optimize fuzzy search: e.g., match on first letter of name, or admin area
-            if 'name' in farmer_data and farmer_data['name']:
-                 # fuzzy_domain.append(('name', '=ilike', farmer_data['name'][0] + '%')) # Example: match first letter
-                 pass # Avoid too broad searches without specific pre-filtering here
-            if 'administrative_area_id' in farmer_data and farmer_data['administrative_area_id']:
-                 fuzzy_domain.append(('administrative_area_id', '=', farmer_data['administrative_area_id']))
-
-            # Limit the search results to avoid comparing against the entire database
-            # A config parameter for search limit might be useful
-            potential_fuzzy_candidates = Farmer.search(fuzzy_domain, limit=100) # Arbitrary limit
-
-            for candidate in potential_fuzzy_candidates:
-                candidate_match_fields = []
-                total_score_weighted = 0
-                total_weight = 0
-
-                for field_name, threshold in config['fuzzy_fields'].items():
-                    if field_name in farmer_data and farmer_data[field_name] and candidate[field_name]:
-                        # Ensure values are strings for fuzzywuzzy
-                        value1 = str(farmer_data[field_name]).lower()
-                        value2 = str(candidate[field_name]).lower()
-                        score = 0
-                        if field_name == 'name': # Use token_set_ratio for names
-                            score = fuzz.token_set_ratio(value1, value2)
-                        else: # Use simple ratio for other fields
-                            score = fuzz.ratio(value1, value2)
-
-                        if score >= threshold:
-                            # Simple weighting: name is more important? For now, equal weight for matched fields.
-                            field_weight = 1 # Could be configured per field
-                            total_score_weighted += score * field_weight
-                            total_weight += field_weight
-                            candidate_match_fields.append(f"{field_name} ({score}%)")
-
-                if candidate_match_fields and total_weight > 0:
-                    average_score = total_score_weighted / total_weight
-                    # Add if not already found by exact match OR if fuzzy score is higher/provides more info
-                    if candidate.id not in potential_duplicates_dict or potential_duplicates_dict[candidate.id]['score'] < average_score :
-                        potential_duplicates_dict[candidate.id] = {
-                            'id': candidate.id,
-                            'score': int(average_score),
-                            'match_fields': candidate_match_fields,
-                        }
+        if scoring.is_available() and config['fuzzy_fields']:
+            # Only score farmers sharing a blocking key (phonetic / sorted tokens / prefix + birth year)
+            # with the record being checked, instead of an arbitrary slice of the registry.
+            blocking_keys = compute_blocking_keys(farmer_data.get('name'), farmer_data.get('date_of_birth'))
+            candidate_ids = self.env['dfr.farmer.blocking.key']._get_candidate_farmer_ids(
+                blocking_keys, max_block_size=config['blocking_max_block_size'])
+            candidate_ids |= self._get_trigram_candidates([farmer_data.get('name')], config)[0]
+            candidate_ids -= set(potential_duplicates_dict) # Already exact-matched
+            if current_farmer_id:
+                candidate_ids.discard(current_farmer_id)
+
+            candidate_rows = []
+            if candidate_ids:
+                fuzzy_domain = list(base_domain)
+                fuzzy_domain.append(('id', 'in', list(candidate_ids)))
+                candidate_rows = Farmer.search_read(fuzzy_domain, self._get_fuzzy_read_fields(config['fuzzy_fields']))
+
+            # All candidates are scored in one batched call (weighted mean of the fields reaching their threshold)
+            for index, score, candidate_match_fields in scoring.score_candidates(
+                    farmer_data, candidate_rows, config['fuzzy_fields'], config['fuzzy_weights']):
+                candidate_id = candidate_rows[index]['id']
+                # Add if not already found by exact match OR if fuzzy score is higher/provides more info
+                if candidate_id not in potential_duplicates_dict or potential_duplicates_dict[candidate_id]['score'] < score:
+                    potential_duplicates_dict[candidate_id] = {
+                        'id': candidate_id,
+                        'score': score,
+                        'match_fields': candidate_match_fields,
+                    }
 
         # Convert dict to list and sort
         final_duplicates_list = sorted(list(potential_duplicates_dict.values()), key=lambda x: x['score'], reverse=True)
         return final_duplicates_list
 
+    # --- Set-based real-time check ------------------------------------------
+
+    @api.model
+    def _get_trigram_candidates(self, names, config, exclude_ids=None):
+        """
+        Farmers with the most similar names (single indexed query for all names), catching
+        variants that share no blocking key. Only used when the pg_trgm index exists:
+        the fallback would rescore the blocking candidates.
+        :return: list aligned with names of sets of farmer ids
+        """
+        RegistryService = self.env['dfr.farmer.registry.service']
+        if not config['trigram_candidates'] or not RegistryService._has_name_trigram_index():
+            return [set() for _name in names]
+        similar = RegistryService.search_similar_farmers_batch(
+            names, limit=config['trigram_candidates'], threshold=config['trigram_threshold'],
+            exclude_ids=exclude_ids, exclude_statuses=TERMINAL_STATUSES)
+        return [{farmer_id for farmer_id, _score in matches} for matches in similar]
+
+    @api.model
+    def _get_fuzzy_read_fields(self, fuzzy_fields):
+        """ Fields to read for fuzzy scoring: the fuzzy fields and their precomputed normalized columns. """
+        Farmer = self.env['dfr.farmer']
+        columns = [NORMALIZED_COLUMNS[f] for f in fuzzy_fields if NORMALIZED_COLUMNS.get(f) in Farmer._fields]
+        return list(fuzzy_fields) + columns
+
+    @api.model
+    def _prepare_batch_rows(self, records_data):
+        """ Converts incoming values (vals or read() results) to cache format for comparison. """
+        Farmer = self.env['dfr.farmer']
+        rows = []
+        for data in records_data:
+            row = {}
+            for field_name, value in data.items():
+                field = Farmer._fields.get(field_name)
+                row[field_name] = field.convert_to_cache(value, Farmer, validate=False) if field and value else value
+            rows.append(row)
+        return rows
+
+    @api.model
+    def find_potential_duplicates_batch(self, records_data):
+        """
+        Set-based variant of find_potential_duplicates for a whole batch (a create vals_list
+        or the values of a recordset). Runs one query per exact/combo rule and one blocking-key
+        query for the batch, then one batched fuzzy scoring call per block. Records of the
+        batch are also compared with each other.
+
+        :param records_data: list of dicts of farmer data; existing records carry their 'id'
+        :return: list aligned with records_data, each a list sorted by score of
+                 {'id': farmer_id or False, 'index': batch index or False, 'score': int, 'match_fields': [...]}
+                 where 'index' identifies an in-batch match that has no id yet
+        """
+        Farmer = self.env['dfr.farmer']
+        config = self.get_deduplication_config()
+        base_domain = [('status', 'not in', TERMINAL_STATUSES)]
+        rows = self._prepare_batch_rows(records_data)
+        batch_ids = {row['id'] for row in rows if row.get('id')}
+        matches = [{} for _row in rows] # Per batch row: {('id', farmer_id) or ('index', j): match}
+
+        def batch_key(index):
+            return ('id', rows[index]['id']) if rows[index].get('id') else ('index', index)
+
+        def add_match(index, match_key, score, match_fields, exact=False):
+            if match_key == batch_key(index):
+                return
+            match = matches[index].get(match_key)
+            if match is None or (not exact and match['score'] < score):
+                matches[index][match_key] = {
+                    'id': match_key[1] if match_key[0] == 'id' else False,
+                    'index': match_key[1] if match_key[0] == 'index' else False,
+                    'score': score,
+                    'match_fields': list(match_fields),
+                }
+            elif exact:
+                match['match_fields'].extend(f for f in match_fields if f not in match['match_fields'])
+
+        # 1. Exact and combo rules: one query per rule for the whole batch, on the normalized columns
+        country_code = Farmer._get_phone_default_country_code()
+        field_groups = [(field_name,) for field_name in config['realtime_exact_fields']] + list(config['realtime_combo_fields'])
+        for group in field_groups:
+            if not all(field_name in Farmer._fields for field_name in group):
+                continue
+            columns = [self._get_matching_column(field_name) for field_name in group]
+            batch_values = {}
+            for index, row in enumerate(rows):
+                value = tuple(self._get_matching_value(field_name, row.get(field_name), country_code) for field_name in group)
+                if all(value):
+                    batch_values.setdefault(value, []).append(index)
+            if not batch_values:
+                continue
+            domain = list(base_domain) + [
+                (column, 'in', list({value[position] for value in batch_values}))
+                for position, column in enumerate(columns)
+            ]
+            existing = {}
+            for record in Farmer.search_read(domain, columns, load=None):
+                value = tuple(record[column] for column in columns)
+                if value in batch_values and record['id'] not in batch_ids: # Superset query for combos: keep exact tuples
+                    existing.setdefault(value, []).append(record['id'])
+            for value, indexes in batch_values.items():
+                members = [('id', farmer_id) for farmer_id in existing.get(value, [])] + [batch_key(index) for index in indexes]
+                if len(members) < 2:
+                    continue
+                for index in indexes:
+                    for member in members:
+                        add_match(index, member, 100, group, exact=True)
+
+        # 2. Fuzzy rules: one blocking-key query, then one score matrix per block
+        if scoring.is_available() and config['fuzzy_fields']:
+            keys_by_index = [compute_blocking_keys(row.get('name'), row.get('date_of_birth')) for row in rows]
+            blocks = self.env['dfr.farmer.blocking.key']._get_blocks(
+                set().union(*keys_by_index), max_block_size=config['blocking_max_block_size'])
+            # The similar names of each record form one more block, scored against that record only
+            for index, similar_ids in enumerate(self._get_trigram_candidates([row.get('name') for row in rows], config, batch_ids)):
+                if similar_ids:
+                    blocks[('similar', index)] = similar_ids
+                    keys_by_index[index].add(('similar', index))
+            candidate_ids = set().union(*blocks.values()) - batch_ids if blocks else set()
+            candidates_by_id = {}
+            if candidate_ids:
+                candidate_domain = list(base_domain) + [('id', 'in', list(candidate_ids))]
+                candidates_by_id = {record['id']: record for record in Farmer.search_read(
+                    candidate_domain, self._get_fuzzy_read_fields(config['fuzzy_fields']))}
+
+            batch_by_key = {}
+            for index, keys in enumerate(keys_by_index):
+                for key in keys:
+                    batch_by_key.setdefault(key, []).append(index)
+            for key, indexes in batch_by_key.items():
+                existing_ids = sorted(farmer_id for farmer_id in blocks.get(key, ()) if farmer_id in candidates_by_id)
+                right_keys = [('id', farmer_id) for farmer_id in existing_ids] + [batch_key(index) for index in indexes]
+                right_rows = [candidates_by_id[farmer_id] for farmer_id in existing_ids] + [rows[index] for index in indexes]
+                if len(right_rows) < 2:
+                    continue
+                for i, j, score, match_fields in scoring.score_cross(
+                        [rows[index] for index in indexes], right_rows, config['fuzzy_fields'], config['fuzzy_weights']):
+                    add_match(indexes[i], right_keys[j], score, match_fields)
+
+        return [sorted(row_matches.values(), key=lambda match: match['score'], reverse=True) for row_matches in matches]
+
+    @api.model
+    def _link_duplicate_pairs(self, pairs):
+        """
+        Bulk-writes duplicate pairs into dfr_farmer_duplicate_rel (both directions), skipping
+        pairs already linked or previously marked as not duplicate by a reviewer.
+        Farmers pending verification that gain a link move to 'potential_duplicate' and
+        the new links are folded into the duplicate clusters.
+        :param pairs: dict {(id_low, id_high): score} or iterable of pairs (exact matches, score 100)
+        :return: number of newly linked pairs
+        """
+        scores_by_pair = pairs if isinstance(pairs, dict) else dict.fromkeys(pairs, 100)
+        pairs = list(scores_by_pair)
+        if not pairs:
+            return 0
+        left = [a for a, b in pairs] + [b for a, b in pairs]
+        right = [b for a, b in pairs] + [a for a, b in pairs]
+        self.env.cr.execute("""
+            INSERT INTO dfr_farmer_duplicate_rel (farmer_id, duplicate_id)
+            SELECT p.farmer_id, p.duplicate_id
+            FROM unnest(%s::int[], %s::int[]) AS p(farmer_id, duplicate_id)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM dfr_farmer_not_duplicate_rel n
+                WHERE n.farmer_id = p.farmer_id AND n.not_duplicate_id = p.duplicate_id
+            )
+            ON CONFLICT DO NOTHING
+            RETURNING farmer_id, duplicate_id
+        """, (left, right))
+        inserted = self.env.cr.fetchall()
+        if not inserted:
+            return 0
+        Farmer = self.env['dfr.farmer']
+        Farmer.invalidate_model(['deduplication_potential_duplicate_ids'])
+        flagged = Farmer.browse({farmer_id for farmer_id, _dup in inserted}).filtered(
+            lambda farmer: farmer.status == 'pending_verification')
+        if flagged:
+            flagged.write({'status': 'potential_duplicate'})
+        new_pairs = {tuple(sorted(pair)) for pair in inserted}
+        self.env['dfr.deduplication.cluster']._add_links({pair: scores_by_pair.get(pair, 0) for pair in new_pairs})
+        return len(new_pairs)
+
     @api.model
     def perform_record_merge(self, master_farmer_id, duplicate_farmer_ids, field_retention_rules=None):
         """
-        Merges duplicate farmer records into a master record.
+        Merges duplicate farmer records into a master record (single cluster, see perform_bulk_merge).
         """
         if not master_farmer_id or not duplicate_farmer_ids:
             raise ValidationError(_("Master record and at least one duplicate record must be specified for merging."))
@@ -202,131 +387,464 @@ class DfrDeduplicationService(models.AbstractModel):
         if not duplicate_records:
             raise ValidationError(_("No valid duplicate records found to merge (IDs: %s).") % duplicate_ids_filtered)
 
+        result = self.perform_bulk_merge({master_record.id: duplicate_records.ids}, field_retention_rules=field_retention_rules)
+        if result['failed']:
+            raise UserError(result['failed'][master_record.id])
+        return master_record
+
+    @api.model
+    def _get_mergeable_field_names(self, retention_rules):
+        """ Stored, writable dfr.farmer fields whose values are merged into the master. """
+        skipped = ('id', 'uid', 'company_id', 'active', '__last_update',
+                   'create_date', 'create_uid', 'write_date', 'write_uid',
+                   'deduplication_master_farmer_id', 'deduplication_potential_duplicate_ids',
+                   'deduplication_not_duplicate_ids', 'deduplication_cluster_id', 'message_ids', 'message_follower_ids', 'activity_ids')
+        return [
+            field_name for field_name, field_obj in self.env['dfr.farmer']._fields.items()
+            if field_obj.store and field_obj.type not in ('one2many', 'many2many')
+            and not field_obj.compute and not field_obj.related
+            and not (field_obj.readonly and field_name not in retention_rules)
+            and field_name not in skipped
+        ]
 
-        _logger.info("Merging duplicate farmers %s into master farmer %s (%s)", duplicate_records.ids, master_record.id, master_record.uid)
+    @api.model
+    def _compute_merge_values(self, master_row, duplicate_rows, field_names, retention_rules, default_strategy):
+        """
+        Picks the winning value of each field for one cluster, from values read beforehand.
+        Empty values (False, None, '') never win; 0 is a value.
 
-        merge_context = self.env.context.copy()
-        merge_context['deduplication_merge_in_progress'] = True
-        FarmerWithCtx = Farmer.with_context(merge_context)
-        master_record = FarmerWithCtx.browse(master_record.id) # Re-browse with context
-        duplicate_records = FarmerWithCtx.browse(duplicate_records.ids)
+        :param master_row: dict of master values (read with load=None, including 'write_date')
+        :param duplicate_rows: list of dicts of duplicate values
+        :return: dict of values to write on the master
+        """
+        def has_value(row, field_name):
+            return row[field_name] not in (False, None, '')
+
+        all_rows = [master_row] + duplicate_rows
+        by_write_date = sorted(all_rows, key=lambda row: row['write_date'] or fields.Datetime.now())
+        master_vals = {}
+        for field_name in field_names:
+            master_value = master_row[field_name]
+            if all(row[field_name] == master_value for row in duplicate_rows):
+                continue # No conflict
+
+            rule = retention_rules.get(field_name, default_strategy)
+            source_row = None
+            if rule == 'master_wins_on_conflict':
+                if not has_value(master_row, field_name): # Master is empty, pick newest non-empty from duplicates
+                    source_row = next((row for row in reversed(by_write_date) if row is not master_row and has_value(row, field_name)), None)
+            elif rule == 'newest_wins':
+                source_row = next((row for row in reversed(by_write_date) if has_value(row, field_name)), None)
+            elif rule == 'oldest_wins':
+                source_row = next((row for row in by_write_date if has_value(row, field_name)), None)
+            elif isinstance(rule, int): # Explicitly choose from specific record ID
+                source_row = next((row for row in all_rows if row['id'] == rule), None)
+
+            if source_row is not None and source_row[field_name] != master_value:
+                master_vals[field_name] = source_row[field_name]
+        return master_vals
 
+    @api.model
+    def _get_farmer_reference_fields(self):
+        """
+        Introspects the registry for stored many2one fields pointing at dfr.farmer.
+        :return: list of (model, field) to re-parent on merge
+        """
+        references = []
+        for model_name in self.env.registry:
+            Model = self.env[model_name]
+            if Model._abstract or Model._transient or not Model._auto or model_name == 'dfr.farmer.blocking.key':
+                continue # Blocking keys are a per-farmer index, not data to move
+            for field_obj in Model._fields.values():
+                if field_obj.type == 'many2one' and field_obj.comodel_name == 'dfr.farmer' \
+                        and field_obj.store and not field_obj.related and not field_obj.compute:
+                    references.append((Model, field_obj))
+        return references
 
+    @api.model
+    def _reparent_farmer_references(self, master_by_duplicate):
+        """
+        Points every many2one referencing a duplicate at its master, with one UPDATE per
+        referencing column, then recomputes the stored fields depending on the moved columns
+        (e.g. related fields of the referencing records). A failing column (e.g. a unique
+        constraint) fails the merge of the whole chunk.
+        :param master_by_duplicate: dict {duplicate_id: master_id}
+        """
+        duplicate_ids = list(master_by_duplicate)
+        master_ids = [master_by_duplicate[dup_id] for dup_id in duplicate_ids]
+        for Model, field_obj in self._get_farmer_reference_fields():
+            log_access_clause = ''
+            params = {'duplicate_ids': duplicate_ids, 'master_ids': master_ids, 'uid': self.env.uid}
+            if Model._log_access:
+                log_access_clause = ", write_uid = %(uid)s, write_date = (now() at time zone 'UTC')"
+            self.env.cr.execute("""
+                UPDATE "%s" t SET "%s" = m.master_id %s
+                FROM unnest(%%(duplicate_ids)s::int[], %%(master_ids)s::int[]) AS m(duplicate_id, master_id)
+                WHERE t."%s" = m.duplicate_id
+                RETURNING t.id
+            """ % (Model._table, field_obj.name, log_access_clause, field_obj.name), params)
+            moved_ids = [row[0] for row in self.env.cr.fetchall()]
+            if moved_ids:
+                _logger.info("Moved %s records of %s.%s from duplicates to masters", len(moved_ids), Model._name, field_obj.name)
+                moved = Model.sudo().with_context(active_test=False).browse(moved_ids)
+                moved.invalidate_recordset([field_obj.name], flush=False) # Recomputations read the new values
+                moved.modified([field_obj.name])
+        self.env.flush_all()
+
+    @api.model
+    def _merge_followers(self, master_by_duplicate):
+        """ Subscribes the followers of the duplicates to their master (one read for the chunk). """
+        followers = self.env['mail.followers'].sudo().search_read(
+            [('res_model', '=', 'dfr.farmer'), ('res_id', 'in', list(master_by_duplicate) + list(set(master_by_duplicate.values())))],
+            ['res_id', 'partner_id'], load=None)
+        partners_by_farmer = {}
+        for follower in followers:
+            if follower['partner_id']:
+                partners_by_farmer.setdefault(follower['res_id'], set()).add(follower['partner_id'])
+        missing_by_master = {}
+        for duplicate_id, master_id in master_by_duplicate.items():
+            missing = partners_by_farmer.get(duplicate_id, set()) - partners_by_farmer.get(master_id, set())
+            if missing:
+                missing_by_master.setdefault(master_id, set()).update(missing)
+        Farmer = self.env['dfr.farmer']
+        for master_id, partner_ids in missing_by_master.items():
+            Farmer.browse(master_id).message_subscribe(partner_ids=list(partner_ids))
+
+    @api.model
+    def _post_merge_messages(self, clusters, rows_by_id):
+        """ Creates the merge chatter notes of masters and duplicates in a single create. """
+        subtype = self.env.ref('mail.mt_note', raise_if_not_found=False)
+        author_id = self.env.user.partner_id.id
+        message_vals = []
+
+        def note(res_id, body):
+            message_vals.append({
+                'model': 'dfr.farmer',
+                'res_id': res_id,
+                'body': body,
+                'message_type': 'comment',
+                'subtype_id': subtype.id if subtype else False,
+                'author_id': author_id,
+            })
+
+        for master_id, duplicate_ids in clusters.items():
+            master_row = rows_by_id[master_id]
+            note(master_id, _("This record is now the master record. Merged from duplicates: %s (UIDs: %s).") % (
+                ", ".join(rows_by_id[dup_id]['name'] or '' for dup_id in duplicate_ids),
+                ", ".join(rows_by_id[dup_id]['uid'] or '' for dup_id in duplicate_ids)))
+            for dup_id in duplicate_ids:
+                note(dup_id, _("This record has been merged into master farmer: %s (UID: %s). This record is now archived.") % (
+                    master_row['name'], master_row['uid']))
+        self.env['mail.message'].sudo().create(message_vals)
+
+    @api.model
+    def perform_bulk_merge(self, clusters, field_retention_rules=None, chunk_size=200, commit=False):
+        """
+        Merges many clusters of duplicates into their masters, chunk by chunk.
+
+        Per chunk: one read of all involved farmers for the field winners, one UPDATE per
+        many2one column referencing dfr.farmer, one read of followers, one create for all
+        chatter notes and one write archiving the duplicates. Each chunk runs in its own
+        savepoint (committed after each chunk if commit=True, e.g. from a scheduled action),
+        so a failing chunk does not undo the others.
+
+        :param clusters: dict {master_id: [duplicate_ids]}
+        :param field_retention_rules: dict {field_name: strategy or record id}
+        :param chunk_size: number of clusters per chunk
+        :param commit: commit the transaction after each chunk
+        :return: dict {'merged': [master_ids], 'failed': {master_id: error message}}
+        """
+        Farmer = self.env['dfr.farmer'].with_context(deduplication_merge_in_progress=True, active_test=False)
         config = self.get_deduplication_config()
         retention_rules = field_retention_rules or {}
-        master_vals_to_update = {}
+        field_names = self._get_mergeable_field_names(retention_rules)
+        result = {'merged': [], 'failed': {}}
+
+        # A farmer can only be merged once: drop self-references and farmers claimed by an earlier cluster
+        seen_ids = set()
+        valid_clusters = {}
+        for master_id, duplicate_ids in clusters.items():
+            duplicate_ids = [dup_id for dup_id in dict.fromkeys(duplicate_ids) if dup_id != master_id and dup_id not in seen_ids]
+            if master_id in seen_ids or not duplicate_ids:
+                result['failed'][master_id] = _("No valid duplicate records found to merge (IDs: %s).") % duplicate_ids
+                continue
+            seen_ids.update(duplicate_ids, [master_id])
+            valid_clusters[master_id] = duplicate_ids
+
+        master_ids = list(valid_clusters)
+        for chunk_start in range(0, len(master_ids), chunk_size):
+            chunk = {master_id: valid_clusters[master_id] for master_id in master_ids[chunk_start:chunk_start + chunk_size]}
+            try:
+                with self.env.cr.savepoint():
+                    self._merge_chunk(Farmer, chunk, field_names, retention_rules, config['merge_strategy'])
+                result['merged'].extend(chunk)
+            except Exception as e:
+                _logger.error("Merging clusters %s failed: %s", list(chunk), e, exc_info=True)
+                for master_id in chunk:
+                    result['failed'][master_id] = _("Error during merge process: %s") % e
+            if commit:
+                self.env.cr.commit()
+            _logger.info("Bulk merge: %s/%s clusters processed.", min(chunk_start + chunk_size, len(master_ids)), len(master_ids))
+        return result
 
-        all_involved_records = master_record | duplicate_records
+    @api.model
+    def _merge_chunk(self, Farmer, clusters, field_names, retention_rules, default_strategy):
+        master_by_duplicate = {dup_id: master_id for master_id, dup_ids in clusters.items() for dup_id in dup_ids}
+        all_ids = list(clusters) + list(master_by_duplicate)
+        rows_by_id = {row['id']: row for row in Farmer.browse(all_ids).read(
+            field_names + ['name', 'uid', 'status', 'write_date'], load=None)}
+        missing_ids = set(all_ids) - set(rows_by_id)
+        if missing_ids:
+            raise ValidationError(_("Farmer records %s do not exist.") % sorted(missing_ids))
+        already_merged = [farmer_id for farmer_id in all_ids if rows_by_id[farmer_id]['status'] == 'merged_duplicate']
+        self.env.cr.execute("SELECT DISTINCT deduplication_cluster_id FROM dfr_farmer WHERE id = ANY(%s) AND deduplication_cluster_id IS NOT NULL", (all_ids,))
+        cluster_ids = [row[0] for row in self.env.cr.fetchall()]
+        if already_merged:
+            raise ValidationError(_("Farmer records %s were already merged.") % sorted(already_merged))
+
+        _logger.info("Merging %s duplicate farmers into %s masters", len(master_by_duplicate), len(clusters))
+        for master_id, duplicate_ids in clusters.items():
+            master_vals = self._compute_merge_values(
+                rows_by_id[master_id], [rows_by_id[dup_id] for dup_id in duplicate_ids],
+                field_names, retention_rules, default_strategy)
+            if master_vals:
+                _logger.info("Updating master farmer %s with merged fields: %s", master_id, list(master_vals))
+                Farmer.browse(master_id).write(master_vals)
+
+        self._merge_followers(master_by_duplicate)
+        self._reparent_farmer_references(master_by_duplicate)
+        self.env.invalidate_all() # References were moved in SQL
+
+        # The master/duplicate links of the cluster are resolved
+        self.env.cr.execute("""
+            DELETE FROM dfr_farmer_duplicate_rel r
+            USING unnest(%s::int[], %s::int[]) AS m(duplicate_id, master_id)
+            WHERE (r.farmer_id = m.duplicate_id AND r.duplicate_id = m.master_id)
+               OR (r.farmer_id = m.master_id AND r.duplicate_id = m.duplicate_id)
+        """, (list(master_by_duplicate), list(master_by_duplicate.values())))
+
+        self._post_merge_messages(clusters, rows_by_id)
+
+        # Deactivate duplicates: one write for the chunk, then the master pointers in SQL
+        Farmer.browse(list(master_by_duplicate)).write({
+            'status': 'merged_duplicate', # Special status for merged records
+            'active': False,
+        })
+        # The cluster rebuild selects active members in SQL: the archiving must be in the database first
+        Farmer.flush_model(['status', 'active'])
+        self.env.cr.execute("""
+            UPDATE dfr_farmer f SET deduplication_master_farmer_id = m.master_id
+            FROM unnest(%s::int[], %s::int[]) AS m(duplicate_id, master_id)
+            WHERE f.id = m.duplicate_id
+        """, (list(master_by_duplicate), list(master_by_duplicate.values())))
+        Farmer.invalidate_model(['deduplication_master_farmer_id', 'deduplication_potential_duplicate_ids'])
+        self.env['dfr.deduplication.cluster']._rebuild_clusters(cluster_ids) # Merged farmers leave their clusters
+        _logger.info("Duplicate farmers %s successfully merged into masters %s and archived.", list(master_by_duplicate), list(clusters))
+
+    # --- Batch sweep ---------------------------------------------------------
 
-        for field_name, field_obj in master_record._fields.items():
-            if field_obj.type in ('one2many', 'many2many') or field_obj.compute or field_obj.related or \
-               field_obj.readonly and field_name not in retention_rules or \
-               field_name in ('id', 'uid', 'company_id', 'active', '__last_update',
-                               'create_date', 'create_uid', 'write_date', 'write_uid',
-                               'deduplication_master_farmer_id', 'deduplication_potential_duplicate_ids',
-                               'message_ids', 'message_follower_ids', 'activity_ids'): # Skip technical/relational/log fields
-                continue
+    @api.model
+    def _get_matching_rules(self, config):
+        """ Plain (picklable) subset of the configuration used for matching, also by the sweep's scoring workers. """
+        return {
+            'exact_fields': config['realtime_exact_fields'],
+            'combo_fields': config['realtime_combo_fields'],
+            'fuzzy_fields': config['fuzzy_fields'] if scoring.is_available() else {},
+            'fuzzy_weights': config['fuzzy_weights'],
+        }
+
+    @api.model
+    def _get_rule_field_names(self, rules):
+        """ Stored dfr.farmer fields to load for matching (rule fields, their normalized columns and blocking key inputs). """
+        Farmer = self.env['dfr.farmer']
+        names = set(rules['exact_fields']) | set(rules['fuzzy_fields']) | {'name', 'date_of_birth'}
+        for combo in rules['combo_fields']:
+            names.update(combo)
+        names.update([NORMALIZED_COLUMNS[name] for name in names if name in NORMALIZED_COLUMNS])
+        return [name for name in sorted(names) if name in Farmer._fields and Farmer._fields[name].store]
 
-            # Gather values from all records for this field
-            values_map = {rec.id: rec[field_name] for rec in all_involved_records}
-            distinct_values = set(v for v in values_map.values() if v or isinstance(v, (bool, int, float))) # Consider False/0 as values
+    @api.model
+    def _sweep_key_source(self, sweep):
+        """ SQL selecting the block keys the sweep has to visit, and its parameters. """
+        if sweep.mode == 'incremental' and sweep.since:
+            return """
+                SELECT k.key FROM dfr_farmer_blocking_key k
+                JOIN dfr_farmer f ON f.id = k.farmer_id
+                WHERE f.write_date >= %(since)s
+            """, {'since': sweep.since}
+        return "SELECT key FROM dfr_farmer_blocking_key", {}
 
-            if len(distinct_values) <= 1 and master_record[field_name] in distinct_values: # No conflict or master has the only value
+    @api.model
+    def _sweep_exact_pairs(self, sweep, rules):
+        """
+        Exact and combo rules are evaluated set-based in SQL with self-joins, so records
+        sharing e.g. a national ID number are linked even if their names share no block.
+        :return: set of (id_low, id_high)
+        """
+        Farmer = self.env['dfr.farmer']
+        pairs = set()
+        field_groups = [(field_name,) for field_name in rules['exact_fields']] + list(rules['combo_fields'])
+        for group in field_groups:
+            if not all(name in Farmer._fields and Farmer._fields[name].store for name in group):
+                _logger.warning("Skipping de-duplication rule %s in batch sweep: not a stored dfr.farmer field.", group)
                 continue
+            conditions = []
+            for name in map(self._get_matching_column, group):
+                conditions.append('a."%s" = b."%s"' % (name, name))
+                if Farmer._fields[name].type in ('char', 'text'):
+                    conditions.append("""a."%s" <> ''""" % name)
+            params = {'terminal': TERMINAL_STATUSES}
+            incremental_clause = ''
+            if sweep.mode == 'incremental' and sweep.since:
+                incremental_clause = 'AND (a.write_date >= %(since)s OR b.write_date >= %(since)s)'
+                params['since'] = sweep.since
+            self.env.cr.execute("""
+                SELECT a.id, b.id FROM dfr_farmer a
+                JOIN dfr_farmer b ON a.id < b.id AND %s
+                WHERE a.active AND b.active
+                  AND a.status NOT IN %%(terminal)s AND b.status NOT IN %%(terminal)s
+                  %s
+            """ % (' AND '.join(conditions), incremental_clause), params)
+            pairs.update(self.env.cr.fetchall())
+        return pairs
 
-            # Conflict exists or master value is empty and duplicates have values
-            chosen_value = master_record[field_name] # Default to master's current value
-            chosen_value_source_rec = master_record
+    @api.model
+    def _sweep_next_chunk(self, sweep, chunk_keys):
+        """
+        Returns (upper_key, key_count) bounding the next chunk of distinct block keys
+        after the sweep checkpoint, or (None, 0) when all blocks have been visited.
+        """
+        source, params = self._sweep_key_source(sweep)
+        params.update({'after': sweep.last_block_key or '', 'limit': chunk_keys})
+        self.env.cr.execute("""
+            SELECT max(key), count(*) FROM (
+                SELECT DISTINCT key FROM (%s) src WHERE key > %%(after)s ORDER BY key LIMIT %%(limit)s
+            ) chunk
+        """ % source, params)
+        return self.env.cr.fetchone()
 
-            rule = retention_rules.get(field_name, config['merge_strategy'])
+    @api.model
+    def _sweep_load_blocks(self, sweep, upper_key, max_block_size):
+        """ Returns [(key, [farmer_ids])] of the blocks with 2+ eligible farmers in the chunk. """
+        source, params = self._sweep_key_source(sweep)
+        params.update({
+            'after': sweep.last_block_key or '',
+            'upper': upper_key,
+            'terminal': TERMINAL_STATUSES,
+            'max_size': max_block_size if max_block_size > 0 else None,
+        })
+        restrict_clause = 'AND k.key IN (%s)' % source if sweep.mode == 'incremental' and sweep.since else ''
+        self.env.cr.execute("""
+            SELECT k.key, array_agg(k.farmer_id ORDER BY k.farmer_id)
+            FROM dfr_farmer_blocking_key k
+            JOIN dfr_farmer f ON f.id = k.farmer_id
+            WHERE k.key > %%(after)s AND k.key <= %%(upper)s
+              AND f.active AND f.status NOT IN %%(terminal)s
+              %s
+            GROUP BY k.key
+            HAVING count(*) >= 2 AND (%%(max_size)s IS NULL OR count(*) <= %%(max_size)s)
+        """ % restrict_clause, params)
+        return self.env.cr.fetchall()
 
-            if rule == 'master_wins_on_conflict':
-                if master_record[field_name]: # Master has a value, keep it
-                    chosen_value = master_record[field_name]
-                else: # Master is empty, pick newest non-empty from duplicates
-                    newest_rec_with_value = duplicate_records.filtered(lambda r: r[field_name]).sorted(key='write_date', reverse=True)
-                    if newest_rec_with_value:
-                        chosen_value = newest_rec_with_value[0][field_name]
-                        chosen_value_source_rec = newest_rec_with_value[0]
+    @api.model
+    def _sweep_score_blocks(self, blocks, rules, executor):
+        """
+        Scores all pairs of the given blocks, in the worker pool if one is given.
+        :return: (pairs_scored, dict of matching {(id_low, id_high): score})
+        """
+        farmer_ids = sorted({farmer_id for _key, ids in blocks for farmer_id in ids})
+        field_names = self._get_rule_field_names(rules)
+        rows_by_id = {row['id']: row for row in self.env['dfr.farmer'].browse(farmer_ids).read(field_names, load=None)}
+        tasks = [([rows_by_id[farmer_id] for farmer_id in ids if farmer_id in rows_by_id], rules) for _key, ids in blocks]
+        pairs_scored = sum(len(block_rows) * (len(block_rows) - 1) // 2 for block_rows, _rules in tasks)
+        if executor:
+            results = executor.map(scoring.score_block_task, tasks, chunksize=max(1, len(tasks) // 64))
+        else:
+            results = (scoring.score_block(*task) for task in tasks)
+        matches = {}
+        for block_result in results:
+            for id_low, id_high, score, _fields in block_result:
+                matches[(id_low, id_high)] = max(score, matches.get((id_low, id_high), 0))
+        return pairs_scored, matches
 
-            elif rule == 'newest_wins':
-                newest_rec_with_value = all_involved_records.filtered(lambda r: r[field_name] or isinstance(r[field_name], (bool,int,float))).sorted(key='write_date', reverse=True)
-                if newest_rec_with_value:
-                    chosen_value = newest_rec_with_value[0][field_name]
-                    chosen_value_source_rec = newest_rec_with_value[0]
+    @api.model
+    def run_batch_sweep(self, sweep):
+        """
+        Runs (or resumes) a batch de-duplication sweep over the registry.
 
-            elif rule == 'oldest_wins':
-                oldest_rec_with_value = all_involved_records.filtered(lambda r: r[field_name] or isinstance(r[field_name], (bool,int,float))).sorted(key='write_date', reverse=False)
-                if oldest_rec_with_value:
-                    chosen_value = oldest_rec_with_value[0][field_name]
-                    chosen_value_source_rec = oldest_rec_with_value[0]
-
-            elif isinstance(rule, int) and rule in all_involved_records.ids: # Explicitly choose from specific record ID
-                record_to_take_value_from = all_involved_records.filtered(lambda r: r.id == rule)
-                if record_to_take_value_from:
-                    chosen_value = record_to_take_value_from[field_name]
-                    chosen_value_source_rec = record_to_take_value_from
-
-            # Update master if chosen value is different and comes from a different record or rule forces it
-            if chosen_value != master_record[field_name] or chosen_value_source_rec != master_record:
-                master_vals_to_update[field_name] = chosen_value
-
-
-        if master_vals_to_update:
-             _logger.info("Updating master farmer %s with merged fields: %s", master_record.id, master_vals_to_update)
-             master_record.write(master_vals_to_update)
-
-        # Re-parent related records
-        # This is a critical and complex part. Need to handle based on specific relations.
-        # Example for O2M and M2M fields:
-        # For M2M, usually 'adding' values from duplicates to master is safe.
-        # For O2M, it's re-assigning the foreign key on the 'many' side.
-
-        # For mail.followers and mail.activity
-        # Odoo's merge wizard helper `_merge_method` in `mail.thread` can be an inspiration
-        # For simplicity here: try to move followers. Activities are harder to just "move".
-        all_follower_ids = set()
-        for rec in all_involved_records:
-            all_follower_ids.update(rec.message_follower_ids.mapped('partner_id.id')) # Get partner_ids
-        if all_follower_ids:
-             master_record.message_subscribe(partner_ids=list(all_follower_ids))
-
-
-        # Handle specific relational fields defined in SDS (this is a simplified example)
-        # This should be dynamic based on model relations or explicitly listed
-        relations_to_reparent = {
-            'dfr.household_member': 'farmer_id',
-            'dfr.farm': 'farmer_id',
-            # For other models (e.g. dfr.plot might link to farmer directly, dfr.survey_answer etc.)
-        }
-        for model_name, field_to_update in relations_to_reparent.items():
-            RelatedModel = self.env[model_name].with_context(merge_context)
-            records_to_move = RelatedModel.search([(field_to_update, 'in', duplicate_records.ids)])
-            if records_to_move:
-                try:
-                    # Check for potential unique constraint violations before write
-                    # e.g., if a household_member can only be linked to one household and farmer pair
-                    records_to_move.write({field_to_update: master_record.id})
-                    _logger.info("Moved %s records of %s from duplicates to master %s", len(records_to_move), model_name, master_record.id)
-                except Exception as e:
-                    _logger.error("Error moving %s records for master %s: %s. Manual review might be needed.", model_name, master_record.id, e)
-                    # Potentially raise UserError to stop merge if critical
-
-        # Log merge event in chatter
-        merge_log_message = _("This record is now the master record. Merged from duplicates: %s (UIDs: %s).") % (
-            ", ".join(duplicate_records.mapped('name')),
-            ", ".join(duplicate_records.mapped('uid'))
-        )
-        master_record.message_post(body=merge_log_message)
-
-        # Deactivate duplicates
-        for dup_rec in duplicate_records:
-            dup_rec.message_post(body=_("This record has been merged into master farmer: %s (UID: %s). This record is now archived.") % (master_record.name, master_record.uid))
-            dup_rec.write({
-                'status': 'merged_duplicate', # Special status for merged records
-                'active': False, # Assuming standard Odoo active field for archiving
-                'deduplication_master_farmer_id': master_record.id,
-            })
-        _logger.info("Duplicate farmers %s successfully merged into master %s and archived.", duplicate_records.ids, master_record.id)
+        1. Exact/combo rules are evaluated in SQL (once per sweep).
+        2. Blocking-key blocks are visited in key order, in chunks of distinct keys;
+           the candidate pairs of each chunk are scored in a process pool.
+        3. Matches are bulk-inserted into dfr_farmer_duplicate_rel and the chunk is
+           committed together with the sweep checkpoint and progress counters.
 
-        return master_record
\ No newline at end of file
+        :param sweep: dfr.deduplication.sweep record
+        """
+        sweep.ensure_one()
+        config = self.get_deduplication_config()
+        rules = self._get_matching_rules(config)
+        BlockingKey = self.env['dfr.farmer.blocking.key']
+        executor = None
+        try:
+            if sweep.state == 'draft':
+                date_start = fields.Datetime.now() # Watermark of the next incremental sweep
+                # Sweep only sees farmers that have blocking keys. The number of batches is bounded
+                # upfront: farmers created meanwhile are indexed by create() anyway.
+                backfill_batches = math.ceil(BlockingKey._count_farmers_to_backfill() / SWEEP_BACKFILL_BATCH_SIZE)
+                for _batch in range(backfill_batches):
+                    if not BlockingKey._cron_backfill_blocking_keys(batch_size=SWEEP_BACKFILL_BATCH_SIZE):
+                        break
+                    self.env.cr.commit()
+                while self.env['dfr.farmer']._cron_backfill_normalized_columns():
+                    self.env.cr.commit() # Exact rules compare the normalized columns
+                source, params = self._sweep_key_source(sweep)
+                self.env.cr.execute("SELECT count(DISTINCT key) FROM (%s) src" % source, params)
+                blocks_total = self.env.cr.fetchone()[0]
+                exact_pairs = self._sweep_exact_pairs(sweep, rules)
+                sweep.write({
+                    'state': 'in_progress',
+                    'date_start': date_start,
+                    'blocks_total': blocks_total,
+                    'pairs_scored': len(exact_pairs),
+                    'duplicates_found': self._link_duplicate_pairs(exact_pairs),
+                })
+                self.env.cr.commit()
+                _logger.info("De-duplication sweep %s (%s) started: %s blocks, %s exact pairs.",
+                             sweep.id, sweep.mode, blocks_total, len(exact_pairs))
+
+            if config['sweep_workers'] > 1:
+                executor = ProcessPoolExecutor(max_workers=config['sweep_workers'],
+                                               mp_context=multiprocessing.get_context('fork'))
+            while True:
+                sweep.invalidate_recordset(['state'])
+                if sweep.state != 'in_progress': # Cancelled from the UI in another transaction
+                    _logger.info("De-duplication sweep %s stopped (state %s).", sweep.id, sweep.state)
+                    return
+                upper_key, key_count = self._sweep_next_chunk(sweep, config['sweep_chunk_keys'])
+                if not upper_key:
+                    break
+                blocks = self._sweep_load_blocks(sweep, upper_key, config['blocking_max_block_size'])
+                pairs_scored, matches = self._sweep_score_blocks(blocks, rules, executor)
+                new_links = self._link_duplicate_pairs(matches)
+                sweep.write({
+                    'last_block_key': upper_key,
+                    'blocks_done': sweep.blocks_done + key_count,
+                    'pairs_scored': sweep.pairs_scored + pairs_scored,
+                    'duplicates_found': sweep.duplicates_found + new_links,
+                })
+                self.env.cr.commit() # Checkpoint: the sweep resumes after upper_key
+                _logger.info("De-duplication sweep %s: %s/%s blocks (%.1f%%), %s pairs scored, %s new duplicate links.",
+                             sweep.id, sweep.blocks_done, sweep.blocks_total, sweep.progress,
+                             sweep.pairs_scored, sweep.duplicates_found)
+
+            sweep.write({'state': 'done', 'date_end': fields.Datetime.now()})
+            sweep.message_post(body=_("Sweep completed: %s pairs scored, %s new potential duplicate links.") % (
+                sweep.pairs_scored, sweep.duplicates_found))
+        except Exception as e:
+            _logger.error("De-duplication sweep %s failed: %s", sweep.id, e, exc_info=True)
+            self.env.cr.rollback()
+            sweep.write({'state': 'error', 'error_message': str(e), 'date_end': fields.Datetime.now()})
+        finally:
+            if executor:
+                executor.shutdown()
+            self.env.cr.commit()
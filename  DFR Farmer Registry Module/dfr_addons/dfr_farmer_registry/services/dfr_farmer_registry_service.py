@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+from odoo import api, fields, models, tools, _
+import logging
+
+from ..utils.matching import normalize_name, canonical_national_id, phone_to_e164, compute_blocking_keys
+from ..utils import scoring
+
+_logger = logging.getLogger(__name__)
+
+# Farmer fields exposed to external systems
+EXTERNAL_FARMER_FIELDS = ['uid', 'name', 'sex', 'date_of_birth', 'status', 'kyc_status', 'administrative_area_id']
+
+# Optional pg_trgm GIN index on dfr_farmer.name_normalized, created by dfr.farmer init() when the extension is available
+NAME_TRIGRAM_INDEX = 'dfr_farmer_name_normalized_trgm_idx'
+
+class DfrFarmerRegistryService(models.AbstractModel):
+    _name = 'dfr.farmer.registry.service'
+    _description = 'DFR Farmer Registry Service'
+
+    @api.model
+    def _get_lookup_domain(self, search_criteria):
+        """
+        Builds a dfr.farmer domain from lookup criteria, on the indexed normalized columns:
+        identifiers and phone numbers match whatever their formatting, names match by
+        similarity (the domain restricts to the top-k of search_similar_farmers).
+
+        :param search_criteria: dict with any of 'uid', 'national_id', 'phone', 'name',
+                                'administrative_area_id' (or 'village')
+        :return: (domain or None if a criterion cannot match any farmer,
+                  {farmer_id: name similarity score} or None without name criterion)
+        """
+        domain = []
+        name_scores = None
+        if search_criteria.get('uid'):
+            domain.append(('uid', '=', search_criteria['uid'].strip()))
+        if search_criteria.get('national_id'):
+            national_id = canonical_national_id(search_criteria['national_id'])
+            if not national_id:
+                return None, None
+            domain.append(('national_id_canonical', '=', national_id))
+        if search_criteria.get('phone'):
+            phone = phone_to_e164(search_criteria['phone'], self.env['dfr.farmer']._get_phone_default_country_code())
+            if not phone:
+                return None, None
+            domain.append(('phone_e164', '=', phone))
+        if search_criteria.get('name'):
+            name_scores = dict(self.search_similar_farmers(search_criteria['name']))
+            if not name_scores:
+                return None, None
+            domain.append(('id', 'in', list(name_scores)))
+        area = search_criteria.get('administrative_area_id') or search_criteria.get('village')
+        if area:
+            try:
+                domain.append(('administrative_area_id', '=', int(area)))
+            except (TypeError, ValueError):
+                return None, None
+        return domain, name_scores
+
+    @api.model
+    def _format_farmer_external(self, row):
+        area = row.get('administrative_area_id')
+        return {
+            'id': row['id'],
+            'uid': row['uid'],
+            'name': row['name'],
+            'sex': row['sex'] or None,
+            'date_of_birth': fields.Date.to_string(row['date_of_birth']) if row['date_of_birth'] else None,
+            'status': row['status'],
+            'kyc_status': row['kyc_status'],
+            'administrative_area': {'id': area[0], 'name': area[1]} if area else None,
+        }
+
+    @api.model
+    def search_farmers_external(self, user, search_criteria, offset=0, limit=20):
+        """
+        Farmer lookup for authorized external systems (API gateway).
+        At least one criterion is required; record rules of the calling user apply.
+
+        :param user: res.users record of the external system's service account
+        :param search_criteria: dict of query parameters, see _get_lookup_domain
+        :return: (list of farmer dicts, total number of matching farmers)
+        """
+        domain, name_scores = self._get_lookup_domain(search_criteria)
+        if not domain:
+            return [], 0
+        Farmer = self.env['dfr.farmer'].with_user(user)
+        total_count = Farmer.search_count(domain)
+        if not total_count or offset >= total_count:
+            return [], total_count
+        if name_scores:
+            # Best matches first: at most the similarity limit of farmers, paginated in memory
+            rows = Farmer.search_read(domain, EXTERNAL_FARMER_FIELDS)
+            rows.sort(key=lambda row: (-name_scores.get(row['id'], 0), row['id']))
+            rows = rows[offset:offset + limit]
+        else:
+            rows = Farmer.search_read(domain, EXTERNAL_FARMER_FIELDS, offset=offset, limit=limit, order='id')
+        return [self._format_farmer_external(row) for row in rows], total_count
+
+    @api.model
+    def get_farmer_details_external(self, user, farmer_uid):
+        """ :return: farmer dict of the farmer with this UID, or None """
+        rows = self.env['dfr.farmer'].with_user(user).search_read([('uid', '=', farmer_uid)], EXTERNAL_FARMER_FIELDS, limit=1)
+        return self._format_farmer_external(rows[0]) if rows else None
+
+    @api.model
+    def find_farmer_by_identifier(self, identifier):
+        """
+        Identifies a farmer from a value entered on the portal: the DFR UID or the
+        national ID number, in any formatting.
+        :return: dfr.farmer record (empty if not found)
+        """
+        Farmer = self.env['dfr.farmer']
+        identifier = (identifier or '').strip()
+        if not identifier:
+            return Farmer
+        farmer = Farmer.search([('uid', '=', identifier)], limit=1)
+        national_id = canonical_national_id(identifier)
+        if not farmer and national_id:
+            farmer = Farmer.search([('national_id_canonical', '=', national_id)], limit=1)
+        return farmer
+
+    # --- Similar name search -------------------------------------------------
+
+    @api.model
+    def _get_name_similarity_config(self):
+        IrConfigParameter = self.env['ir.config_parameter'].sudo()
+        return {
+            # pg_trgm similarity (0-1) a name must reach to be returned
+            'threshold': float(IrConfigParameter.get_param('dfr.farmer.name_similarity.threshold', '0.3')),
+            'limit': int(IrConfigParameter.get_param('dfr.farmer.name_similarity.limit', '50')),
+        }
+
+    @api.model
+    @tools.ormcache()
+    def _has_name_trigram_index(self):
+        self.env.cr.execute("SELECT 1 FROM pg_indexes WHERE indexname = %s", (NAME_TRIGRAM_INDEX,))
+        return bool(self.env.cr.fetchone())
+
+    @api.model
+    def search_similar_farmers(self, name, limit=None, threshold=None, exclude_ids=None, exclude_statuses=()):
+        """
+        Top-k farmers whose name is most similar to the given one.
+        :return: list of (farmer_id, score 0-100), best first
+        """
+        return self.search_similar_farmers_batch([name], limit, threshold, exclude_ids, exclude_statuses)[0]
+
+    @api.model
+    def search_similar_farmers_batch(self, names, limit=None, threshold=None, exclude_ids=None, exclude_statuses=()):
+        """
+        Top-k most similar farmers of each name, in a single query using the pg_trgm
+        GIN index on name_normalized (trigram similarity, independent of token order).
+        Without the index, falls back to the Python scorer on the blocking-key candidates.
+        Archived farmers (active = False) are never returned.
+
+        :param names: list of str
+        :param limit: max number of farmers per name (default: dfr.farmer.name_similarity.limit)
+        :param threshold: minimum similarity, 0-1 (default: dfr.farmer.name_similarity.threshold)
+        :param exclude_ids: farmer ids never returned
+        :param exclude_statuses: farmer statuses never returned
+        :return: list aligned with names, each a list of (farmer_id, score 0-100), best first
+        """
+        config = self._get_name_similarity_config()
+        limit = limit or config['limit']
+        threshold = config['threshold'] if threshold is None else threshold
+        normalized_names = [normalize_name(name) for name in names]
+        results = [[] for _name in names]
+        if not any(normalized_names):
+            return results
+        self.env['dfr.farmer'].flush_model(['name_normalized', 'active', 'status'])
+        if self._has_name_trigram_index():
+            # The % operator uses the GIN index with the session threshold
+            self.env.cr.execute("SELECT set_config('pg_trgm.similarity_threshold', %s, true)", (str(threshold),))
+            self.env.cr.execute("""
+                SELECT q.idx, m.id, m.score
+                FROM unnest(%(names)s::varchar[]) WITH ORDINALITY AS q(name, idx)
+                CROSS JOIN LATERAL (
+                    SELECT f.id, similarity(f.name_normalized, q.name) AS score
+                    FROM dfr_farmer f
+                    WHERE f.name_normalized %% q.name
+                      AND f.active
+                      AND f.status <> ALL(%(statuses)s::varchar[])
+                      AND f.id <> ALL(%(exclude_ids)s::int[])
+                    ORDER BY score DESC, f.id
+                    LIMIT %(limit)s
+                ) m
+                WHERE q.name <> ''
+                ORDER BY q.idx, m.score DESC, m.id
+            """, {
+                'names': normalized_names,
+                'statuses': list(exclude_statuses),
+                'exclude_ids': list(exclude_ids or []),
+                'limit': limit,
+            })
+            for idx, farmer_id, score in self.env.cr.fetchall():
+                results[idx - 1].append((farmer_id, int(round(score * 100))))
+            return results
+        return self._search_similar_farmers_fallback(normalized_names, limit, threshold, exclude_ids, exclude_statuses)
+
+    @api.model
+    def _search_similar_farmers_fallback(self, normalized_names, limit, threshold, exclude_ids, exclude_statuses):
+        """ search_similar_farmers_batch without pg_trgm: blocking-key candidates scored in Python. """
+        results = [[] for _name in normalized_names]
+        if not scoring.is_available():
+            return results
+        keys_by_index = [compute_blocking_keys(name) for name in normalized_names]
+        blocks = self.env['dfr.farmer.blocking.key']._get_blocks(set().union(*keys_by_index))
+        candidate_ids = set().union(*blocks.values()) - set(exclude_ids or []) if blocks else set()
+        if not candidate_ids:
+            return results
+        domain = [('id', 'in', list(candidate_ids))]
+        if exclude_statuses:
+            domain.append(('status', 'not in', list(exclude_statuses)))
+        rows_by_id = {row['id']: row for row in self.env['dfr.farmer'].search_read(domain, ['name', 'name_normalized'])}
+        fuzzy_fields = {'name': int(threshold * 100)}
+        for index, keys in enumerate(keys_by_index):
+            candidate_rows = [rows_by_id[farmer_id] for farmer_id in sorted(set().union(*(blocks.get(key, ()) for key in keys)))
+                              if farmer_id in rows_by_id]
+            matches = scoring.score_candidates({'name': normalized_names[index]}, candidate_rows, fuzzy_fields)
+            matches.sort(key=lambda match: (-match[1], candidate_rows[match[0]]['id']))
+            results[index] = [(candidate_rows[j]['id'], score) for j, score, _fields in matches[:limit]]
+        return results
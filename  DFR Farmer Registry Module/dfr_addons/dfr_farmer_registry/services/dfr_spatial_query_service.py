@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+from odoo import api, models, _
+from odoo.exceptions import UserError
+from odoo.osv import expression
+import logging
+import math
+
+from ..utils import geohash
+
+_logger = logging.getLogger(__name__)
+
+# Spatially indexed models: (geohash field, latitude field, longitude field) of their position
+SPATIAL_INDEXES = {
+    'dfr.farmer': ('homestead_geohash', 'gps_latitude_homestead', 'gps_longitude_homestead'),
+    'dfr.plot': ('geohash', 'gps_latitude', 'gps_longitude'),
+}
+
+class DfrSpatialQueryService(models.AbstractModel):
+    """
+    Spatial queries on farmer homesteads and plots without PostGIS: bbox, radius and
+    k-nearest searches are narrowed by indexed geohash prefix lookups (see utils/geohash.py),
+    then checked exactly on the coordinates. Record rules of the current user apply.
+    """
+    _name = 'dfr.spatial.query.service'
+    _description = 'DFR Spatial Query Service'
+
+    @api.model
+    def _get_spatial_config(self):
+        IrConfigParameter = self.env['ir.config_parameter'].sudo()
+        return {
+            # Maximum number of geohash cells (prefix lookups) covering a searched area
+            'max_cover_cells': int(IrConfigParameter.get_param('dfr.spatial.max_cover_cells', '32')),
+            # First search radius of k-nearest searches, multiplied by 4 until k records are found
+            'knn_initial_radius_km': float(IrConfigParameter.get_param('dfr.spatial.knn_initial_radius_km', '1')),
+        }
+
+    @api.model
+    def _get_spatial_index(self, model_name):
+        if model_name not in SPATIAL_INDEXES:
+            raise UserError(_("Model %s has no spatial index.") % model_name)
+        return SPATIAL_INDEXES[model_name]
+
+    @api.model
+    def get_bbox_domain(self, model_name, bbox):
+        """
+        Domain of the records positioned within a bbox: geohash prefixes of the cells covering
+        the bbox (index range scans), then the exact coordinate ranges.
+
+        :param bbox: (west, south, east, north) in degrees; west > east crosses the antimeridian
+        """
+        geohash_field, latitude_field, longitude_field = self._get_spatial_index(model_name)
+        max_cells = self._get_spatial_config()['max_cover_cells']
+        west, south, east, north = bbox
+        parts = geohash.split_bbox(west, south, east, north)
+        cells = set()
+        for part in parts:
+            cells.update(geohash.cover_bbox(*part, max_cells=max(1, max_cells // len(parts))))
+        return expression.AND([
+            expression.OR([[(geohash_field, '=like', cell + '%')] for cell in sorted(cells)]),
+            [(latitude_field, '>=', south), (latitude_field, '<=', north)],
+            expression.OR([[(longitude_field, '>=', part_west), (longitude_field, '<=', part_east)]
+                           for part_west, _south, part_east, _north in parts]),
+        ])
+
+    @api.model
+    def get_bbox_intersect_domain(self, bbox):
+        """
+        Domain of the plots whose bounding box intersects a bbox (polygon extent, not only the
+        centroid). A plot is indexed by the smallest cell containing it: that cell is either
+        within a cell covering the bbox or one of its prefixes.
+        """
+        max_cells = self._get_spatial_config()['max_cover_cells']
+        west, south, east, north = bbox
+        parts = geohash.split_bbox(west, south, east, north)
+        cells, prefixes = set(), set()
+        for part in parts:
+            for cell in geohash.cover_bbox(*part, max_cells=max(1, max_cells // len(parts))):
+                cells.add(cell)
+                prefixes.update(cell[:length] for length in range(len(cell)))
+        return expression.AND([
+            expression.OR([[('bbox_geohash', '=like', cell + '%')] for cell in sorted(cells)]
+                          + [[('bbox_geohash', 'in', sorted(prefixes))]]),
+            [('bbox_south', '<=', north), ('bbox_north', '>=', south)],
+            expression.OR([[('bbox_west', '<=', part_east), ('bbox_east', '>=', part_west)]
+                           for part_west, _south, part_east, _north in parts]),
+        ])
+
+    @api.model
+    def search_bbox(self, model_name, bbox, domain=None, limit=None, order=None):
+        """
+        :param model_name: 'dfr.farmer' (homestead) or 'dfr.plot' (centroid)
+        :param bbox: (west, south, east, north) in degrees
+        :param domain: additional domain
+        :return: recordset of the records positioned within the bbox
+        """
+        return self.env[model_name].search(
+            expression.AND([domain or [], self.get_bbox_domain(model_name, bbox)]), limit=limit, order=order)
+
+    @api.model
+    def search_radius(self, model_name, latitude, longitude, radius_km, domain=None, limit=None):
+        """
+        Records positioned within `radius_km` of a position (great-circle distance).
+        :return: list of (record id, distance in km), nearest first
+        """
+        _geohash_field, latitude_field, longitude_field = self._get_spatial_index(model_name)
+        bbox = geohash.radius_bbox(latitude, longitude, radius_km)
+        rows = self.env[model_name].search_read(
+            expression.AND([domain or [], self.get_bbox_domain(model_name, bbox)]), [latitude_field, longitude_field])
+        results = []
+        for row in rows:
+            distance = geohash.haversine_km(latitude, longitude, row[latitude_field], row[longitude_field])
+            if distance <= radius_km:
+                results.append((row['id'], distance))
+        results.sort(key=lambda result: (result[1], result[0]))
+        return results[:limit] if limit else results
+
+    @api.model
+    def search_nearest(self, model_name, latitude, longitude, k=10, domain=None, max_radius_km=None):
+        """
+        k nearest records of a position: radius searches of growing radius until k records
+        are found (all records within a radius are found, so these are the k nearest).
+        :param max_radius_km: search limit (default: half the Earth's circumference)
+        :return: list of (record id, distance in km), nearest first, at most k
+        """
+        max_radius_km = max_radius_km or geohash.EARTH_RADIUS_KM * math.pi
+        radius_km = min(self._get_spatial_config()['knn_initial_radius_km'], max_radius_km)
+        while True:
+            results = self.search_radius(model_name, latitude, longitude, radius_km, domain=domain)
+            if len(results) >= k or radius_km >= max_radius_km:
+                return results[:k]
+            radius_km = min(radius_km * 4, max_radius_km)
+
+    @api.model
+    def find_overlapping_plots(self, plots, domain=None):
+        """
+        Candidate overlaps between plots: other active plots whose bounding box intersects
+        theirs. Polygons with intersecting bounding boxes may still be disjoint; an exact
+        geometry test, if needed, only has to run on these candidates.
+        :param plots: dfr.plot recordset
+        :return: dict {plot id: list of overlapping plot ids}
+        """
+        Plot = self.env['dfr.plot']
+        overlaps = {}
+        for plot in plots:
+            if not plot.geohash: # No position
+                overlaps[plot.id] = []
+                continue
+            bbox = (plot.bbox_west, plot.bbox_south, plot.bbox_east, plot.bbox_north)
+            overlaps[plot.id] = Plot.search(expression.AND([
+                domain or [], [('id', '!=', plot.id)], self.get_bbox_intersect_domain(bbox)])).ids
+        return overlaps
+
+    @api.model
+    def get_cells(self, model_name, precision, domain=None):
+        """
+        Records grouped by geohash cell of a precision, e.g. for one weather forecast per cell
+        instead of one per farmer. Single grouped query; record rules apply.
+        :return: list of dicts with 'geohash', 'latitude'/'longitude' (cell center) and 'count'
+        """
+        geohash_field, _latitude_field, _longitude_field = self._get_spatial_index(model_name)
+        Model = self.env[model_name]
+        Model.flush_model([geohash_field])
+        query = Model._where_calc(expression.AND([domain or [], [(geohash_field, '!=', False), (geohash_field, '!=', '')]]))
+        Model._apply_ir_rules(query, 'read')
+        from_clause, where_clause, where_params = query.get_sql()
+        self.env.cr.execute("""
+            SELECT left("%s"."%s", %%s) AS cell, count(*)
+            FROM %s WHERE %s
+            GROUP BY cell ORDER BY cell
+        """ % (Model._table, geohash_field, from_clause, where_clause or 'TRUE'), [precision] + where_params)
+        cells = []
+        for cell, count in self.env.cr.fetchall():
+            west, south, east, north = geohash.decode_bbox(cell)
+            cells.append({'geohash': cell, 'latitude': (south + north) / 2, 'longitude': (west + east) / 2, 'count': count})
+        return cells
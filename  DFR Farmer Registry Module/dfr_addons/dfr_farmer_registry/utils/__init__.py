@@ -0,0 +1,7 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+from . import matching
+from . import scoring
+from . import geohash
\ No newline at end of file
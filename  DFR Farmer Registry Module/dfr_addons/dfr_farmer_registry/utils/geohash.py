@@ -0,0 +1,183 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Geohash encoding and cell coverings used by the spatial index of farmers and plots
+(dfr.spatial.query.service). A geohash cell contains all the cells whose geohash it
+prefixes, so spatial lookups become indexed prefix searches on a varchar column.
+Kept free of ORM dependencies.
+"""
+
+import math
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+_BASE32_INDEX = {char: index for index, char in enumerate(BASE32)}
+
+# Precision of the stored geohashes (cells of about 1.2 m x 0.6 m)
+STORED_PRECISION = 10
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def encode(latitude, longitude, precision=STORED_PRECISION):
+    """
+    Geohash of a position.
+    :return: str of `precision` characters, or False for a missing/invalid position
+    """
+    if latitude is None or longitude is None or latitude is False or longitude is False:
+        return False
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        return False
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, bit_count, even = [], 0, 0, True
+    while len(chars) < precision:
+        value_range, value = (lon_range, longitude) if even else (lat_range, latitude)
+        middle = (value_range[0] + value_range[1]) / 2
+        bits <<= 1
+        if value >= middle:
+            bits |= 1
+            value_range[0] = middle
+        else:
+            value_range[1] = middle
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(BASE32[bits])
+            bits, bit_count = 0, 0
+    return ''.join(chars)
+
+
+def decode_bbox(geohash):
+    """ :return: (west, south, east, north) of a geohash cell """
+    lat_range, lon_range = [-90.0, 90.0], [-180.0, 180.0]
+    even = True
+    for char in geohash:
+        index = _BASE32_INDEX[char]
+        for shift in range(4, -1, -1):
+            value_range = lon_range if even else lat_range
+            middle = (value_range[0] + value_range[1]) / 2
+            if (index >> shift) & 1:
+                value_range[0] = middle
+            else:
+                value_range[1] = middle
+            even = not even
+    return lon_range[0], lat_range[0], lon_range[1], lat_range[1]
+
+
+def cell_size(precision):
+    """ :return: (width, height) in degrees of the cells of a precision """
+    lon_bits = (5 * precision + 1) // 2
+    lat_bits = 5 * precision // 2
+    return 360.0 / 2 ** lon_bits, 180.0 / 2 ** lat_bits
+
+
+def precision_for_width(width):
+    """ Highest precision (up to STORED_PRECISION) whose cells are at least `width` degrees wide. """
+    precision = 1
+    while precision < STORED_PRECISION and cell_size(precision + 1)[0] >= width:
+        precision += 1
+    return precision
+
+
+def common_prefix(geohashes):
+    """ Longest common prefix of geohashes: the smallest cell containing all of them. """
+    geohashes = [geohash for geohash in geohashes if geohash]
+    if not geohashes:
+        return ''
+    first, last = min(geohashes), max(geohashes)
+    length = 0
+    while length < min(len(first), len(last)) and first[length] == last[length]:
+        length += 1
+    return first[:length]
+
+
+def bbox_cell(west, south, east, north):
+    """ Geohash of the smallest cell containing a bbox ('' if it spans cells of the first level). """
+    corners = [encode(south, west), encode(south, east), encode(north, west), encode(north, east)]
+    return common_prefix(corners)
+
+
+def covering_precision(west, south, east, north, max_cells):
+    """ Highest precision at which at most `max_cells` cells cover the bbox. """
+    for precision in range(STORED_PRECISION, 0, -1):
+        width, height = cell_size(precision)
+        columns = math.floor(east / width) - math.floor(west / width) + 1
+        rows = math.floor(north / height) - math.floor(south / height) + 1
+        if columns * rows <= max_cells:
+            return precision
+    return 1
+
+
+def cover_bbox(west, south, east, north, max_cells=64):
+    """
+    Geohash cells covering a bbox (west <= east: split antimeridian-crossing bboxes first),
+    at the highest precision needing at most `max_cells` cells.
+    :return: sorted list of geohashes of the same length
+    """
+    precision = covering_precision(west, south, east, north, max_cells)
+    width, height = cell_size(precision)
+    cells = set()
+    for row in range(math.floor(south / height), math.floor(north / height) + 1):
+        latitude = min(max((row + 0.5) * height, -90.0), 90.0)
+        for column in range(math.floor(west / width), math.floor(east / width) + 1):
+            longitude = min(max((column + 0.5) * width, -180.0), 180.0)
+            cells.add(encode(latitude, longitude, precision))
+    return sorted(cells)
+
+
+def split_bbox(west, south, east, north):
+    """ Splits a bbox crossing the antimeridian (west > east) into two bboxes. """
+    if west <= east:
+        return [(west, south, east, north)]
+    return [(west, south, 180.0, north), (-180.0, south, east, north)]
+
+
+def radius_bbox(latitude, longitude, radius_km):
+    """ Bbox (west, south, east, north) containing the circle of `radius_km` around a position. """
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    south, north = max(latitude - delta_lat, -90.0), min(latitude + delta_lat, 90.0)
+    if south <= -90.0 or north >= 90.0:
+        return -180.0, south, 180.0, north # Contains a pole
+    delta_lon = math.degrees(math.asin(min(1.0, math.sin(radius_km / EARTH_RADIUS_KM) / math.cos(math.radians(latitude)))))
+    if delta_lon >= 180.0:
+        return -180.0, south, 180.0, north
+    west, east = longitude - delta_lon, longitude + delta_lon
+    if west < -180.0:
+        west += 360.0
+    if east > 180.0:
+        east -= 360.0
+    return west, south, east, north
+
+
+def haversine_km(latitude1, longitude1, latitude2, longitude2):
+    """ Great-circle distance between two positions, in kilometres. """
+    phi1, phi2 = math.radians(latitude1), math.radians(latitude2)
+    delta_phi = phi2 - phi1
+    delta_lambda = math.radians(longitude2 - longitude1)
+    a = math.sin(delta_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(delta_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def geometry_bbox(geometry):
+    """
+    Bbox of a GeoJSON geometry (a Feature's geometry is used).
+    :return: (west, south, east, north), or None without valid coordinates
+    """
+    if isinstance(geometry, dict) and geometry.get('type') == 'Feature':
+        geometry = geometry.get('geometry')
+    if not isinstance(geometry, dict):
+        return None
+    longitudes, latitudes = [], []
+    stack = [geometry.get('coordinates')]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, (list, tuple)):
+            if len(value) >= 2 and all(isinstance(coordinate, (int, float)) for coordinate in value[:2]):
+                longitudes.append(value[0])
+                latitudes.append(value[1])
+            else:
+                stack.extend(value)
+    if not longitudes:
+        return None
+    return min(longitudes), min(latitudes), max(longitudes), max(latitudes)
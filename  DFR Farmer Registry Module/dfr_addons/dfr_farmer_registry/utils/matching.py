@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Pure-Python helpers used by the de-duplication service to normalize farmer
+names, national IDs and phone numbers and to derive blocking keys. Kept free
+of ORM dependencies so they can be reused by batch jobs and worker processes.
+"""
+
+import re
+import unicodedata
+
+_WHITESPACE_RE = re.compile(r'\s+')
+_ID_SEPARATORS_RE = re.compile(r'[^A-Z0-9]')
+_NON_DIGIT_RE = re.compile(r'\D')
+
+# Stored dfr.farmer columns holding the normalized value of a matching field
+NORMALIZED_COLUMNS = {
+    'name': 'name_normalized',
+    'national_id_number': 'national_id_canonical',
+    'contact_phone': 'phone_e164',
+}
+
+# Blocking key type prefixes (stored as part of the key so lookups use a single indexed column)
+KEY_PHONETIC = 'ph'
+KEY_SORTED_TOKENS = 'st'
+KEY_PREFIX_BIRTH_YEAR = 'py'
+
+NAME_PREFIX_LENGTH = 3
+
+_SOUNDEX_CODES = {}
+for _letters, _code in (('bfpv', '1'), ('cgjkqsxz', '2'), ('dt', '3'), ('l', '4'), ('mn', '5'), ('r', '6')):
+    for _letter in _letters:
+        _SOUNDEX_CODES[_letter] = _code
+
+
+def normalize_name(name):
+    """
+    Case-folds a name, strips diacritics, replaces punctuation by spaces and collapses
+    whitespace. Letters of every script are kept (e.g. 'José  Pérez' -> 'jose perez',
+    'Абебе Кебеде' -> 'абебе кебеде'): names are not transliterated.
+    :param name: str or False
+    :return: str, normalized name ('' if empty)
+    """
+    if not name:
+        return ''
+    decomposed = unicodedata.normalize('NFKD', str(name).casefold())
+    # Diacritics decompose into combining marks (non-zero combining class); spacing vowel signs
+    # of Indic scripts have class 0 and are kept, as part of the word
+    folded = ''.join(
+        char if char.isalnum() or unicodedata.category(char).startswith('M') else ' '
+        for char in decomposed if not unicodedata.combining(char)
+    )
+    folded = unicodedata.normalize('NFC', folded) # Recomposes e.g. Hangul syllables
+    return _WHITESPACE_RE.sub(' ', folded).strip()
+
+
+def name_tokens(name):
+    """ Returns the list of tokens of the normalized name. """
+    normalized = normalize_name(name)
+    return normalized.split(' ') if normalized else []
+
+
+def soundex(token):
+    """
+    Classic American Soundex code of a single token (e.g. 'robert' -> 'R163').
+    Only Latin letters are coded: other scripts have no Soundex.
+    :return: str, 4 character code or '' for tokens without Latin letters.
+    """
+    letters = [c for c in token.lower() if 'a' <= c <= 'z']
+    if not letters:
+        return ''
+    first_letter = letters[0]
+    code = first_letter.upper()
+    previous_digit = _SOUNDEX_CODES.get(first_letter, '')
+    for letter in letters[1:]:
+        digit = _SOUNDEX_CODES.get(letter, '')
+        if digit and digit != previous_digit:
+            code += digit
+            if len(code) == 4:
+                break
+        if letter not in 'hw': # 'h' and 'w' do not separate letters with the same code
+            previous_digit = digit
+    return code.ljust(4, '0')
+
+
+def compute_blocking_keys(name, date_of_birth=None):
+    """
+    Derives the set of blocking keys for a farmer. Two records can only be
+    fuzzy-compared if they share at least one key.
+
+    - phonetic: sorted Soundex codes of the first and last name tokens
+      (tolerates spelling variants and swapped name order; Latin script names only)
+    - sorted tokens: all normalized name tokens sorted alphabetically
+    - prefix + birth year: first letters of each name token combined with the year of birth
+
+    :param name: str, farmer full name
+    :param date_of_birth: date, str ('YYYY-MM-DD') or False
+    :return: set of str keys, each prefixed by its key type
+    """
+    tokens = name_tokens(name)
+    if not tokens:
+        return set()
+
+    keys = set()
+    edge_codes = sorted(code for code in {soundex(tokens[0]), soundex(tokens[-1])} if code)
+    if edge_codes:
+        keys.add('%s:%s' % (KEY_PHONETIC, '|'.join(edge_codes)))
+
+    keys.add('%s:%s' % (KEY_SORTED_TOKENS, ' '.join(sorted(tokens))))
+
+    birth_year = None
+    if date_of_birth:
+        birth_year = date_of_birth.year if hasattr(date_of_birth, 'year') else str(date_of_birth)[:4]
+    if birth_year:
+        for token in tokens:
+            keys.add('%s:%s|%s' % (KEY_PREFIX_BIRTH_YEAR, token[:NAME_PREFIX_LENGTH], birth_year))
+    return keys
+
+
+def sorted_name_tokens(name):
+    """ Normalized name tokens in alphabetical order, e.g. 'Smith, John' -> 'john smith'. """
+    return ' '.join(sorted(name_tokens(name)))
+
+
+def canonical_national_id(value):
+    """
+    Canonical form of a national ID number: upper-case, separators and spaces stripped
+    (e.g. ' ab-123 456 ' -> 'AB123456').
+    :return: str or False if empty
+    """
+    if not value:
+        return False
+    folded = unicodedata.normalize('NFKD', str(value)).encode('ascii', 'ignore').decode('ascii').upper()
+    return _ID_SEPARATORS_RE.sub('', folded) or False
+
+
+def phone_to_e164(phone, default_country_code=None):
+    """
+    Best-effort E.164 formatting of a phone number ('+' followed by country code and
+    subscriber number). Numbers in national format (leading 0 or no prefix) need the
+    default country calling code.
+
+    :param phone: str
+    :param default_country_code: str or int country calling code, e.g. '677'
+    :return: str, e.g. '+6771234567', or False if the number cannot be normalized
+    """
+    if not phone:
+        return False
+    phone = str(phone).strip()
+    digits = _NON_DIGIT_RE.sub('', phone)
+    if not digits:
+        return False
+    if phone.startswith('+'):
+        e164_digits = digits
+    elif digits.startswith('00'): # International call prefix
+        e164_digits = digits[2:]
+    elif default_country_code:
+        e164_digits = str(default_country_code).lstrip('+') + digits.lstrip('0')
+    else:
+        return False
+    if not 8 <= len(e164_digits) <= 15: # E.164: at most 15 digits, country code included
+        return False
+    return '+' + e164_digits
+
+
+def normalize_field_value(field_name, value, default_country_code=None):
+    """ Normalized value of a matching field, as stored in its NORMALIZED_COLUMNS column. """
+    if field_name == 'name':
+        return normalize_name(value) or False
+    if field_name == 'national_id_number':
+        return canonical_national_id(value)
+    if field_name == 'contact_phone':
+        return phone_to_e164(value, default_country_code)
+    return value
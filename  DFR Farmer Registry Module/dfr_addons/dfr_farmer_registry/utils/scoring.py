@@ -0,0 +1,210 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Batched similarity scoring for farmer de-duplication.
+
+Field values are normalized once, then scored as a whole matrix (one query
+against N candidates, or two candidate lists) instead of one pair at a time.
+rapidfuzz's cdist is used when available; fuzzywuzzy is the pure-Python
+fallback. Like matching.py, this module has no ORM dependency so it can run
+in the batch sweep's worker processes.
+"""
+
+import logging
+
+from .matching import normalize_name, NORMALIZED_COLUMNS
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import numpy as np
+    from rapidfuzz import fuzz as rf_fuzz, process as rf_process
+except ImportError:
+    np = rf_fuzz = rf_process = None
+
+try:
+    from fuzzywuzzy import fuzz as fw_fuzz
+except ImportError:
+    fw_fuzz = None
+
+if not rf_process and not fw_fuzz:
+    _logger.warning("Neither 'rapidfuzz' nor 'fuzzywuzzy' is installed. De-duplication fuzzy matching will be disabled.")
+
+SCORER_TOKEN_SET_RATIO = 'token_set_ratio'
+SCORER_RATIO = 'ratio'
+
+# Names are compared token-wise (order independent), other fields character-wise
+FIELD_SCORERS = {
+    'name': SCORER_TOKEN_SET_RATIO,
+}
+
+# Fields whose stored normalized column holds exactly normalize_name() of the value,
+# so rows read with that column are not normalized again
+PRECOMPUTED_FIELDS = ('name',)
+
+
+def get_backend():
+    """ :return: 'rapidfuzz', 'fuzzywuzzy' or None when fuzzy scoring is unavailable """
+    if rf_process:
+        return 'rapidfuzz'
+    if fw_fuzz:
+        return 'fuzzywuzzy'
+    return None
+
+
+def is_available():
+    return get_backend() is not None
+
+
+def _normalized_values(records, field_name):
+    column = NORMALIZED_COLUMNS.get(field_name) if field_name in PRECOMPUTED_FIELDS else None
+    if column:
+        return [record.get(column) or normalize_name(record.get(field_name)) for record in records]
+    return [normalize_name(record.get(field_name)) for record in records]
+
+
+def field_score_matrix(queries, choices, scorer_name, score_cutoff=0):
+    """
+    Scores every normalized query string against every normalized choice.
+    Scores below score_cutoff and comparisons involving an empty value are 0.
+
+    :param queries: list of normalized str
+    :param choices: list of normalized str
+    :param scorer_name: SCORER_TOKEN_SET_RATIO or SCORER_RATIO
+    :return: len(queries) x len(choices) matrix of int scores (numpy array with rapidfuzz, else list of lists)
+    """
+    if rf_process:
+        matrix = rf_process.cdist(queries, choices, scorer=getattr(rf_fuzz, scorer_name),
+                                  score_cutoff=score_cutoff or None, dtype=np.uint8)
+        matrix[np.array([not value for value in queries], dtype=bool), :] = 0
+        matrix[:, np.array([not value for value in choices], dtype=bool)] = 0
+        return matrix
+    if not fw_fuzz:
+        raise RuntimeError("No fuzzy matching library available.")
+    scorer = getattr(fw_fuzz, scorer_name)
+    matrix = []
+    for query in queries:
+        row = []
+        for choice in choices:
+            score = scorer(query, choice) if query and choice else 0
+            row.append(score if score >= score_cutoff else 0)
+        matrix.append(row)
+    return matrix
+
+
+def score_matrix(query_records, candidate_records, fuzzy_fields, weights=None):
+    """
+    Weighted fuzzy score of every query record against every candidate record.
+
+    A field contributes only if its score reaches the field threshold; the combined
+    score is the weighted mean of the contributing fields (0 if none contributes).
+
+    :param query_records: list of dicts of field values
+    :param candidate_records: list of dicts of field values
+    :param fuzzy_fields: {field_name: threshold}
+    :param weights: {field_name: weight}, missing fields weigh 1
+    :return: (scores, field_scores) - combined matrix and {field_name: matrix}
+    """
+    weights = weights or {}
+    field_scores = {
+        field_name: field_score_matrix(
+            _normalized_values(query_records, field_name),
+            _normalized_values(candidate_records, field_name),
+            FIELD_SCORERS.get(field_name, SCORER_RATIO),
+            score_cutoff=threshold,
+        )
+        for field_name, threshold in fuzzy_fields.items()
+    }
+    rows, cols = len(query_records), len(candidate_records)
+
+    if rf_process:
+        weighted_sum = np.zeros((rows, cols), dtype=np.float64)
+        weight_total = np.zeros((rows, cols), dtype=np.float64)
+        for field_name, matrix in field_scores.items():
+            weight = float(weights.get(field_name, 1))
+            weighted_sum += matrix * weight
+            weight_total += (matrix > 0) * weight
+        scores = np.zeros((rows, cols), dtype=np.int32)
+        np.floor_divide(weighted_sum, weight_total, out=scores, where=weight_total > 0, casting='unsafe')
+        return scores, field_scores
+
+    scores = []
+    for i in range(rows):
+        row = []
+        for j in range(cols):
+            weighted_sum = weight_total = 0.0
+            for field_name, matrix in field_scores.items():
+                if matrix[i][j]:
+                    weight = float(weights.get(field_name, 1))
+                    weighted_sum += matrix[i][j] * weight
+                    weight_total += weight
+            row.append(int(weighted_sum / weight_total) if weight_total else 0)
+        scores.append(row)
+    return scores, field_scores
+
+
+def _match_fields(field_scores, i, j):
+    return ["%s (%s%%)" % (field_name, int(matrix[i][j])) for field_name, matrix in field_scores.items() if matrix[i][j]]
+
+
+def _iter_nonzero(scores):
+    """ Yields (i, j) of the non-zero cells of a score matrix, in row order. """
+    if np is not None and isinstance(scores, np.ndarray):
+        for i, j in zip(*np.nonzero(scores)):
+            yield int(i), int(j)
+        return
+    for i, row in enumerate(scores):
+        for j, score in enumerate(row):
+            if score:
+                yield i, j
+
+
+def score_candidates(query_record, candidate_records, fuzzy_fields, weights=None):
+    """
+    Scores one record against N candidates in a single batched call.
+    :return: list of (candidate_index, score, match_fields) for candidates with a non-zero score
+    """
+    if not candidate_records or not fuzzy_fields:
+        return []
+    scores, field_scores = score_matrix([query_record], candidate_records, fuzzy_fields, weights)
+    return [(j, int(scores[0][j]), _match_fields(field_scores, 0, j)) for _i, j in _iter_nonzero(scores)]
+
+
+def score_cross(left_records, right_records, fuzzy_fields, weights=None):
+    """
+    Scores every record of one list against every record of another.
+    :return: list of (left_index, right_index, score, match_fields) for non-zero scores
+    """
+    if not left_records or not right_records or not fuzzy_fields:
+        return []
+    scores, field_scores = score_matrix(left_records, right_records, fuzzy_fields, weights)
+    return [(i, j, int(scores[i][j]), _match_fields(field_scores, i, j)) for i, j in _iter_nonzero(scores)]
+
+
+def score_block(block_rows, rules):
+    """
+    Scores every pair of records of one block with one batched fuzzy matrix. Exact and
+    combo rules are not evaluated here: the batch sweep finds those pairs set-based in SQL.
+    Designed to run in a worker process: takes and returns plain, picklable data only.
+
+    :param block_rows: list of record dicts, each with an 'id' key
+    :param rules: dict with 'fuzzy_fields' ({field: threshold}) and optionally 'fuzzy_weights' ({field: weight})
+    :return: list of (id_low, id_high, score, match_fields)
+    """
+    if not rules['fuzzy_fields'] or not is_available() or len(block_rows) < 2:
+        return []
+    scores, field_scores = score_matrix(block_rows, block_rows, rules['fuzzy_fields'], rules.get('fuzzy_weights'))
+    results = []
+    for i, j in _iter_nonzero(scores):
+        if i >= j: # Symmetric matrix: upper triangle only
+            continue
+        id_low, id_high = sorted((block_rows[i]['id'], block_rows[j]['id']))
+        results.append((id_low, id_high, int(scores[i][j]), _match_fields(field_scores, i, j)))
+    return results
+
+
+def score_block_task(task):
+    """ Single-argument wrapper of score_block for executor.map. """
+    return score_block(*task)
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# Part of Odoo.
+# See LICENSE file for full copyright and licensing details.
+
+"""
+Benchmark of the batched de-duplication scoring engine (scoring.py) against the
+previous per-pair loop of dfr.deduplication.service.find_potential_duplicates.
+
+Not loaded by Odoo. Run from the module directory:
+
+    python -m utils.scoring_benchmark [--sizes 100,10000,1000000] [--json report.json]
+
+Each size is a number of comparisons, laid out as a query list x candidate list
+(100 = 1 query against 100 candidates, the real-time shape; larger sizes are
+square, the batch sweep shape).
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import time
+
+from . import scoring
+
+FIRST_NAMES = ['john', 'mary', 'peter', 'grace', 'joseph', 'ruth', 'samuel', 'esther', 'david', 'alice',
+               'moses', 'sarah', 'daniel', 'rebecca', 'paul', 'naomi', 'james', 'lydia', 'simon', 'martha']
+LAST_NAMES = ['kamau', 'otieno', 'wanjiru', 'tanaka', 'bakari', 'mensah', 'okafor', 'ndlovu', 'mwangi', 'phiri',
+              'banda', 'tembo', 'kiplagat', 'achieng', 'moyo', 'dlamini', 'zulu', 'kone', 'diallo', 'toure']
+
+FUZZY_FIELDS = {'name': 85}
+
+
+def _typo(name, rng):
+    """ Introduces a single character edit, as produced by manual data entry. """
+    position = rng.randrange(len(name))
+    return name[:position] + rng.choice('aeiounrst') + name[position + 1:]
+
+
+def generate_records(count, rng):
+    records = []
+    for index in range(count):
+        name = '%s %s' % (rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES))
+        if rng.random() < 0.2:
+            name = _typo(name, rng)
+        records.append({'id': index + 1, 'name': name})
+    return records
+
+
+def baseline_per_pair(query_records, candidate_records, fuzzy_fields):
+    """ The former loop: one fuzzywuzzy call per candidate and field, on lower-cased strings. """
+    fuzz = scoring.fw_fuzz or scoring.rf_fuzz
+    matches = 0
+    for query in query_records:
+        for candidate in candidate_records:
+            total_score = total_weight = 0
+            for field_name, threshold in fuzzy_fields.items():
+                if query.get(field_name) and candidate.get(field_name):
+                    value1 = str(query[field_name]).lower()
+                    value2 = str(candidate[field_name]).lower()
+                    if field_name == 'name':
+                        score = fuzz.token_set_ratio(value1, value2)
+                    else:
+                        score = fuzz.ratio(value1, value2)
+                    if score >= threshold:
+                        total_score += score
+                        total_weight += 1
+            if total_weight:
+                matches += 1
+    return matches
+
+
+def batched(query_records, candidate_records, fuzzy_fields):
+    return len(scoring.score_cross(query_records, candidate_records, fuzzy_fields))
+
+
+def _shape(comparisons):
+    if comparisons <= 100:
+        return 1, comparisons
+    side = int(math.isqrt(comparisons))
+    return side, comparisons // side
+
+
+def run(sizes, seed=42):
+    rng = random.Random(seed)
+    results = []
+    for comparisons in sizes:
+        rows, cols = _shape(comparisons)
+        queries, candidates = generate_records(rows, rng), generate_records(cols, rng)
+        result = {'comparisons': rows * cols, 'shape': [rows, cols], 'backend': scoring.get_backend()}
+        for label, function in (('per_pair', baseline_per_pair), ('batched', batched)):
+            started = time.perf_counter()
+            result['%s_matches' % label] = function(queries, candidates, FUZZY_FIELDS)
+            result['%s_seconds' % label] = round(time.perf_counter() - started, 4)
+        result['speedup'] = round(result['per_pair_seconds'] / result['batched_seconds'], 1) if result['batched_seconds'] else None
+        results.append(result)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', default='100,10000,1000000', help="Comma-separated comparison counts.")
+    parser.add_argument('--json', dest='json_path', help="Write the results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    if not scoring.is_available():
+        print("No fuzzy matching library (rapidfuzz / fuzzywuzzy) installed; nothing to benchmark.", file=sys.stderr)
+        return 1
+    results = run([int(size) for size in args.sizes.split(',') if size.strip()])
+
+    print("%-12s %-12s %12s %12s %9s %9s" % ('comparisons', 'shape', 'per-pair (s)', 'batched (s)', 'speedup', 'matches'))
+    for result in results:
+        print("%-12s %-12s %12.4f %12.4f %8sx %9s" % (
+            result['comparisons'], '%sx%s' % tuple(result['shape']), result['per_pair_seconds'],
+            result['batched_seconds'], result['speedup'], result['batched_matches']))
+    if args.json_path:
+        with open(args.json_path, 'w') as report:
+            json.dump({'backend': scoring.get_backend(), 'results': results}, report, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -28,6 +28,12 @@ class DfrDeduplicationReviewWizard(models.TransientModel):
         domain="[('id', 'in', farmer_ids_to_review)]", # Limit selection to initial set
         help="The farmer record that is the main subject of this review session."
     )
+    cluster_id = fields.Many2one(
+        'dfr.deduplication.cluster',
+        string='Duplicate Cluster',
+        readonly=True,
+        help="Cluster of the Primary Farmer: all farmers transitively linked as potential duplicates."
+    )
     # This field will list potential duplicates specifically OF the selected_farmer_id
     potential_duplicate_ids_of_selected = fields.Many2many(
         'dfr.farmer',
@@ -61,6 +67,17 @@ class DfrDeduplicationReviewWizard(models.TransientModel):
     # For now, merge service will use configured strategy.
     # field_merge_choices_json = fields.Text(string='Field Merge Choices (JSON)')
 
+    @api.model
+    def _get_review_candidates(self, primary_farmer):
+        """
+        Returns (cluster, farmers to review against primary_farmer): the whole duplicate
+        cluster, loaded in one read, or the direct links if the farmer has no cluster yet.
+        """
+        cluster = primary_farmer.deduplication_cluster_id
+        if cluster:
+            return cluster, cluster.member_ids - primary_farmer
+        return cluster, primary_farmer.deduplication_potential_duplicate_ids
+
     # --- Default Methods ---
     @api.model
     def default_get(self, fields_list):
@@ -75,15 +92,19 @@ class DfrDeduplicationReviewWizard(models.TransientModel):
             if len(farmers_in_context) == 1:
                 primary_farmer = farmers_in_context[0]
                 res['selected_farmer_id'] = primary_farmer.id
-                # Populate potential_duplicate_ids_of_selected based on the primary farmer's links
+                # Populate potential_duplicate_ids_of_selected based on the primary farmer's cluster
                 # This ensures the wizard opens with relevant data for a single farmer review
-                res['potential_duplicate_ids_of_selected'] = [(6, 0, primary_farmer.deduplication_potential_duplicate_ids.ids)]
+                cluster, candidates = self._get_review_candidates(primary_farmer)
+                res['cluster_id'] = cluster.id
+                res['potential_duplicate_ids_of_selected'] = [(6, 0, candidates.ids)]
             elif len(farmers_in_context) > 1:
                 # If multiple selected, default first one as primary. User can change.
                 # Or, could have a different mode of wizard for batch review vs single deep dive.
                 # For now, focus on single primary deep dive.
                 res['selected_farmer_id'] = farmers_in_context[0].id
-                res['potential_duplicate_ids_of_selected'] = [(6, 0, farmers_in_context[0].deduplication_potential_duplicate_ids.ids)]
+                cluster, candidates = self._get_review_candidates(farmers_in_context[0])
+                res['cluster_id'] = cluster.id
+                res['potential_duplicate_ids_of_selected'] = [(6, 0, candidates.ids)]
                 # User might need to pick one from farmer_ids_to_review as the primary subject.
         return res
 
@@ -91,10 +112,13 @@ class DfrDeduplicationReviewWizard(models.TransientModel):
     @api.onchange('selected_farmer_id')
     def _onchange_selected_farmer_id(self):
         if self.selected_farmer_id:
-            self.potential_duplicate_ids_of_selected = [(6, 0, self.selected_farmer_id.deduplication_potential_duplicate_ids.ids)]
+            cluster, candidates = self._get_review_candidates(self.selected_farmer_id)
+            self.cluster_id = cluster
+            self.potential_duplicate_ids_of_selected = [(6, 0, candidates.ids)]
             self.farmer_to_compare_merge_id = False # Reset comparison target
             self.comparison_data_html = False # Clear comparison
         else:
+            self.cluster_id = False
             self.potential_duplicate_ids_of_selected = False
             self.farmer_to_compare_merge_id = False
             self.comparison_data_html = False
@@ -228,6 +252,10 @@ class DfrDeduplicationReviewWizard(models.TransientModel):
         primary_farmer = self.selected_farmer_id
         record_to_unflag = self.farmer_to_compare_merge_id
 
+        # Remember the decision in both directions so batch sweeps do not flag the pair again
+        primary_farmer.write({'deduplication_not_duplicate_ids': [(4, record_to_unflag.id)]})
+        record_to_unflag.write({'deduplication_not_duplicate_ids': [(4, primary_farmer.id)]})
+
         # Remove the 'not duplicate' record from the primary's potential duplicates list
         if record_to_unflag in primary_farmer.deduplication_potential_duplicate_ids:
             primary_farmer.write({'deduplication_potential_duplicate_ids': [(3, record_to_unflag.id)]})
@@ -253,8 +281,14 @@ class DfrDeduplicationReviewWizard(models.TransientModel):
                                           dict(record_to_unflag._fields['status'].selection).get(new_status))
             _logger.info("Farmer %s (ID: %s) status updated to '%s'.", record_to_unflag.uid, record_to_unflag.id, new_status)
 
+        # The removed link may split the cluster
+        if primary_farmer.deduplication_cluster_id:
+            self.env['dfr.deduplication.cluster']._rebuild_clusters(primary_farmer.deduplication_cluster_id.ids)
+
         # Refresh the wizard's view of potential duplicates for the primary farmer
-        self.potential_duplicate_ids_of_selected = [(6, 0, primary_farmer.deduplication_potential_duplicate_ids.ids)]
+        cluster, candidates = self._get_review_candidates(primary_farmer)
+        self.cluster_id = cluster
+        self.potential_duplicate_ids_of_selected = [(6, 0, candidates.ids)]
         self.farmer_to_compare_merge_id = False # Clear selection
         self.comparison_data_html = False # Clear comparison view
 
@@ -213,9 +213,8 @@ class FarmerPortalController(http.Controller):
         farmer_identifier_value = post.get('farmer_uid_identifier') # Example field name
         
         if farmer_identifier_value: # If form requires explicit farmer identification
-            # Assuming 'uid' is the field on 'dfr.farmer' to search by.
-            # This search should ideally be done by a service in dfr_farmer_registry.
-            farmer_record = request.env['dfr.farmer'].sudo().search([('uid', '=', farmer_identifier_value)], limit=1)
+            # Matches the DFR UID or the national ID number (indexed normalized column)
+            farmer_record = request.env['dfr.farmer.registry.service'].sudo().find_farmer_by_identifier(farmer_identifier_value)
             if not farmer_record:
                 errors['farmer_uid_identifier'] = _("Farmer with identifier '%s' not found.") % farmer_identifier_value
         # else: if form doesn't require explicit farmer ID on submission (e.g. for anonymous surveys, or if user is logged in - not covered here)
@@ -0,0 +1,19 @@
+import os
+
+import pytest
+
+
+@pytest.fixture
+def odoo_native_env():
+    """
+    Native Odoo environment on DFR_ODOO_DB (the odoo package must be importable, e.g. run with
+    the Python of the Odoo server). The transaction is rolled back after the test.
+    """
+    db_name = os.getenv("DFR_ODOO_DB")
+    if not db_name:
+        pytest.skip("Farmer registry integration tests need a database (set DFR_ODOO_DB).")
+    odoo = pytest.importorskip("odoo")
+    from odoo.modules.registry import Registry
+    with Registry(db_name).cursor() as cr:
+        yield odoo.api.Environment(cr, odoo.SUPERUSER_ID, {})
+        cr.rollback()
@@ -0,0 +1,46 @@
+import time
+
+import pytest
+
+from dfr.testing.automation.utils.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Names from which no blocking key can be derived
+KEYLESS_NAMES = ['...', '- -', '()']
+
+
+@pytest.mark.integration
+@pytest.mark.deduplication
+def test_backfill_progresses_over_keyless_farmers(odoo_native_env):
+    """
+    Farmers whose name yields no blocking key are marked as indexed, so the backfill (and the
+    batch sweep, which runs it until no farmer is left) does not select them forever and
+    reaches the farmers after them.
+    """
+    env = odoo_native_env
+    run_prefix = f"KEYLESS{int(time.time())}-"
+    Farmer = env['dfr.farmer']
+    BlockingKey = env['dfr.farmer.blocking.key']
+    keyless = Farmer.create([{'name': name, 'uid': f'{run_prefix}{index}'} for index, name in enumerate(KEYLESS_NAMES)])
+    keyed = Farmer.create({'name': 'Abebe Kebede', 'uid': f'{run_prefix}keyed'})
+    farmers = keyless | keyed
+    assert not BlockingKey.search_count([('farmer_id', 'in', keyless.ids)])
+
+    # Farmers imported with SQL: neither keys nor indexed flag
+    env.cr.execute("DELETE FROM dfr_farmer_blocking_key WHERE farmer_id = ANY(%s)", (farmers.ids,))
+    env.cr.execute("UPDATE dfr_farmer SET blocking_keys_indexed = NULL WHERE id = ANY(%s)", (farmers.ids,))
+    farmers.invalidate_recordset(['blocking_keys_indexed'])
+
+    pending = BlockingKey._count_farmers_to_backfill()
+    calls = 0
+    # Batches smaller than the keyless farmers: the keyed farmer is only reached if keyless ones are not reselected
+    while BlockingKey._cron_backfill_blocking_keys(batch_size=len(KEYLESS_NAMES) - 1):
+        calls += 1
+        assert calls <= pending, "Blocking key backfill selects the same farmers again"
+    logger.info(f"Blocking key backfill of {pending} farmers done in {calls} batches.")
+
+    assert all(farmers.mapped('blocking_keys_indexed'))
+    assert not BlockingKey.search_count([('farmer_id', 'in', keyless.ids)])
+    assert BlockingKey.search_count([('farmer_id', '=', keyed.id)])
+    assert BlockingKey._count_farmers_to_backfill() == 0
@@ -0,0 +1,168 @@
+import os
+import time
+
+import pytest
+
+from dfr.testing.automation.integration_tests_odoo.common.odoo_test_helper import OdooTestHelper
+from dfr.testing.automation.integration_tests_odoo.common import synthetic_registry
+from dfr.testing.automation.utils import reporting_utils
+from dfr.testing.automation.utils.logger_setup import setup_logger
+
+logger = setup_logger(__name__)
+
+# Benchmark parameters (environment variables)
+BENCHMARK_SIZES = [int(size) for size in os.getenv("DFR_DEDUP_BENCHMARK_SIZES", "10000,100000,1000000").split(",") if size.strip()]
+REALTIME_SAMPLE_SIZE = int(os.getenv("DFR_DEDUP_BENCHMARK_REALTIME_SAMPLE", "1000"))
+DUPLICATE_RATE = float(os.getenv("DFR_DEDUP_BENCHMARK_DUPLICATE_RATE", "0.1"))
+LOAD_CHUNK_SIZE = 5000
+REGRESSION_TOLERANCE = float(os.getenv("DFR_DEDUP_BENCHMARK_TOLERANCE", "0.2"))
+
+FARMER_FIELDS = ('name', 'date_of_birth', 'sex', 'national_id_number', 'contact_phone')
+REALTIME_PARAM = 'dfr.deduplication.realtime.enabled'
+
+# Results of all sizes, written as one report at the end of the module
+BENCHMARK_RESULTS = {}
+
+
+def _ids(result):
+    """ Record ids of an ORM result, for both a native env (recordsets) and an RPC env (ids). """
+    if hasattr(result, 'ids'):
+        return result.ids
+    return result if isinstance(result, list) else [result]
+
+
+def _farmer_vals(record, run_prefix):
+    vals = {field_name: record[field_name] for field_name in FARMER_FIELDS if record[field_name]}
+    vals['uid'] = run_prefix + record['ref'] # Maps farmer ids back to the synthetic records
+    return vals
+
+
+def _load_farmers(env, records, run_prefix):
+    Farmer = env['dfr.farmer']
+    started = time.perf_counter()
+    for start in range(0, len(records), LOAD_CHUNK_SIZE):
+        Farmer.create([_farmer_vals(record, run_prefix) for record in records[start:start + LOAD_CHUNK_SIZE]])
+    return time.perf_counter() - started
+
+
+def _linked_pairs(env, run_prefix):
+    """ Potential duplicate links between farmers of this run, as sorted (ref, ref) pairs. """
+    rows = env['dfr.farmer'].search_read([('uid', '=like', run_prefix + '%')], ['uid', 'deduplication_potential_duplicate_ids'])
+    ref_by_id = {row['id']: row['uid'][len(run_prefix):] for row in rows}
+    return {
+        tuple(sorted((ref_by_id[row['id']], ref_by_id[linked_id])))
+        for row in rows for linked_id in row['deduplication_potential_duplicate_ids'] if linked_id in ref_by_id
+    }
+
+
+@pytest.fixture(scope="module")
+def odoo_benchmark_env():
+    """
+    Odoo environment of a DEDICATED benchmark database: the batch sweep commits its
+    progress, so the data cannot be rolled back. Synthetic farmers are identified by a
+    per-run UID prefix and deleted after each size.
+    Enabled with DFR_DEDUP_BENCHMARK=1; connection via DFR_ODOO_HOST, DFR_ODOO_PORT,
+    DFR_ODOO_DB, DFR_ODOO_USER and DFR_ODOO_PASSWORD.
+    """
+    if os.getenv("DFR_DEDUP_BENCHMARK") != "1":
+        pytest.skip("De-duplication benchmark disabled (set DFR_DEDUP_BENCHMARK=1 on a dedicated database).")
+    helper = OdooTestHelper(rpc_config={
+        'host': os.getenv("DFR_ODOO_HOST", "localhost"),
+        'port': os.getenv("DFR_ODOO_PORT", "8069"),
+        'db_name': os.getenv("DFR_ODOO_DB"),
+        'user': os.getenv("DFR_ODOO_USER"),
+        'password': os.getenv("DFR_ODOO_PASSWORD"),
+    })
+    if not helper.env:
+        pytest.skip("Odoo environment for the de-duplication benchmark is not available.")
+    yield helper.env
+
+    if BENCHMARK_RESULTS:
+        baseline = reporting_utils.load_benchmark_report("deduplication")
+        report_path = reporting_utils.write_benchmark_report("deduplication", BENCHMARK_RESULTS, metadata={
+            'duplicate_rate': DUPLICATE_RATE,
+            'realtime_sample_size': REALTIME_SAMPLE_SIZE,
+            'sizes': BENCHMARK_SIZES,
+        })
+        if baseline and report_path:
+            current = reporting_utils.load_benchmark_report("deduplication", report_path)
+            regressions = reporting_utils.compare_benchmark_reports(baseline, current, tolerance=REGRESSION_TOLERANCE)
+            logger.info(f"De-duplication benchmark: {len(regressions)} regression(s) against the previous run.")
+
+
+@pytest.mark.integration
+@pytest.mark.performance
+@pytest.mark.deduplication
+@pytest.mark.parametrize("registry_size", BENCHMARK_SIZES, ids=lambda size: f"{size}_farmers")
+def test_deduplication_benchmark(odoo_benchmark_env, registry_size):
+    """
+    Throughput, p50/p95 latency and accuracy (precision/recall) of the real-time duplicate
+    check and of the batch sweep on a synthetic registry with controlled duplicates
+    (typos, swapped name order, missing date of birth, transliteration variants).
+
+    1. The registry is loaded with real-time checks disabled, except a sample of duplicates.
+    2. Each held-out duplicate is checked with find_potential_duplicates (real-time latency and accuracy).
+    3. The held-out duplicates are loaded and a full sweep links duplicates over the whole registry.
+    """
+    env = odoo_benchmark_env
+    run_prefix = f"BENCH{int(time.time())}-"
+    records, duplicate_refs = synthetic_registry.generate_registry(registry_size, DUPLICATE_RATE)
+    expected_pairs = synthetic_registry.true_duplicate_pairs(duplicate_refs)
+
+    sample_refs = set(sorted(duplicate_refs)[:REALTIME_SAMPLE_SIZE])
+    held_out = [record for record in records if record['ref'] in sample_refs]
+    base = [record for record in records if record['ref'] not in sample_refs]
+
+    IrConfigParameter = env['ir.config_parameter']
+    realtime_enabled = IrConfigParameter.get_param(REALTIME_PARAM, 'True')
+    IrConfigParameter.set_param(REALTIME_PARAM, 'False')
+    results = {}
+    try:
+        load_seconds = _load_farmers(env, base, run_prefix)
+        results['load'] = {'farmers': len(base), 'seconds': round(load_seconds, 2),
+                           'throughput_per_s': round(len(base) / load_seconds, 2) if load_seconds else None}
+        logger.info(f"[{registry_size}] Loaded {len(base)} farmers in {load_seconds:.1f}s.")
+
+        # 2. Real-time check of the held-out duplicates
+        rows = env['dfr.farmer'].search_read([('uid', '=like', run_prefix + '%')], ['uid'])
+        ref_by_id = {row['id']: row['uid'][len(run_prefix):] for row in rows}
+        DeduplicationService = env['dfr.deduplication.service']
+        durations, predicted = [], set()
+        for record in held_out:
+            data = {field_name: record[field_name] for field_name in FARMER_FIELDS if record[field_name]}
+            started = time.perf_counter()
+            matches = DeduplicationService.find_potential_duplicates('dfr.farmer', data)
+            durations.append(time.perf_counter() - started)
+            predicted.update(tuple(sorted((record['ref'], ref_by_id[match['id']])))
+                             for match in matches if match['id'] in ref_by_id)
+        base_refs = {record['ref'] for record in base}
+        expected_realtime = {pair for pair in expected_pairs
+                             if (pair[0] in sample_refs and pair[1] in base_refs) or (pair[1] in sample_refs and pair[0] in base_refs)}
+        results['realtime'] = dict(synthetic_registry.latency_summary(durations),
+                                   **synthetic_registry.precision_recall(predicted, expected_realtime))
+        logger.info(f"[{registry_size}] Real-time check: {results['realtime']}")
+
+        # 3. Full batch sweep over the complete registry
+        _load_farmers(env, held_out, run_prefix)
+        Sweep = env['dfr.deduplication.sweep']
+        sweep_id = _ids(Sweep.create({'mode': 'full'}))[0]
+        started = time.perf_counter()
+        Sweep.browse(sweep_id).action_start()
+        sweep_seconds = time.perf_counter() - started
+        sweep = Sweep.search_read([('id', '=', sweep_id)], ['state', 'pairs_scored', 'duplicates_found', 'blocks_total'])[0]
+        assert sweep['state'] == 'done', f"Sweep ended in state {sweep['state']}"
+        results['sweep'] = dict({
+            'seconds': round(sweep_seconds, 2),
+            'farmers_per_s': round(registry_size / sweep_seconds, 2) if sweep_seconds else None,
+            'pairs_scored': sweep['pairs_scored'],
+            'pairs_per_s': round(sweep['pairs_scored'] / sweep_seconds, 2) if sweep_seconds else None,
+            'blocks': sweep['blocks_total'],
+        }, **synthetic_registry.precision_recall(_linked_pairs(env, run_prefix), expected_pairs))
+        logger.info(f"[{registry_size}] Batch sweep: {results['sweep']}")
+    finally:
+        IrConfigParameter.set_param(REALTIME_PARAM, realtime_enabled)
+        Farmer = env['dfr.farmer']
+        Farmer.browse(_ids(Farmer.search([('uid', '=like', run_prefix + '%')]))).unlink()
+        BENCHMARK_RESULTS[str(registry_size)] = results
+
+    assert results['realtime']['count'] == len(held_out)
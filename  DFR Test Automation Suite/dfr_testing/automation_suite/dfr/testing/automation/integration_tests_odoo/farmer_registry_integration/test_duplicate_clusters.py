@@ -0,0 +1,34 @@
+import time
+
+import pytest
+
+REALTIME_PARAM = 'dfr.deduplication.realtime.enabled'
+
+
+@pytest.mark.integration
+@pytest.mark.deduplication
+def test_full_rebuild_keeps_cluster_scores(odoo_native_env):
+    """ Rebuilding all clusters keeps the max score of each cluster instead of spreading the highest one. """
+    env = odoo_native_env
+    env['ir.config_parameter'].set_param(REALTIME_PARAM, 'False') # Only the links created below
+    run_prefix = f"CLUSTER{int(time.time())}-"
+    farmer_a, farmer_b, farmer_c, farmer_d = env['dfr.farmer'].create([
+        {'name': name, 'uid': f'{run_prefix}{index}'}
+        for index, name in enumerate(['Abebe Kebede', 'Abebe Kebedde', 'Tsion Alemu', 'Tsion Alemou'])
+    ])
+    DeduplicationService = env['dfr.deduplication.service']
+    DeduplicationService._link_duplicate_pairs({(farmer_a.id, farmer_b.id): 95})
+    DeduplicationService._link_duplicate_pairs({(farmer_c.id, farmer_d.id): 70})
+    cluster_high, cluster_low = farmer_a.deduplication_cluster_id, farmer_c.deduplication_cluster_id
+    assert (cluster_high.max_score, cluster_low.max_score) == (95, 70)
+
+    Cluster = env['dfr.deduplication.cluster']
+    Cluster._cron_rebuild_clusters()
+    Cluster.invalidate_model()
+    env['dfr.farmer'].invalidate_model(['deduplication_cluster_id'])
+
+    assert farmer_a.deduplication_cluster_id == farmer_b.deduplication_cluster_id
+    assert farmer_c.deduplication_cluster_id == farmer_d.deduplication_cluster_id
+    assert farmer_a.deduplication_cluster_id != farmer_c.deduplication_cluster_id
+    assert farmer_a.deduplication_cluster_id.max_score == 95
+    assert farmer_c.deduplication_cluster_id.max_score == 70
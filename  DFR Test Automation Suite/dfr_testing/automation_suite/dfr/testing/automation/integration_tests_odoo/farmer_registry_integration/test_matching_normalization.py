@@ -0,0 +1,77 @@
+import importlib.util
+import os
+from pathlib import Path
+
+import pytest
+
+# utils/matching.py of the farmer registry addon has no Odoo dependency: it is loaded from its
+# file, as importing the addon package would import odoo
+MATCHING_PATH = Path(os.getenv(
+    "DFR_FARMER_REGISTRY_ADDON_PATH",
+    Path(__file__).resolve().parents[8] / " DFR Farmer Registry Module" / "dfr_addons" / "dfr_farmer_registry",
+)) / "utils" / "matching.py"
+
+
+@pytest.fixture(scope="module")
+def matching():
+    if not MATCHING_PATH.is_file():
+        pytest.skip(f"Farmer registry addon not found at {MATCHING_PATH} (set DFR_FARMER_REGISTRY_ADDON_PATH).")
+    spec = importlib.util.spec_from_file_location("dfr_farmer_registry_matching", MATCHING_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# Registry names in non-Latin scripts and their normalized form
+NON_LATIN_NAMES = [
+    ('Абебе Кебеде', 'абебе кебеде'), # Cyrillic
+    ('አበበ ከበደ', 'አበበ ከበደ'), # Ethiopic (Amharic)
+    ('محمد علي', 'محمد علي'), # Arabic
+    ('مُحَمَّد  عَلِي', 'محمد علي'), # Arabic with vowel marks
+    ('राम कुमार', 'राम कुमार'), # Devanagari: vowel signs are kept
+]
+
+
+@pytest.mark.deduplication
+@pytest.mark.parametrize("name, expected", NON_LATIN_NAMES)
+def test_normalize_name_keeps_non_latin_letters(matching, name, expected):
+    assert matching.normalize_name(name) == expected
+
+
+@pytest.mark.deduplication
+@pytest.mark.parametrize("name, expected", [
+    ('José  Pérez-García', 'jose perez garcia'),
+    ("O'BRIEN, Seán", 'o brien sean'),
+    ('Straße', 'strasse'),
+    ('  ', ''),
+    (False, ''),
+])
+def test_normalize_name_latin(matching, name, expected):
+    assert matching.normalize_name(name) == expected
+
+
+@pytest.mark.deduplication
+@pytest.mark.parametrize("name, _expected", NON_LATIN_NAMES)
+def test_non_latin_names_have_blocking_keys(matching, name, _expected):
+    keys = matching.compute_blocking_keys(name, '1980-05-01')
+    assert f"{matching.KEY_SORTED_TOKENS}:{matching.sorted_name_tokens(name)}" in keys
+    assert any(key.startswith(f"{matching.KEY_PREFIX_BIRTH_YEAR}:") for key in keys)
+    # Soundex only codes Latin letters
+    assert not any(key.startswith(f"{matching.KEY_PHONETIC}:") for key in keys)
+
+
+@pytest.mark.deduplication
+def test_non_latin_name_variants_share_keys(matching):
+    """ Spacing, punctuation, case and vowel marks do not separate identical registry names. """
+    assert matching.compute_blocking_keys('محمد علي') == matching.compute_blocking_keys('مُحَمَّد، عَلِي')
+    assert matching.compute_blocking_keys('АБЕБЕ  кебеде') == matching.compute_blocking_keys('Абебе Кебеде')
+    assert matching.sorted_name_tokens('Кебеде Абебе') == matching.sorted_name_tokens('Абебе Кебеде')
+
+
+@pytest.mark.deduplication
+@pytest.mark.parametrize("name", ['...', '- -', '()'])
+def test_keyless_names(matching, name):
+    """ Names without letters or digits yield no blocking key (see the blocking key backfill). """
+    assert matching.normalize_name(name) == ''
+    assert matching.compute_blocking_keys(name, '1980-05-01') == set()
+    assert matching.normalize_field_value('name', name) is False
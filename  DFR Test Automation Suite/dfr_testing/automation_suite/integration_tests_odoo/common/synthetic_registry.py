@@ -0,0 +1,202 @@
+import datetime
+import itertools
+import math
+import random
+
+# Synthetic farmer registry with controlled duplicates, for de-duplication benchmarks.
+# Deterministic for a given seed so that runs (and their reports) can be compared.
+
+SYLLABLES = ['ka', 'ma', 'ri', 'to', 'ne', 'sa', 'lu', 'be', 'do', 'mi', 'ko', 'na', 'ta', 'wa', 'ji',
+             'ro', 'si', 'ba', 'ga', 'le', 'mo', 'ni', 'pe', 'ru', 'zo', 'ha', 'ki', 'yo', 'fa', 'chi']
+
+# Spelling variants produced by transliteration of the same name
+TRANSLITERATIONS = {
+    'mohammed': ['muhammad', 'mohamed', 'mohammad'],
+    'joseph': ['josef', 'yusuf'],
+    'fatima': ['fatma', 'fatimah'],
+    'abdul': ['abdoul', 'abdool'],
+    'aisha': ['aicha', 'ayesha'],
+    'peter': ['petro', 'pita'],
+    'john': ['jon', 'yohana'],
+    'mary': ['maria', 'mariam'],
+}
+ACCENTS = {'a': 'á', 'e': 'é', 'i': 'í', 'o': 'ó', 'u': 'ú', 'n': 'ñ', 'c': 'ç'}
+
+DUPLICATE_KINDS = ('typo', 'swapped_order', 'missing_dob', 'transliteration')
+
+
+def _name_pool(rng, size):
+    names = set(TRANSLITERATIONS)
+    while len(names) < size:
+        names.add(''.join(rng.choice(SYLLABLES) for _i in range(rng.randint(2, 4))))
+    return sorted(names)
+
+
+def _typo(name, rng):
+    """ One character substitution, deletion or transposition, as produced by manual data entry. """
+    position = rng.randrange(len(name) - 1)
+    operation = rng.choice(('substitute', 'delete', 'transpose'))
+    if operation == 'substitute':
+        return name[:position] + rng.choice('aeiounrst') + name[position + 1:]
+    if operation == 'delete':
+        return name[:position] + name[position + 1:]
+    return name[:position] + name[position + 1] + name[position] + name[position + 2:]
+
+
+def _transliterate(name, rng):
+    tokens = name.split(' ')
+    variants = [index for index, token in enumerate(tokens) if token.lower() in TRANSLITERATIONS]
+    if variants:
+        index = rng.choice(variants)
+        tokens[index] = rng.choice(TRANSLITERATIONS[tokens[index].lower()]).capitalize()
+        return ' '.join(tokens)
+    # No known variant: accented spelling of the same name (at least one accented letter)
+    positions = [index for index, char in enumerate(name) if char in ACCENTS]
+    if not positions:
+        return name
+    accented = set(index for index in positions if rng.random() < 0.3) or {rng.choice(positions)}
+    return ''.join(ACCENTS[char] if index in accented else char for index, char in enumerate(name))
+
+
+def _format_national_id(national_id, rng):
+    """ Same ID number entered with different separators / case. """
+    if rng.random() < 0.5:
+        return '%s-%s %s' % (national_id[:3].lower(), national_id[3:7], national_id[7:])
+    return national_id
+
+
+def make_duplicate(record, kind, rng):
+    duplicate = dict(record)
+    if kind == 'typo':
+        tokens = duplicate['name'].split(' ')
+        index = rng.randrange(len(tokens))
+        tokens[index] = _typo(tokens[index], rng) if len(tokens[index]) > 2 else tokens[index]
+        duplicate['name'] = ' '.join(tokens)
+    elif kind == 'swapped_order':
+        duplicate['name'] = ' '.join(reversed(duplicate['name'].split(' ')))
+    elif kind == 'missing_dob':
+        duplicate['date_of_birth'] = False
+    elif kind == 'transliteration':
+        duplicate['name'] = _transliterate(duplicate['name'], rng)
+    # The national ID is often missing or re-typed on the second registration
+    if duplicate['national_id_number']:
+        if rng.random() < 0.5:
+            duplicate['national_id_number'] = False
+        else:
+            duplicate['national_id_number'] = _format_national_id(duplicate['national_id_number'], rng)
+    return duplicate
+
+
+def generate_registry(size, duplicate_rate=0.1, seed=42):
+    """
+    Generates `size` farmer records, `duplicate_rate` of which are duplicates of another record
+    (typo, swapped name order, missing date of birth or transliteration variant).
+
+    Args:
+        size (int): Total number of records.
+        duplicate_rate (float): Share of the records that are duplicates.
+        seed (int): Random seed.
+
+    Returns:
+        tuple: (records, duplicate_refs)
+            records: list of dicts with 'ref' (synthetic key), 'name', 'date_of_birth', 'sex',
+                     'national_id_number', 'contact_phone' and 'duplicate_kind' (False for originals)
+            duplicate_refs: dict {duplicate ref: original ref}
+    """
+    rng = random.Random(seed)
+    pool_size = max(200, int(math.sqrt(size) * 4))
+    first_names, last_names = _name_pool(rng, pool_size), _name_pool(rng, pool_size * 2)
+    duplicate_count = int(size * duplicate_rate)
+    original_count = size - duplicate_count
+
+    records = []
+    for index in range(original_count):
+        birth_date = datetime.date(1940, 1, 1) + datetime.timedelta(days=rng.randrange(365 * 65))
+        records.append({
+            'ref': 'SYN%08d' % index,
+            'name': '%s %s' % (rng.choice(first_names).capitalize(), rng.choice(last_names).capitalize()),
+            'date_of_birth': birth_date.isoformat(),
+            'sex': rng.choice(('male', 'female')),
+            'national_id_number': 'NID%08d' % index if rng.random() < 0.7 else False,
+            'contact_phone': '0%d' % rng.randrange(700000000, 799999999) if rng.random() < 0.6 else False,
+            'duplicate_kind': False,
+        })
+
+    duplicate_refs = {}
+    for index in range(duplicate_count):
+        original = records[rng.randrange(original_count)]
+        kind = DUPLICATE_KINDS[index % len(DUPLICATE_KINDS)]
+        duplicate = make_duplicate(original, kind, rng)
+        duplicate.update({'ref': 'DUP%08d' % index, 'duplicate_kind': kind})
+        duplicate_refs[duplicate['ref']] = original['ref']
+        records.append(duplicate)
+    rng.shuffle(records)
+    return records, duplicate_refs
+
+
+def true_duplicate_pairs(duplicate_refs):
+    """
+    All pairs of records describing the same farmer: an original and its duplicates,
+    and duplicates of the same original with each other.
+
+    Returns:
+        set: unordered pairs as sorted (ref, ref) tuples
+    """
+    groups = {}
+    for duplicate_ref, original_ref in duplicate_refs.items():
+        groups.setdefault(original_ref, [original_ref]).append(duplicate_ref)
+    pairs = set()
+    for members in groups.values():
+        pairs.update(tuple(sorted(pair)) for pair in itertools.combinations(members, 2))
+    return pairs
+
+
+def precision_recall(predicted_pairs, expected_pairs):
+    """
+    Args:
+        predicted_pairs (set): pairs flagged by the system, as sorted (ref, ref) tuples
+        expected_pairs (set): true duplicate pairs
+
+    Returns:
+        dict: true_positives, false_positives, false_negatives, precision, recall, f1
+    """
+    true_positives = len(predicted_pairs & expected_pairs)
+    false_positives = len(predicted_pairs - expected_pairs)
+    false_negatives = len(expected_pairs - predicted_pairs)
+    precision = true_positives / (true_positives + false_positives) if predicted_pairs else 1.0
+    recall = true_positives / (true_positives + false_negatives) if expected_pairs else 1.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return {
+        'true_positives': true_positives,
+        'false_positives': false_positives,
+        'false_negatives': false_negatives,
+        'precision': round(precision, 4),
+        'recall': round(recall, 4),
+        'f1': round(f1, 4),
+    }
+
+
+def latency_summary(durations_seconds):
+    """
+    Args:
+        durations_seconds (list): individual operation durations
+
+    Returns:
+        dict: count, throughput (operations per second), p50/p95/max latency in milliseconds
+    """
+    if not durations_seconds:
+        return {'count': 0, 'throughput_per_s': 0.0, 'p50_ms': None, 'p95_ms': None, 'max_ms': None}
+    ordered = sorted(durations_seconds)
+
+    def percentile(fraction):
+        # Nearest-rank percentile
+        return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)] * 1000
+
+    total = sum(ordered)
+    return {
+        'count': len(ordered),
+        'throughput_per_s': round(len(ordered) / total, 2) if total else None,
+        'p50_ms': round(percentile(0.50), 2),
+        'p95_ms': round(percentile(0.95), 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
@@ -1,5 +1,6 @@
 ```python
 import os
+import json
 import datetime
 from dfr.testing.automation.config import global_config
 from dfr.testing.automation.utils.logger_setup import setup_logger
@@ -101,6 +102,87 @@ def log_test_result_to_file(test_name: str, status: str, message: str = None, du
     except IOError as e:
         logger.error(f"Failed to write custom test result to {custom_report_file}: {e}")
 
+def write_benchmark_report(benchmark_name: str, results: dict, metadata: dict = None):
+    """
+    Writes a machine-readable (JSON) benchmark report to the reports directory, so that
+    runs can be compared with compare_benchmark_reports.
+    The report is written twice: timestamped, and as "<benchmark_name>_latest.json".
+
+    Args:
+        benchmark_name (str): Name of the benchmark (e.g., "deduplication").
+        results (dict): Measurements, e.g. {"10000": {"realtime": {...}, "sweep": {...}}}.
+        metadata (dict, optional): Run context (environment, parameters, versions).
+
+    Returns:
+        str | None: The absolute path to the timestamped report, or None if writing failed.
+    """
+    benchmarks_dir = global_config.REPORTS_DIR / "benchmarks"
+    benchmarks_dir.mkdir(parents=True, exist_ok=True)
+    timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    report = {
+        'benchmark': benchmark_name,
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'environment': global_config.get_target_environment(),
+        'metadata': metadata or {},
+        'results': results,
+    }
+    report_path = benchmarks_dir / f"{benchmark_name}_{timestamp}.json"
+    try:
+        for path in (report_path, benchmarks_dir / f"{benchmark_name}_latest.json"):
+            with open(path, "w", encoding='utf-8') as f:
+                json.dump(report, f, indent=2, sort_keys=True, default=str)
+        logger.info(f"Benchmark report written: {report_path}")
+        return str(report_path)
+    except IOError as e:
+        logger.error(f"Failed to write benchmark report {report_path}: {e}")
+        return None
+
+def load_benchmark_report(benchmark_name: str, report_path: str = None):
+    """
+    Loads a benchmark report (by default the latest one of the given benchmark).
+
+    Returns:
+        dict | None: The report, or None if there is none.
+    """
+    path = report_path or global_config.REPORTS_DIR / "benchmarks" / f"{benchmark_name}_latest.json"
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+def compare_benchmark_reports(baseline: dict, current: dict, tolerance: float = 0.2,
+                              higher_is_better=('throughput_per_s', 'precision', 'recall', 'f1')):
+    """
+    Compares the numeric metrics of two benchmark reports (same nested keys).
+    A metric regresses when it is worse than the baseline by more than `tolerance`
+    (relative); metrics named in `higher_is_better` regress when they decrease,
+    all other metrics (latencies, durations) when they increase.
+
+    Returns:
+        list: Regressions as dicts with 'metric' (dotted path), 'baseline', 'current' and 'change' (relative).
+    """
+    regressions = []
+
+    def walk(baseline_node, current_node, path):
+        for key, baseline_value in baseline_node.items():
+            current_value = current_node.get(key) if isinstance(current_node, dict) else None
+            metric = f"{path}.{key}" if path else str(key)
+            if isinstance(baseline_value, dict):
+                walk(baseline_value, current_value or {}, metric)
+            elif isinstance(baseline_value, (int, float)) and not isinstance(baseline_value, bool) \
+                    and isinstance(current_value, (int, float)) and baseline_value:
+                change = (current_value - baseline_value) / abs(baseline_value)
+                worse = -change if key in higher_is_better else change
+                if worse > tolerance:
+                    regressions.append({'metric': metric, 'baseline': baseline_value,
+                                        'current': current_value, 'change': round(change, 4)})
+
+    walk(baseline.get('results', {}), current.get('results', {}), '')
+    for regression in regressions:
+        logger.warning(f"Benchmark regression on {regression['metric']}: "
+                       f"{regression['baseline']} -> {regression['current']} ({regression['change']:+.1%})")
+    return regressions
+
 # Other potential functions:
 # - update_test_management_tool(test_case_id, status, comments)
 #   (This would require integration with a specific test management tool's API)